@@ -0,0 +1,62 @@
+"""
+Compare the literal fast paths in `regex_test_generator` against sending every
+pattern through the regex engine, as the filter did before the fast paths
+
+Run from the repository root with:
+    python -m benchmarks.bench_literal_filters
+"""
+
+
+import random
+import timeit
+import uuid
+
+from logria.utilities.regex_generator import (ANSI_COLOR_REGEX,
+                                              compile_pattern,
+                                              regex_test_generator)
+
+random.seed(0)
+MESSAGES = [
+    f'\u001b[33m2020-02-08 19:00:{x % 60:02} \u001b[0m- INFO - request {uuid.uuid4().hex[:12]} '
+    f'host web-{x % 40} served in {x % 97}ms\n'
+    if x % 4 == 0 else
+    f'2020-02-08 19:00:{x % 60:02} - INFO - request {uuid.uuid4().hex[:12]} '
+    f'host web-{x % 40} served in {x % 97}ms\n'
+    for x in range(100_000)
+]
+
+
+def regex_engine_test_generator(pattern: str):
+    """
+    The filter function before the literal fast paths: always strip, always use `re`
+    """
+    search = compile_pattern(pattern).search
+    strip = ANSI_COLOR_REGEX.sub
+    return lambda string: bool(search(strip('', string)))
+
+
+def scan(func_handle) -> int:
+    """
+    Count matches the way `process_matches` walks the buffer
+    """
+    return sum(1 for message in MESSAGES if func_handle(message))
+
+
+def main():
+    """
+    Time both implementations for a single literal and for sets of request IDs
+    """
+    cases = [('1 literal', 'web-7 ')]
+    for count in (10, 48, 500):
+        cases.append((f'{count} literals', '|'.join(uuid.uuid4().hex[:12] for _ in range(count))))
+    for name, pattern in cases:
+        timings = []
+        for generator in (regex_engine_test_generator, regex_test_generator):
+            func_handle = generator(pattern)
+            timings.append(min(timeit.repeat(lambda: scan(func_handle), number=1, repeat=3)))  # pylint: disable=cell-var-from-loop
+        print(f'{name:>12}: regex engine {timings[0] * 1000:8.1f} ms, '
+              f'fast path {timings[1] * 1000:8.1f} ms per {len(MESSAGES):,} messages')
+
+
+if __name__ == '__main__':
+    main()
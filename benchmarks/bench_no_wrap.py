@@ -0,0 +1,53 @@
+"""
+Compare the work done to draw long colorized messages when they wrap, measuring and
+tokenizing the whole message, against drawing each on one row and only tokenizing
+the columns that fit in the window
+
+Run from the repository root with:
+    python -m benchmarks.bench_no_wrap
+"""
+
+
+import timeit
+
+from logria.interface.color_handler import tokenize
+from logria.utilities.regex_generator import get_real_length
+
+WIDTH = 120  # Columns in the simulated window
+MESSAGES = [
+    f'\u001b[33m2020-02-08 19:00:{x % 60:02}\u001b[0m \u001b[32mapp.worker\u001b[0m - '
+    + ' '.join(f'\u001b[{31 + y % 7}mfield{y}\u001b[0m={x * y}' for y in range(200)) + '\n'
+    for x in range(1_000)
+]
+
+
+def wrapped() -> None:
+    """
+    Measure the rows each message wraps onto and tokenize all of it
+    """
+    for message in MESSAGES:
+        get_real_length(message)
+        tokenize(message.rstrip())
+
+
+def clipped() -> None:
+    """
+    Tokenize only the columns of each message that fit in the window
+    """
+    for message in MESSAGES:
+        tokenize(message, 0, WIDTH)
+
+
+def main():
+    """
+    Time drawing every message once each way
+    """
+    length = sum(map(get_real_length, MESSAGES)) // len(MESSAGES)
+    print(f'{len(MESSAGES):,} messages of {length:,} columns in a {WIDTH} column window')
+    for name, render in (('wrapped', wrapped), ('no wrap', clipped)):
+        best = min(timeit.repeat(render, number=1, repeat=5))
+        print(f'{name:>10}: {best * 1000:8.1f} ms, {len(MESSAGES) / best:10,.0f} messages per second')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare scanning a backlog across processes with `ParallelScan` against the serial loop
+
+Results depend on the number of cores; on a single core the parallel scan only adds
+the cost of encoding the messages into shared memory
+
+Run from the repository root with:
+    python -m benchmarks.bench_parallel_scan
+"""
+
+
+import os
+import time
+from typing import List
+
+from logria.logger.parallel_scan import ParallelScan
+from logria.utilities.filter_expression import filter_test_generator
+
+MESSAGES = [
+    f'2020-02-08 19:{x // 60 % 60:02}:{x % 60:02} - {"ERROR" if x % 1000 == 0 else "INFO"} - '
+    f'request {x:08x} host web-{x % 40} served in {x % 97}ms\n'
+    for x in range(1_000_000)
+]
+
+
+def serial_scan(command: str) -> list:
+    """
+    Test every message in this process, as `process_matches` does for small backlogs
+    """
+    func_handle = filter_test_generator(command)
+    assert func_handle is not None
+    return [index for index, message in enumerate(MESSAGES) if func_handle(message)]
+
+
+def parallel_scan(command: str) -> list:
+    """
+    Test every message across processes, collecting chunks as they finish
+    """
+    scan = ParallelScan(MESSAGES, command, 0, len(MESSAGES))
+    matches: List[int] = []
+    while not scan.done:
+        matches.extend(index for index, _ in scan.collect())
+        time.sleep(0.001)
+    return matches
+
+
+def main():
+    """
+    Time both scans for a cheap and an expensive filter
+    """
+    print(f'{os.cpu_count()} cores')
+    for command in ('ERROR', r'ERROR.*web-\d+ served in \d{2}ms'):
+        t_0 = time.perf_counter()
+        expected = serial_scan(command)
+        t_1 = time.perf_counter()
+        result = parallel_scan(command)
+        t_2 = time.perf_counter()
+        assert result == expected
+        print(f'{command:>36}: serial {(t_1 - t_0) * 1000:8.1f} ms, '
+              f'parallel {(t_2 - t_1) * 1000:8.1f} ms per {len(MESSAGES):,} messages')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare the filter function built from a cached compiled pattern against
+the previous implementation, which passed pattern strings to the `re` module
+
+Run from the repository root with:
+    python -m benchmarks.bench_regex_cache
+"""
+
+
+import re
+import timeit
+
+from logria.utilities.constants import ANSI_COLOR_PATTERN
+from logria.utilities.regex_generator import regex_test_generator
+
+PATTERN = r'ERROR.*timeout'
+MESSAGES = [
+    f'\u001b[33m2020-02-08 19:00:{x % 60:02} \u001b[0m- \u001b[36mINFO \u001b[0m- request {x} served in {x % 97}ms\n'
+    for x in range(100_000)
+]
+
+
+def uncached_test_generator(pattern: str):
+    """
+    The filter function as it was built before the compiled-pattern cache
+    """
+    re.compile(pattern)
+    return lambda string: bool(re.search(pattern,
+                                         re.sub(ANSI_COLOR_PATTERN,
+                                                '',
+                                                string)))
+
+
+def scan(func_handle) -> int:
+    """
+    Count matches the way `process_matches` walks the buffer
+    """
+    return sum(1 for message in MESSAGES if func_handle(message))
+
+
+def main():
+    """
+    Time both implementations over the same buffer
+    """
+    for name, generator in (('re module strings', uncached_test_generator),
+                            ('cached compiled pattern', regex_test_generator)):
+        func_handle = generator(PATTERN)
+        best = min(timeit.repeat(lambda: scan(func_handle), number=1, repeat=5))  # pylint: disable=cell-var-from-loop
+        print(f'{name:>24}: {best * 1000:8.1f} ms per {len(MESSAGES):,} messages')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Compare render throughput on heavily colorized logs: parsing escape codes and
+reading the cursor back for every segment on every frame, as `_add_line` did,
+against tokenizing each line once into cached segments, and against also
+skipping the rows that did not change
+
+A stub window stands in for curses, so only the work done in Python is timed
+
+Run from the repository root with:
+    python -m benchmarks.bench_render_segments
+"""
+
+
+import curses
+import timeit
+
+from logria.interface import color_handler
+from logria.interface.screen_rows import ScreenRows
+from logria.interface.segment_cache import SegmentCache
+
+ROWS = 50  # Height of the simulated window
+FRAMES = 2_000  # Frames rendered while following the stream, one new message each
+MESSAGES = [
+    f'\u001b[33m2020-02-08 19:00:{x % 60:02} \u001b[0m- \u001b[32m{"app.worker." + str(x % 7)}\u001b[0m - '
+    f'\u001b[{31 + x % 7}m{("INFO", "WARN", "ERROR")[x % 3]}\u001b[0m - \u001b[36mrequest\u001b[0m {x} '
+    f'\u001b[35mserved\u001b[0m in \u001b[34m{x % 97}ms\u001b[0m'
+    for x in range(FRAMES + ROWS)
+]
+
+
+class StubWindow():
+    """
+    Accepts draw calls without drawing, tracking the cursor like curses would
+    """
+
+    def __init__(self):
+        self.cursor = (0, 0)
+
+    def addstr(self, *args):
+        if len(args) == 4:
+            self.cursor = (args[0], args[1] + len(args[2]))
+        else:
+            self.cursor = (self.cursor[0], self.cursor[1] + len(args[0]))
+
+    def noutrefresh(self):
+        pass
+
+    def getyx(self):
+        return self.cursor
+
+    def erase(self):
+        pass
+
+    def idlok(self, flag):
+        pass
+
+    def scrollok(self, flag):
+        pass
+
+    def scroll(self, lines):
+        pass
+
+    def move(self, row, column):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+
+def split_every_frame(window: StubWindow, line: str, y_coord: int) -> None:
+    """
+    Draw a line the way `_add_line` did before segments, with a cursor read after each one
+    """
+    color_split = line.split('\033')
+    window.addstr(y_coord, 0, color_split[0], curses.color_pair(color_handler._get_color(-1, -1)))
+    window.noutrefresh()
+    y_coord, x_coord = window.getyx()
+    for substring in color_split[1:]:
+        color_str = substring.split('m')[0]
+        substring = substring[len(color_str) + 1:]
+        window.addstr(y_coord, x_coord, substring, curses.color_pair(color_handler._color_str_to_color_pair(color_str)))
+        window.noutrefresh()
+        y_coord, x_coord = window.getyx()
+
+
+def follow_split() -> None:
+    """
+    Follow the stream, parsing every visible line on every frame
+    """
+    window = StubWindow()
+    for frame in range(FRAMES):
+        for row in range(ROWS):
+            split_every_frame(window, MESSAGES[frame + row], row)
+
+
+def follow_segments() -> None:
+    """
+    Follow the stream, drawing every visible line from cached segments
+    """
+    window = StubWindow()
+    cache = SegmentCache()
+    for frame in range(FRAMES):
+        for row in range(ROWS):
+            color_handler.draw_line(window, row, cache.get(MESSAGES, frame + row))
+
+
+def follow_segments_and_damage() -> None:
+    """
+    Follow the stream from cached segments, only drawing the rows that changed
+    """
+    window = StubWindow()
+    cache = SegmentCache()
+    screen = ScreenRows()
+    for frame in range(FRAMES):
+        lines = [(row, 1, cache.get(MESSAGES, frame + row)) for row in range(ROWS)]
+        screen.draw(window, ROWS, lines, color_handler.draw_line)
+
+
+def main():
+    """
+    Time each way of following the stream
+    """
+    # Curses needs a terminal to allocate color pairs, which the stub window does not have
+    curses.color_pair = lambda pair: pair
+    color_handler._get_color = lambda foreground, background: 101
+    for name, follow in (('split every frame', follow_split),
+                         ('cached segments', follow_segments),
+                         ('segments and damage', follow_segments_and_damage)):
+        best = min(timeit.repeat(follow, number=1, repeat=5))
+        print(f'{name:>20}: {best * 1000:8.1f} ms per {FRAMES:,} frames, {FRAMES / best:10,.0f} frames per second')
+
+
+if __name__ == '__main__':
+    main()
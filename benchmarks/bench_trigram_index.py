@@ -0,0 +1,64 @@
+"""
+Compare filtering a large buffer with the trigram index against scanning every message
+
+Run from the repository root with:
+    python -m benchmarks.bench_trigram_index
+"""
+
+
+import random
+import time
+import uuid
+
+from logria.utilities.filter_expression import filter_required_literals
+from logria.utilities.regex_generator import regex_test_generator
+from logria.utilities.trigram_index import TrigramIndex
+
+random.seed(0)
+MESSAGES = [
+    f'2020-02-08 19:{x // 60 % 60:02}:{x % 60:02} - INFO - request {uuid.UUID(int=random.getrandbits(128)).hex[:12]} '
+    f'host web-{x % 40} served in {x % 97}ms\n'
+    for x in range(1_000_000)
+]
+MESSAGES[777_777] = '2020-02-08 21:36:17 - ERROR - request 5f1e2d3c4b5a host web-17 connection refused\n'
+
+
+def full_scan(func_handle) -> list:
+    """
+    Test every message, as `process_matches` does without an index
+    """
+    return [index for index, message in enumerate(MESSAGES) if func_handle(message)]
+
+
+def indexed_scan(index: TrigramIndex, pattern: str, func_handle) -> list:
+    """
+    Test only the candidates the index returns
+    """
+    candidates = index.candidates(filter_required_literals(pattern))
+    assert candidates is not None
+    return [candidate for candidate in candidates if func_handle(MESSAGES[candidate])]
+
+
+def main():
+    """
+    Time building the index, then a few needle-in-haystack filters each way
+    """
+    t_0 = time.perf_counter()
+    index = TrigramIndex()
+    index.extend(MESSAGES)
+    print(f'Indexed {len(MESSAGES):,} messages in {time.perf_counter() - t_0:.1f} s, '
+          f'{index.size_bytes / 1024 / 1024:.1f} MiB')
+    for pattern in ('connection refused', r'ERROR - request \w+ host', '5f1e2d3c4b5a'):
+        func_handle = regex_test_generator(pattern)
+        t_0 = time.perf_counter()
+        expected = full_scan(func_handle)
+        t_1 = time.perf_counter()
+        result = indexed_scan(index, pattern, func_handle)
+        t_2 = time.perf_counter()
+        assert result == expected
+        print(f'{pattern:>28}: full scan {(t_1 - t_0) * 1000:8.1f} ms, '
+              f'indexed {(t_2 - t_1) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
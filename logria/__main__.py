@@ -8,15 +8,14 @@ import os
 import sys
 
 from logria import APP_NAME, VERSION
-from logria.communication.input_handler import CommandInputStream
+from logria.communication.input_handler import CommandInputStream, ReplayInputStream
 from logria.communication.shell_output import Logria
 from logria.utilities import constants
 
-def main():
+def build_parser() -> argparse.ArgumentParser:
     """
-    Main app loop, handles parsing args and starting the app
+    Build the parser for the CLI args
     """
-    # Setup CLI args
     parser = argparse.ArgumentParser(
         description=constants.APP_DESCRIPTION,
     )
@@ -28,8 +27,26 @@ def main():
                         help=constants.HISTORY_HELP)
     parser.add_argument('-n', '--no-smart-speed', dest='no_smart_speed', default=True, action='store_false',
                         help=constants.SMART_SPEED_HELP)
+    parser.add_argument('-r', '--record', dest='record', default=None, type=str,
+                        help=constants.RECORD_HELP)
+    parser.add_argument('--replay', dest='replay', default=None, type=str,
+                        help=constants.REPLAY_HELP)
+    parser.add_argument('--speed', dest='speed', default=1.0, type=float,
+                        help=constants.SPEED_HELP)
+    parser.add_argument('--fps', dest='fps', default=constants.RENDER_MAX_FPS, type=float,
+                        help=constants.FPS_HELP)
+    return parser
 
+
+def main():
+    """
+    Main app loop, handles parsing args and starting the app
+    """
+    # Setup CLI args
+    parser = build_parser()
     args = parser.parse_args()
+    if args.record and (args.replay or not args.e):
+        parser.error(constants.RECORD_WITHOUT_EXEC_ERROR)
 
     # pylint: disable=no-else-raise
     if not os.isatty(0):
@@ -37,14 +54,18 @@ def main():
         print(constants.PIPE_INPUT_ERROR)
         sys.exit(-1)
     else:
-        if args.e:
+        if args.replay:
+            stream = ReplayInputStream(args.replay.split('/'), speed=args.speed)
+            stream.start()
+        elif args.e:
             command = args.e[0].split(' ')
-            stream = CommandInputStream(command)
+            stream = CommandInputStream(command, record_path=args.record)
             stream.start()
         else:
             # If the stream is None, the app will ask the user to init
             stream = None
-        app = Logria(stream, history_tape_cache=args.no_cache, smart_poll_rate=args.no_smart_speed)
+        app = Logria(stream, history_tape_cache=args.no_cache, smart_poll_rate=args.no_smart_speed,
+                     max_fps=args.fps)
 
     app.start()
 
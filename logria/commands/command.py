@@ -2,11 +2,31 @@
 Logria command handler
 """
 import curses
+from typing import List
 
+from logria.commands import scroll
+from logria.commands.facets import select_facets
+from logria.commands.highlight import (add_highlight, remove_highlight,
+                                       show_highlights)
+from logria.commands.index import build_indexes, drop_indexes
+from logria.commands.layers import (add_layer, clear_layers, remove_layer,
+                                    show_layers, toggle_layer)
 from logria.commands.parser import reset_parser
+from logria.commands.report import show_report
+from logria.commands.watch import (add_watch, load_watchlist, remove_watch,
+                                   start_watch_mode)
+from logria.commands.regex import set_context
 from logria.utilities import constants
 from logria.commands.config import config_mode
+from logria.communication.metadata import MessageMetadata
 from logria.communication.setup import setup_streams
+from logria.interface import color_handler
+from logria.logger.processor import stop_parallel_scan
+from logria.utilities.command_parser import Resolver
+from logria.utilities.facets import parse_level
+from logria.utilities.match_spans import MatchSpans
+from logria.utilities.memory import human_readable, int_list_size
+from logria.utilities.snapshot import save_snapshot
 
 # from logria.communication.shell_output import Logria
 
@@ -15,14 +35,60 @@ def start_history_mode(logria: 'Logria', last_n: int) -> None:  # type: ignore
     """
     Swap message pointer to history tape
     """
-    # Store previous message pointer
-    if logria.messages is logria.stderr_messages:
-        logria.previous_messages = logria.stderr_messages
-    elif logria.messages is logria.stdout_messages:
-        logria.previous_messages = logria.stdout_messages
+    show_report(logria, logria.box.history_tape.tail(last_n=last_n))
 
-    # Set new message pointer
-    logria.messages = logria.box.history_tape.tail(last_n=last_n)
+
+def memory_report(logria: 'Logria') -> List[str]:  # type: ignore
+    """
+    Build a report of the approximate memory held by each buffer
+    """
+    sizes = {
+        'stdout_messages': logria.memory.get('stdout_messages'),
+        'stderr_messages': logria.memory.get('stderr_messages'),
+        'matched_rows': int_list_size(len(logria.matched_rows)),
+        'match spans': logria.match_spans.size_bytes(),
+        'parsed_messages': logria.memory.get('parsed_messages'),
+        'message metadata': logria.stdout_metadata.size_bytes() + logria.stderr_metadata.size_bytes(),
+        'parser analytics': logria.parser.analytics_bytes if logria.parser else 0,
+        'history tape': logria.box.history_tape.size_bytes,
+        'color pair cache': color_handler.cache_size(),
+        'color segments': logria.segment_cache.size_bytes(),
+        'filter cache': logria.filter_cache.size_bytes,
+        'filter layers': logria.filter_layers.size_bytes(),
+        'facet bitsets': logria.stdout_facets.size_bytes() + logria.stderr_facets.size_bytes(),
+        'wrapped heights': logria.row_heights.size_bytes(),
+        'highlight rule matches': logria.highlight_rules.size_bytes(),
+        'context rows': logria.context_view.size_bytes() if logria.context_view else 0,
+        'trigram indexes': sum(index.size_bytes for index in (logria.stdout_index, logria.stderr_index)
+                               if index is not None),
+    }
+    out_l = ['Approximate memory usage:']
+    out_l += [f'  {name}: {human_readable(size)}' for name, size in sizes.items()]
+    out_l.append(f'  Total: {human_readable(sum(sizes.values()))}')
+    for name, index in (('stdout', logria.stdout_index), ('stderr', logria.stderr_index)):
+        if index is not None and index.full:
+            out_l.append(f'  The {name} index reached {human_readable(index.max_bytes)} '
+                         f'and only covers the first {index.size:,} messages')
+    return out_l
+
+
+def start_memory_mode(logria: 'Logria') -> None:  # type: ignore
+    """
+    Swap message pointer to the memory report
+    """
+    show_report(logria, memory_report(logria))
+
+
+def take_snapshot(logria: 'Logria', path: str) -> None:  # type: ignore
+    """
+    Save the stdout and stderr buffers to a snapshot file
+    """
+    path = Resolver().resolve_file_as_str(path)
+    try:
+        save_snapshot(path, [(logria.stdout_messages, logria.stdout_metadata),
+                             (logria.stderr_messages, logria.stderr_metadata)])
+    except OSError as err:
+        logria.current_status = f'Unable to save snapshot: {err}'
 
 
 def handle_command(logria: 'Logria') -> None:  # type: ignore
@@ -49,6 +115,13 @@ def handle_command(logria: 'Logria') -> None:  # type: ignore
                 pass
             else:
                 logria.update_poll_rate(new_poll_rate)
+        elif command[:4] == ':fps':
+            try:
+                max_fps = float(command.replace(':fps', ''))
+            except ValueError:
+                pass
+            else:
+                logria.render_scheduler.set_max_fps(max_fps)
         elif command[:7] == ':config':
             config_mode(logria)
         elif command[:8] == ':history':
@@ -60,6 +133,105 @@ def handle_command(logria: 'Logria') -> None:  # type: ignore
                 except ValueError:
                     num_to_get = logria.height  # Default to screen height if no info given
                 start_history_mode(logria, num_to_get)
+        elif command[:4] == ':mem':
+            if command == ':mem off':
+                reset_parser(logria)
+            else:
+                start_memory_mode(logria)
+        elif command[:6] == ':index':
+            if command == ':index off':
+                drop_indexes(logria)
+            else:
+                try:
+                    max_mib = float(command.replace(':index', ''))
+                except ValueError:
+                    build_indexes(logria)
+                else:
+                    build_indexes(logria, int(max_mib * 1024 * 1024))
+        elif command[:8] in (':include', ':exclude'):
+            pattern = command[8:].strip()
+            if pattern:
+                add_layer(logria, pattern, exclude=command[:8] == ':exclude')
+        elif command[:6] == ':watch':
+            args = command.split(maxsplit=2)
+            if command == ':watch off':
+                reset_parser(logria)
+            elif len(args) == 1:
+                start_watch_mode(logria)
+            elif args[1] == 'load' and len(args) == 3:
+                load_watchlist(logria, args[2])
+            elif len(args) == 3:
+                add_watch(logria, args[1], args[2])
+        elif command[:5] == ':goto':
+            percent = command[5:].strip()
+            if percent.endswith('%'):
+                try:
+                    scroll.to_percent(logria, float(percent[:-1]))
+                except ValueError:
+                    pass
+        elif command[:6] == ':color':
+            args = command.split(maxsplit=3)
+            if len(args) == 1:
+                show_highlights(logria)
+            elif len(args) == 4:
+                add_highlight(logria, args[1], args[2], args[3])
+        elif command[:8] == ':uncolor':
+            name = command[8:].strip()
+            if name:
+                remove_highlight(logria, name)
+        elif command[:8] == ':unwatch':
+            name = command[8:].strip()
+            if name:
+                remove_watch(logria, name)
+        elif command[:6] == ':level':
+            if command == ':level off':
+                select_facets(logria, set(), logria.filter_layers.facets.sources)
+            else:
+                levels = [parse_level(name) for name in command[6:].split()]
+                if levels and None not in levels:
+                    select_facets(logria, {level for level in levels if level is not None},
+                                  logria.filter_layers.facets.sources)
+        elif command[:7] == ':source':
+            if command == ':source off':
+                select_facets(logria, logria.filter_layers.facets.levels, set())
+            else:
+                try:
+                    sources = {int(source) for source in command[7:].split()}
+                except ValueError:
+                    sources = set()
+                if sources:
+                    select_facets(logria, logria.filter_layers.facets.levels, sources)
+        elif command[:6] == ':layer':
+            args = command[6:].split()
+            if not args:
+                show_layers(logria)
+            elif args == ['off']:
+                clear_layers(logria)
+            else:
+                try:
+                    position = int(args[-1])
+                except ValueError:
+                    pass
+                else:
+                    if args[0] == 'rm':
+                        remove_layer(logria, position)
+                    else:
+                        toggle_layer(logria, position)
+        elif command[:8] == ':context':
+            if command == ':context off':
+                set_context(logria, 0, 0)
+            else:
+                try:
+                    counts = [int(count) for count in command.replace(':context', '').split()]
+                except ValueError:
+                    counts = []
+                if len(counts) in (1, 2) and min(counts) >= 0:
+                    # One number is used for both sides, like grep -C
+                    set_context(logria, counts[0], counts[-1])
+        elif command[:9] == ':snapshot':
+            path = command.replace(':snapshot', '').strip()
+            if path:
+                take_snapshot(logria, path)
         elif command[:8] == ':restart':
             # Kill all streams
             for stream in logria.streams:
@@ -69,8 +241,15 @@ def handle_command(logria: 'Logria') -> None:  # type: ignore
             # Reset messages buffers
             logria.stderr_messages = []
             logria.stdout_messages = []
+            logria.stderr_metadata = MessageMetadata()
+            logria.stdout_metadata = MessageMetadata()
             logria.parsed_messages = []
+            stop_parallel_scan(logria)
             logria.matched_rows = []
+            logria.match_spans = MatchSpans()
+            logria.memory.reset('stderr_messages')
+            logria.memory.reset('stdout_messages')
+            logria.memory.reset('parsed_messages')
             # Setup new streams
             setup_streams(logria)
     logria.reset_command_line()
@@ -0,0 +1,55 @@
+"""
+Commands to filter by log level and source stream using the facet bitsets
+"""
+
+
+from typing import Set
+
+from logria.commands.layers import show_layers, update_layers
+from logria.utilities.facets import LEVELS, FacetIndex
+
+# from logria.communication.shell_output import Logria
+
+ERROR_LEVEL = LEVELS.index('ERROR')
+
+
+def build_facets(logria: 'Logria') -> None:  # type: ignore
+    """
+    Classify every message in the stdout and stderr buffers, after the buffers are replaced
+    """
+    logria.stdout_facets = FacetIndex()
+    logria.stdout_facets.extend(logria.stdout_messages, logria.stdout_metadata.sources)
+    logria.stderr_facets = FacetIndex()
+    logria.stderr_facets.extend(logria.stderr_messages, logria.stderr_metadata.sources)
+
+
+def select_facets(logria: 'Logria', levels: Set[int], sources: Set[int]) -> None:  # type: ignore
+    """
+    Show only messages with any of `levels` and from any of `sources`; empty sets select everything
+    """
+    logria.filter_layers.select(levels, sources)
+    logria.previous_render = None  # Force render, defer draw
+    logria.stick_to_bottom = True  # Rows were added or removed above the current position
+    if levels or sources:
+        logria.current_status = f'Showing {logria.filter_layers.facets}'
+    else:
+        show_layers(logria)
+    update_layers(logria)
+
+
+def toggle_errors(logria: 'Logria') -> None:  # type: ignore
+    """
+    Toggle showing only errors
+    """
+    facets = logria.filter_layers.facets
+    levels = set() if facets.levels == {ERROR_LEVEL} else {ERROR_LEVEL}
+    select_facets(logria, levels, facets.sources)
+
+
+def toggle_source(logria: 'Logria', source: int) -> None:  # type: ignore
+    """
+    Toggle showing only messages from stream `source`
+    """
+    facets = logria.filter_layers.facets
+    sources = set() if facets.sources == {source} else {source}
+    select_facets(logria, facets.levels, sources)
@@ -0,0 +1,55 @@
+"""
+Commands for the highlight rules that color text matching a pattern
+"""
+
+# from logria.communication.shell_output import Logria
+
+
+def load_highlights(logria: 'Logria') -> None:  # type: ignore
+    """
+    Add the highlight rules saved in the Logria folder
+    """
+    try:
+        logria.highlight_rules.load()
+    except (OSError, ValueError) as err:
+        logria.current_status = f'Unable to load highlight rules: {err}'
+
+
+def add_highlight(logria: 'Logria', name: str, color: str, pattern: str) -> None:  # type: ignore
+    """
+    Color text matching `pattern` and save the rule
+    """
+    try:
+        logria.highlight_rules.add(name, pattern, color)
+        logria.highlight_rules.save()
+    except (OSError, ValueError) as err:
+        logria.current_status = str(err)
+    else:
+        logria.current_status = f'{len(logria.highlight_rules)} highlight rules'
+    logria.previous_render = None  # Force redraw
+
+
+def remove_highlight(logria: 'Logria', name: str) -> None:  # type: ignore
+    """
+    Stop coloring the rule called `name` and save the rest
+    """
+    if not logria.highlight_rules.remove(name):
+        logria.current_status = f'No highlight rule called {name}'
+        return
+    try:
+        logria.highlight_rules.save()
+    except OSError as err:
+        logria.current_status = str(err)
+    else:
+        logria.current_status = f'{len(logria.highlight_rules)} highlight rules'
+    logria.previous_render = None  # Force redraw
+
+
+def show_highlights(logria: 'Logria') -> None:  # type: ignore
+    """
+    List the highlight rules in the status bar
+    """
+    if logria.highlight_rules.rules:
+        logria.current_status = ', '.join(str(rule) for rule in logria.highlight_rules.rules.values())
+    else:
+        logria.current_status = 'No highlight rules; add one with :color name color regex'
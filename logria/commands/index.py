@@ -0,0 +1,48 @@
+"""
+Commands for the trigram index that speeds up filtering large buffers
+"""
+
+
+from typing import Optional
+
+from logria.utilities.constants import TRIGRAM_INDEX_MAX_BYTES
+from logria.utilities.trigram_index import TrigramIndex
+
+# from logria.communication.shell_output import Logria
+
+
+def build_indexes(logria: 'Logria', max_bytes: int = TRIGRAM_INDEX_MAX_BYTES) -> None:  # type: ignore
+    """
+    Index the stdout and stderr buffers; new messages are indexed as they arrive
+    """
+    logria.stdout_index = TrigramIndex(max_bytes)
+    logria.stdout_index.extend(logria.stdout_messages)
+    logria.stderr_index = TrigramIndex(max_bytes)
+    logria.stderr_index.extend(logria.stderr_messages)
+
+
+def rebuild_indexes(logria: 'Logria') -> None:  # type: ignore
+    """
+    Rebuild the indexes, if enabled, after the buffers are replaced
+    """
+    if logria.stdout_index is not None:
+        build_indexes(logria, logria.stdout_index.max_bytes)
+
+
+def drop_indexes(logria: 'Logria') -> None:  # type: ignore
+    """
+    Disable indexing and free the indexes
+    """
+    logria.stdout_index = None
+    logria.stderr_index = None
+
+
+def active_index(logria: 'Logria') -> Optional[TrigramIndex]:  # type: ignore
+    """
+    Get the index for the buffer currently being filtered, if there is one
+    """
+    if logria.messages is logria.stdout_messages:
+        return logria.stdout_index
+    if logria.messages is logria.stderr_messages:
+        return logria.stderr_index
+    return None
@@ -0,0 +1,93 @@
+"""
+Commands for the include and exclude filter layers applied after the `/` filter
+"""
+
+
+from typing import Optional
+
+from logria.logger.filter_layers import FilterLayer
+from logria.utilities import constants
+from logria.utilities.facets import FacetIndex
+
+# from logria.communication.shell_output import Logria
+
+
+def active_facets(logria: 'Logria') -> Optional[FacetIndex]:  # type: ignore
+    """
+    Get the level and source bitsets for the buffer currently shown, if it has them
+    """
+    if logria.messages is logria.stdout_messages:
+        return logria.stdout_facets
+    if logria.messages is logria.stderr_messages:
+        return logria.stderr_facets
+    return None
+
+
+def update_layers(logria: 'Logria') -> None:  # type: ignore
+    """
+    Run new messages through the layers, reporting a layer that had to be disabled
+    """
+    matched_rows = logria.matched_rows if logria.func_handle else None
+    slow_layer = logria.filter_layers.update(logria.messages, matched_rows, active_facets(logria))
+    if slow_layer is not None:
+        logria.current_status = (f'Disabled layer {slow_layer.pattern}, it took over '
+                                 f'{constants.FILTER_BATCH_TIME_LIMIT:g}s per {constants.FILTER_BATCH_SIZE:,} messages')
+        logria.write_to_command_line(logria.current_status)
+
+
+def show_layers(logria: 'Logria') -> None:  # type: ignore
+    """
+    Describe the layers in the status bar
+    """
+    if logria.filter_layers.layers:
+        logria.current_status = f'Layers {logria.filter_layers}'
+    else:
+        logria.current_status = 'No filter layers'
+
+
+def _refresh(logria: 'Logria') -> None:  # type: ignore
+    """
+    Recompute what changed and render it from the bottom
+    """
+    logria.previous_render = None  # Force render, defer draw
+    logria.stick_to_bottom = True  # Rows were added or removed above the current position
+    show_layers(logria)
+    update_layers(logria)
+
+
+def add_layer(logria: 'Logria', pattern: str, exclude: bool) -> None:  # type: ignore
+    """
+    Add a layer that keeps, or with `exclude` removes, messages matching `pattern`
+    """
+    try:
+        logria.filter_layers.add(FilterLayer(pattern, exclude))
+    except ValueError as err:
+        logria.current_status = str(err)
+        return
+    _refresh(logria)
+
+
+def toggle_layer(logria: 'Logria', position: int) -> None:  # type: ignore
+    """
+    Enable or disable the layer at `position`
+    """
+    if 0 <= position < len(logria.filter_layers):
+        logria.filter_layers.toggle(position)
+    _refresh(logria)
+
+
+def remove_layer(logria: 'Logria', position: int) -> None:  # type: ignore
+    """
+    Remove the layer at `position`
+    """
+    if 0 <= position < len(logria.filter_layers):
+        logria.filter_layers.remove(position)
+    _refresh(logria)
+
+
+def clear_layers(logria: 'Logria') -> None:  # type: ignore
+    """
+    Remove every layer
+    """
+    logria.filter_layers.layers = []
+    _refresh(logria)
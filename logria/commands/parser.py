@@ -31,6 +31,7 @@ def reset_parser(logria: 'Logria', custom_message: str = ''):  # type: ignore
             logria.messages = logria.stdout_messages
         logria.previous_messages = []
         logria.parsed_messages = []  # Dump parsed messages
+        logria.memory.reset('parsed_messages')
     logria.parser = None  # Dump the parser
     logria.analytics_enabled = False  # Disable analytics blocker
     logria.parser_index = 0  # Dump the pattern index
@@ -166,6 +167,7 @@ def enable_analytics(logria: 'Logria'):  # type: ignore
         if logria.analytics_enabled:
             logria.current_status = f'Parsing with {logria.parser.get_name()}, field {logria.parser.get_analytics_for_index(logria.parser_index)}'
             logria.parsed_messages = []
+            logria.memory.reset('parsed_messages')
             logria.analytics_enabled = False
         else:
             logria.analytics_enabled = True
@@ -0,0 +1,45 @@
+"""
+Save and restore the results of recently used filters
+"""
+
+
+from typing import Optional
+
+from logria.logger.processor import stop_parallel_scan
+from logria.utilities.filter_cache import CachedFilter
+
+# from logria.communication.shell_output import Logria
+
+
+def active_buffer(logria: 'Logria') -> Optional[str]:  # type: ignore
+    """
+    Get the name of the stream buffer currently shown, if one is
+    """
+    if logria.messages is logria.stdout_messages:
+        return 'stdout'
+    if logria.messages is logria.stderr_messages:
+        return 'stderr'
+    return None
+
+
+def save_filter(logria: 'Logria') -> None:  # type: ignore
+    """
+    Cache the current filter's results so switching back to it only tests new messages
+    """
+    buffer = active_buffer(logria)
+    if buffer is None or not logria.func_handle or not logria.regex_pattern:
+        return
+    # Matches a running scan has not collected yet are lost, so only keep what was tested
+    stop_parallel_scan(logria)
+    logria.filter_cache.store(buffer, logria.regex_pattern,
+                              CachedFilter(logria.matched_rows, logria.match_spans, logria.last_index_regexed))
+
+
+def take_saved_filter(logria: 'Logria', pattern: str) -> Optional[CachedFilter]:  # type: ignore
+    """
+    Remove and return the cached results of `pattern` over the current buffer, if there are any
+    """
+    buffer = active_buffer(logria)
+    if buffer is None:
+        return None
+    return logria.filter_cache.take(buffer, pattern)
@@ -4,10 +4,23 @@ Logria regex handler
 
 
 import curses
+from bisect import bisect_right
+from typing import Optional
 
 from logria.utilities import constants
-from logria.utilities.regex_generator import regex_test_generator
-from logria.logger.processor import process_matches
+from logria.commands import scroll
+from logria.communication.render import filtered_rows
+from logria.commands.recent_filters import save_filter, take_saved_filter
+from logria.utilities.filter_expression import (filter_test_generator,
+                                               is_filter_refinement,
+                                               span_test_generator)
+from logria.logger.live_filter import LiveFilter
+from logria.logger.processor import (narrow_matches, process_matches,
+                                     stop_parallel_scan)
+from logria.utilities.context_view import ContextView
+from logria.utilities.match_spans import MatchSpans
+from logria.utilities.regex_generator import has_nested_quantifier
+from logria.utilities.watchdog import FilterTimeout, can_interrupt, probe_filter
 
 # from logria.communication.shell_output import Logria
 
@@ -21,35 +34,104 @@ def reset_regex_status(logria: 'Logria') -> None:  # type: ignore
     else:
         logria.current_status = 'No filter applied'  # CLI message, rendered after
     logria.previous_render = None  # Reset previous render
+    save_filter(logria)  # Keep the previous filter's results to switch back to
+    stop_parallel_scan(logria)  # Abandon any scan for the previous filter
     logria.func_handle = None  # Disable filter
+    logria.span_handle = None
     logria.highlight_match = False  # Disable highlighting
+    logria.show_all_messages = False  # Show only the matches of the next filter
     logria.regex_pattern = ''  # Clear the current pattern
     logria.matched_rows = []  # Clear out matched rows
+    logria.match_spans = MatchSpans()  # Clear out their highlights
     logria.last_index_regexed = 0  # Reset the last searched index
     logria.current_end = 0  # We now do not know where to end
     logria.stick_to_bottom = True  # Stay at the bottom for the next render
     logria.write_to_command_line(logria.current_status)  # Render status
 
 
-def handle_regex_command(logria: 'Logria', command: str) -> None:  # type: ignore
+def disable_slow_filter(logria: 'Logria') -> None:  # type: ignore
+    """
+    Disable a filter that ran out of time, and tell the user why
+    """
+    pattern = logria.regex_pattern
+    logria.func_handle = None  # Its results are incomplete, so do not cache them
+    reset_regex_status(logria)
+    logria.current_status = (f'Disabled /{pattern}/, it took over {constants.FILTER_BATCH_TIME_LIMIT:g}s '
+                             f'per {constants.FILTER_BATCH_SIZE:,} messages')
+    logria.write_to_command_line(logria.current_status)
+
+
+def handle_regex_command(logria: 'Logria', command: str, live_filter: Optional[LiveFilter] = None) -> None:  # type: ignore
     """
     Handle a regex command
+
+    live_filter: the filter that ran while the command was typed, whose results are reused if complete
     """
+    if live_filter is not None and live_filter.is_complete(command):
+        # Every message was already tested while typing
+        live_filter.apply()
+        logria.current_status = f'Regex with pattern /{logria.regex_pattern}/'
+        logria.write_to_command_line(logria.current_status)
+        try:
+            process_matches(logria)
+        except FilterTimeout:
+            disable_slow_filter(logria)
+            return
+        logria.render_text_in_output()
+        curses.curs_set(0)
+        return
+    if live_filter is not None and live_filter.shown and not live_filter.is_complete(live_filter.command):
+        # Partial live results cannot be narrowed or resumed; complete ones are narrowed below
+        live_filter.withdraw()
+        reset_regex_status(logria)
+
+    # If the new pattern only narrows the previous one, keep the previous results to re-test
+    should_narrow = bool(logria.func_handle) and is_filter_refinement(logria.regex_pattern, command)
+    previous_rows = logria.matched_rows
+    previous_index = logria.last_index_regexed
+
     reset_regex_status(logria)
-    regex_func = regex_test_generator(command)
+    regex_func = filter_test_generator(command)
     if regex_func is None:
         logria.write_to_command_line(f'Invalid regex pattern: {command}')
         return
-    logria.func_handle = regex_test_generator(command)
+    logria.func_handle = regex_func
+    logria.span_handle = span_test_generator(command)
     logria.highlight_match = True
     logria.regex_pattern = command
 
-    # Tell the user what is happening since this is synchronous
-    logria.current_status = f'Searching buffer for regex /{logria.regex_pattern}/'
-    logria.write_to_command_line(logria.current_status)
-
-    # Process any new matched messages to render
-    process_matches(logria)
+    cached = take_saved_filter(logria, command)
+    if cached is not None:
+        # Only messages that arrived since this filter was last used need to be tested
+        logria.matched_rows = cached.matched_rows
+        logria.match_spans = cached.match_spans
+        logria.last_index_regexed = cached.last_index_regexed
+        should_narrow = False
+    elif not can_interrupt() and has_nested_quantifier(command):
+        # Without a timer signal a runaway regex cannot be stopped here, so try it somewhere it can be killed
+        sample = [logria.messages[index] for index in
+                  range(max(0, len(logria.messages) - constants.FILTER_PROBE_MESSAGES), len(logria.messages))]
+        if not probe_filter(command, sample, constants.FILTER_BATCH_TIME_LIMIT):
+            disable_slow_filter(logria)
+            return
+
+    try:
+        if should_narrow:
+            logria.current_status = f'Narrowing {len(previous_rows):,} matches for regex /{logria.regex_pattern}/'
+            logria.write_to_command_line(logria.current_status)
+            logria.matched_rows = previous_rows
+            logria.last_index_regexed = previous_index
+            narrow_matches(logria)
+        elif cached is None:
+            # Tell the user what is happening since this is synchronous
+            logria.current_status = f'Searching buffer for regex /{logria.regex_pattern}/'
+            logria.write_to_command_line(logria.current_status)
+
+        # Process any new matched messages to render
+        process_matches(logria)
+    except FilterTimeout:
+        disable_slow_filter(logria)
+        return
 
     # Tell the user we are now filtering
     logria.current_status = f'Regex with pattern /{logria.regex_pattern}/'
@@ -69,20 +151,56 @@ def handle_regex(logria: 'Logria'):  # type: ignore
         # Make it smooth to type
         logria.update_poll_rate(constants.SLOWEST_POLL_RATE)
     if not logria.analytics_enabled:  # Disable regex in analytics view
-        # Handle getting input from the command line for regex
-        logria.activate_prompt()
+        # Handle getting input from the command line for regex, filtering as the user types
+        live_filter = LiveFilter(logria)
+        logria.activate_prompt(on_change=live_filter.on_change, on_idle=live_filter.on_idle)
         command = logria.box.gather().strip()
         if command:
             if command == ':q':
+                live_filter.withdraw()
                 reset_regex_status(logria)
             else:
-                handle_regex_command(logria, command)
+                handle_regex_command(logria, command, live_filter)
         else:
             # If command is an empty string, ignore the input
+            live_filter.withdraw()
             reset_regex_status(logria)
             logria.reset_command_line()
 
 
+def set_context(logria: 'Logria', before: int, after: int) -> None:  # type: ignore
+    """
+    Show `before` and `after` messages around each match when filtering, or stop if both are 0
+    """
+    logria.previous_render = None  # Force render, defer draw
+    logria.stick_to_bottom = True  # Row positions differ between views
+    if before or after:
+        logria.context_view = ContextView(before, after)
+    else:
+        logria.context_view = None
+
+
+def toggle_show_all(logria: 'Logria') -> None:  # type: ignore
+    """
+    Toggle between showing matches and showing every message with matches highlighted,
+    keeping the same message on the last row
+    """
+    rows = filtered_rows(logria)
+    if rows is None:
+        return
+    logria.previous_render = None  # Force render, defer draw
+    if logria.context_view is not None:
+        # Context rows do not map to messages one to one, so go back to the end
+        scroll.bottom(logria)
+    elif logria.manually_controlled_line:
+        if logria.show_all_messages:
+            # The last match at or before the message on the last row
+            logria.current_end = max(0, bisect_right(rows, logria.current_end) - 1)
+        elif rows:
+            logria.current_end = rows[min(logria.current_end, len(rows) - 1)]
+    logria.show_all_messages = not logria.show_all_messages
+
+
 def toggle_highlight(logria: 'Logria'):  # type: ignore
     """
     Toggle highlighting of search matches
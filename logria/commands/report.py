@@ -0,0 +1,22 @@
+"""
+Show a report in the output window in place of the message buffer
+"""
+
+
+from typing import List
+
+# from logria.communication.shell_output import Logria
+
+
+def show_report(logria: 'Logria', lines: List[str]) -> None:  # type: ignore
+    """
+    Swap message pointer to the lines of a report, keeping the buffer to swap back to
+    """
+    # Store previous message pointer
+    if logria.messages is logria.stderr_messages:
+        logria.previous_messages = logria.stderr_messages
+    elif logria.messages is logria.stdout_messages:
+        logria.previous_messages = logria.stdout_messages
+
+    # Set new message pointer
+    logria.messages = lines
@@ -3,13 +3,35 @@ Commands for scrolling the window
 """
 
 
+from bisect import bisect_left, bisect_right
+
 # from logria.communication.shell_output import Logria
+from logria.communication.render import (display_rows, filtered_rows,
+                                         row_heights, widest_row)
 from logria.utilities import constants
 
+
+def showing_messages(logria: 'Logria') -> bool:  # type: ignore
+    """
+    Determine if every message is rendered, so rows can be found from the wrapped heights
+    """
+    return display_rows(logria) is logria.messages
+
+
 def pgup(logria: 'Logria') -> None:  # type: ignore
     """
     Handle page up keypress
     """
+    # Smooth scroll
+    if logria.smart_poll_rate:
+        logria.update_poll_rate(constants.FASTEST_POLL_RATE)
+    if showing_messages(logria) and logria.messages:
+        # Put the row above the top of the screen on the last row
+        heights = row_heights(logria)
+        end = min(logria.current_end, len(logria.messages) - 1)
+        top_row = heights.prefix(end + 1) - logria.last_row
+        jump_to(logria, max(0, min(heights.find(top_row - 1), end - 1)))
+        return
     for _ in range(logria.last_row):
         up(logria)
 
@@ -18,10 +40,38 @@ def pgdn(logria: 'Logria') -> None:  # type: ignore
     """
     Handle page down keypress
     """
+    # Smooth scroll
+    if logria.smart_poll_rate:
+        logria.update_poll_rate(constants.FASTEST_POLL_RATE)
+    if showing_messages(logria) and logria.messages:
+        # Put the row a screen below the last row on the last row
+        heights = row_heights(logria)
+        end = min(logria.current_end, len(logria.messages) - 1)
+        bottom_row = heights.prefix(end + 1) + logria.last_row - 1
+        jump_to(logria, min(max(heights.find(bottom_row), end + 1), len(logria.messages) - 1))
+        return
     for _ in range(logria.last_row):
         down(logria)
 
 
+def to_percent(logria: 'Logria', percent: float) -> None:  # type: ignore
+    """
+    Render with the row `percent` of the way through the rendered rows on the last row
+    """
+    percent = min(max(percent, 0), 100) / 100
+    if showing_messages(logria):
+        if not logria.messages:
+            return
+        heights = row_heights(logria)
+        total = heights.prefix(len(logria.messages))
+        index = heights.find(max(0, int(total * percent) - 1))
+        jump_to(logria, min(index, len(logria.messages) - 1))
+    else:
+        rows = display_rows(logria)
+        if rows:
+            jump_to(logria, int((len(rows) - 1) * percent))
+
+
 def up(logria: 'Logria') -> None:  # type: ignore
     """
     Scroll one line up
@@ -48,9 +98,9 @@ def down(logria: 'Logria'):  # type: ignore
     logria.manually_controlled_line = True
     logria.stick_to_top = False
     logria.stick_to_bottom = False
-    if logria.matched_rows:
+    if filtered_rows(logria):
         logria.current_end = min(
-            len(logria.matched_rows) - 1, logria.current_end + 1)
+            len(display_rows(logria)) - 1, logria.current_end + 1)
     else:
         logria.current_end = min(
             len(logria.messages) - 1, logria.current_end + 1)
@@ -73,3 +123,70 @@ def top(logria: 'Logria') -> None:  # type: ignore
     logria.stick_to_top = True
     logria.stick_to_bottom = False
     logria.manually_controlled_line = False
+
+
+def jump_to(logria: 'Logria', index: int) -> None:  # type: ignore
+    """
+    Render with the message at `index` on the last row
+    """
+    logria.manually_controlled_line = True
+    logria.stick_to_top = False
+    logria.stick_to_bottom = False
+    logria.current_end = index
+    logria.previous_render = None  # Force render, defer draw
+
+
+def next_match(logria: 'Logria') -> None:  # type: ignore
+    """
+    When showing every message while filtering, jump to the first match after the last row
+    """
+    rows = filtered_rows(logria)
+    if rows is None or not logria.show_all_messages:
+        return
+    position = bisect_right(rows, logria.current_end)
+    if position < len(rows):
+        jump_to(logria, rows[position])
+
+
+def previous_match(logria: 'Logria') -> None:  # type: ignore
+    """
+    When showing every message while filtering, jump to the last match before the last row
+    """
+    rows = filtered_rows(logria)
+    if rows is None or not logria.show_all_messages:
+        return
+    position = bisect_left(rows, logria.current_end)
+    if position > 0:
+        jump_to(logria, rows[position - 1])
+
+
+def toggle_wrap(logria: 'Logria') -> None:  # type: ignore
+    """
+    Toggle between wrapping long messages onto more rows and cutting them off at the window edge
+    """
+    logria.wrap = not logria.wrap
+    logria.column = 0
+    logria.previous_render = None  # Force render, defer draw
+
+
+def scroll_right(logria: 'Logria') -> None:  # type: ignore
+    """
+    When messages do not wrap, show the columns half a window to the right, up to the end of the widest message
+    """
+    if logria.wrap:
+        return
+    column = min(logria.column + max(1, logria.width // 2), max(0, widest_row(logria) - logria.width))
+    if column <= logria.column:
+        return
+    logria.column = column
+    logria.previous_render = None  # Force render, defer draw
+
+
+def scroll_left(logria: 'Logria') -> None:  # type: ignore
+    """
+    When messages do not wrap, show the columns half a window to the left
+    """
+    if logria.wrap or logria.column == 0:
+        return
+    logria.column = max(0, logria.column - max(1, logria.width // 2))
+    logria.previous_render = None  # Force render, defer draw
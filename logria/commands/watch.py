@@ -0,0 +1,73 @@
+"""
+Commands for the watchlist of named patterns counted on every incoming message
+"""
+
+
+import json
+from typing import List
+
+from logria.commands.report import show_report
+from logria.utilities.command_parser import Resolver
+
+# from logria.communication.shell_output import Logria
+
+
+def add_watch(logria: 'Logria', name: str, pattern: str) -> None:  # type: ignore
+    """
+    Start counting messages that match `pattern`
+    """
+    try:
+        logria.watchlist.add(name, pattern)
+    except ValueError as err:
+        logria.current_status = str(err)
+    else:
+        logria.current_status = f'Watching {len(logria.watchlist)} patterns'
+
+
+def remove_watch(logria: 'Logria', name: str) -> None:  # type: ignore
+    """
+    Stop counting the pattern called `name`
+    """
+    if logria.watchlist.remove(name):
+        logria.current_status = f'Watching {len(logria.watchlist)} patterns'
+    else:
+        logria.current_status = f'No watched pattern called {name}'
+
+
+def load_watchlist(logria: 'Logria', path: str) -> None:  # type: ignore
+    """
+    Watch every pattern in a JSON file of {"name": "regex"}
+    """
+    try:
+        with open(Resolver().resolve_file_as_str(path), 'r') as watch_file:
+            patterns = json.load(watch_file)
+        for name, pattern in patterns.items():
+            logria.watchlist.add(str(name), str(pattern))
+    except (OSError, ValueError, AttributeError) as err:
+        logria.current_status = f'Unable to load watchlist: {err}'
+    else:
+        logria.current_status = f'Watching {len(logria.watchlist)} patterns'
+
+
+def watch_report(logria: 'Logria') -> List[str]:  # type: ignore
+    """
+    Build a report of the hits for each watched pattern
+    """
+    if not logria.watchlist.patterns:
+        return ['No watched patterns; add one with :watch name regex']
+    buffers = {'stdout': logria.stdout_messages, 'stderr': logria.stderr_messages}
+    out_l = ['Watchlist hits:']
+    for watched in logria.watchlist.patterns.values():
+        line = f'  {watched.name} /{watched.pattern}/: {watched.hits:,}'
+        if watched.last_hit is not None:
+            buffer, index = watched.last_hit
+            line += f', last in {buffer} #{index:,}: {buffers[buffer][index]}'
+        out_l.append(line)
+    return out_l
+
+
+def start_watch_mode(logria: 'Logria') -> None:  # type: ignore
+    """
+    Swap message pointer to the watchlist report
+    """
+    show_report(logria, watch_report(logria))
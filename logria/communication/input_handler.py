@@ -8,7 +8,9 @@ import time
 from fcntl import F_GETFL, F_SETFL, fcntl
 from os import O_NONBLOCK
 from subprocess import PIPE, Popen
-from typing import List
+from typing import List, Optional
+
+from logria.communication.recording import StreamRecorder, read_recording
 
 
 class InputStream():
@@ -55,9 +57,11 @@ class CommandInputStream(InputStream):
     Read a subprocess command as an input stream
     """
 
-    def __init__(self, args, poll_rate=0.001):
+    def __init__(self, args, poll_rate=0.001, record_path: Optional[str] = None):
         super().__init__(args, poll_rate=poll_rate)
-        self.proc = None
+        self.proc: Optional[Popen] = None
+        # If set, every message is also written to this file with its arrival time
+        self.record_path = record_path
 
     def run(self, args: List[str], stdoutq: multiprocessing.Queue, stderrq: multiprocessing.Queue) -> None:
         """
@@ -66,6 +70,23 @@ class CommandInputStream(InputStream):
 
         This will not read python print() calls because print does not flush stdout by default,
           this can be enabled with `print('', flush=True)`
+
+        If `record_path` is set, messages are also recorded there; errors opening or writing it are sent to stderr
+        """
+        if not self.record_path:
+            self.read(args, stdoutq, stderrq, None)
+            return
+        try:
+            # Line buffered so a killed stream still leaves a usable recording
+            with open(self.record_path, 'w', buffering=1) as f_out:
+                self.read(args, stdoutq, stderrq, StreamRecorder(f_out))
+        except OSError as error:
+            stderrq.put(f'Error recording to {self.record_path}: {error}')
+
+    def read(self, args: List[str], stdoutq: multiprocessing.Queue, stderrq: multiprocessing.Queue,
+             recorder: Optional[StreamRecorder]) -> None:
+        """
+        Open a pipe to the command and send its output to the queues, and the recorder if given
         """
         try:
             self.proc = Popen(args, stdout=PIPE, stderr=PIPE, bufsize=1,
@@ -84,11 +105,15 @@ class CommandInputStream(InputStream):
                 stdout_output = self.proc.stdout.readline()  # type: ignore
                 if stdout_output:
                     stdoutq.put(stdout_output)
+                    if recorder:
+                        recorder.write('stdout', stdout_output)
 
                 # stderr
                 stderr_output = self.proc.stderr.readline()  # type: ignore
                 if stderr_output:
                     stderrq.put(stderr_output)
+                    if recorder:
+                        recorder.write('stderr', stderr_output)
 
                 # Kill condition
                 if stderr_output == '' and stdout_output == '' and self.proc.poll() is not None:
@@ -134,3 +159,43 @@ class FileInputStream(InputStream):
                 f'File not found error opening handle to command: {"/".join(args)}')
         except OSError:
             stdoutq.put(f'Bad file descriptor: {args}')
+
+
+class ReplayInputStream(InputStream):
+    """
+    Replay a recording made by a `CommandInputStream` with the timing it was recorded with
+    """
+
+    def __init__(self, args, poll_rate=0.001, speed: float = 1.0):
+        super().__init__(args, poll_rate=poll_rate)
+        # Multiplier on the recorded rate; 0 replays as fast as possible
+        self.speed = speed
+
+    def run(self, args: List[str], stdoutq: multiprocessing.Queue, stderrq: multiprocessing.Queue) -> None:
+        """
+        Given a path to a recording, put each message in its queue once its recorded delay has elapsed
+        args: a list of folders to be joined ['Docs', 'incident.rec'] -> 'Docs/incident.rec'
+        """
+        try:
+            started = time.perf_counter()
+            first_timestamp = None
+            for timestamp, channel, message in read_recording('/'.join(args)):
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                if self.speed > 0:
+                    # Sleep against the start time so delays do not accumulate drift
+                    delay = (timestamp - first_timestamp) / self.speed - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                if channel == 'stderr':
+                    stderrq.put(message)
+                else:
+                    stdoutq.put(message)
+        except PermissionError:
+            stderrq.put(
+                f'Permissions error opening file handle to: {"/".join(args)}')
+        except FileNotFoundError:
+            stderrq.put(
+                f'File not found error opening handle to recording: {"/".join(args)}')
+        except OSError:
+            stderrq.put(f'Bad file descriptor: {args}')
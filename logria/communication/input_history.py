@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import List
 
 from logria.utilities.constants import HISTORY_TAPE_NAME, SAVED_HISTORY_PATH, HISTORY_EXCLUDES, LOGRIA_ROOT, USER_HOME
+from logria.utilities.memory import item_size
 
 
 class HistoryTape():
@@ -17,6 +18,7 @@ class HistoryTape():
         self.history_tape: List[str] = []  # Not a real queue
         self.current_index: int = -1  # The index we are at in the tape
         self.should_scroll_back: bool = False
+        self.size_bytes: int = 0  # Approximate memory held by the tape
         self.history_tape_file = f'{SAVED_HISTORY_PATH}/{HISTORY_TAPE_NAME}'
         self.use_cache = use_cache
         if self.use_cache:
@@ -44,6 +46,7 @@ class HistoryTape():
                 self.history_tape = [line.rstrip(
                     '\n') for line in history_cache]
                 self.current_index = len(self.history_tape) - 1
+                self.size_bytes = sum(item_size(item) for item in self.history_tape)
         else:
             with open(self.history_tape_file, 'w+') as history_cache:
                 history_cache.write('')
@@ -109,6 +112,7 @@ class HistoryTape():
                 if self.use_cache:
                     self.write_to_history_file(clean_item)
                 self.history_tape.append(clean_item)
+                self.size_bytes += item_size(clean_item)
                 self.current_index = len(self.history_tape) - 1
                 self.should_scroll_back = False
 
@@ -0,0 +1,42 @@
+"""
+Per-message metadata stored alongside Logria's message buffers
+"""
+
+
+from array import array
+from typing import Tuple
+
+
+class MessageMetadata():
+    """
+    Arrival time and source stream of each message in a buffer
+
+    Stored as parallel typed arrays instead of a tuple per message so each
+    message costs 10 bytes of metadata
+    """
+
+    def __init__(self):
+        self.timestamps: array = array('d')  # Seconds since the epoch
+        self.sources: array = array('H')  # Index of the stream in `Logria.streams`
+
+    def append(self, timestamp: float, source: int) -> None:
+        """
+        Store the metadata for the next message in the buffer
+        """
+        self.timestamps.append(timestamp)
+        self.sources.append(source)
+
+    def get(self, index: int) -> Tuple[float, int]:
+        """
+        Get the (timestamp, source) pair for the message at `index`
+        """
+        return self.timestamps[index], self.sources[index]
+
+    def size_bytes(self) -> int:
+        """
+        Approximate bytes held by the metadata arrays
+        """
+        return len(self.timestamps) * (self.timestamps.itemsize + self.sources.itemsize)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
@@ -0,0 +1,41 @@
+"""
+Record live input streams with their timing so they can be replayed later
+
+Recordings are JSON lines, one message per line, in the form:
+    [arrival timestamp, "stdout" | "stderr", message]
+"""
+
+
+import json
+import time
+from typing import IO, Iterator, Tuple
+
+
+class StreamRecorder():
+    """
+    Appends each message an input stream receives to a recording file
+    """
+
+    def __init__(self, file: IO[str]):
+        self.file: IO[str] = file  # Opened and closed by the stream being recorded
+
+    def write(self, channel: str, message: str) -> None:
+        """
+        Record a message that arrived on `channel` just now
+        """
+        self.file.write(json.dumps([time.time(), channel, message]))
+        self.file.write('\n')
+
+
+def read_recording(path: str) -> Iterator[Tuple[float, str, str]]:
+    """
+    Yield (timestamp, channel, message) for each message in a recording
+    """
+    with open(path, 'r') as f_in:
+        for line in f_in:
+            try:
+                timestamp, channel, message = json.loads(line)
+            except ValueError:
+                # A stream killed mid-write can leave a partial final line
+                continue
+            yield float(timestamp), channel, message
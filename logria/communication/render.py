@@ -4,35 +4,121 @@ Functions to handler rendering content in the Logria window
 
 
 from math import ceil
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
-from logria.utilities.regex_generator import get_real_length
+from logria.interface.color_handler import (DEFAULT_PAIR, Segment, clip_segments, column_index,
+                                            display_width)
+from logria.utilities.constants import CONTEXT_SEPARATOR
+from logria.utilities.context_view import SEPARATOR
+from logria.utilities.highlight_rules import Range, overlay, to_segments
+from logria.utilities.regex_generator import ANSI_COLOR_REGEX
+from logria.utilities.row_heights import NO_WRAP, RowHeights
 
 # from logria.communication.shell_output import Logria
 
+# The line between two groups of context, ready to draw
+SEPARATOR_SEGMENTS = ((CONTEXT_SEPARATOR, DEFAULT_PAIR),)
 
-def determine_position(logria: 'Logria', messages_pointer: List[str]) -> Tuple[int, int]:  # type: ignore
+
+def filtered_rows(logria: 'Logria') -> Optional[List[int]]:  # type: ignore
+    """
+    Get the indexes of the messages that pass the `/` filter and every filter layer, or None if nothing is filtered
+    """
+    if logria.filter_layers.active:
+        return logria.filter_layers.rows
+    if logria.func_handle is None:
+        return None
+    return logria.matched_rows
+
+
+def display_rows(logria: 'Logria') -> Sequence:  # type: ignore
+    """
+    Get the rows to render: messages, filtered message indexes, or filtered messages with their context
+    """
+    rows = filtered_rows(logria)
+    if rows is None or logria.show_all_messages:
+        return logria.messages
+    if logria.context_view is not None:
+        logria.context_view.update(rows, logria.messages)
+        return logria.context_view
+    return rows
+
+
+def row_heights(logria: 'Logria') -> RowHeights:  # type: ignore
+    """
+    Get the wrapped heights of the messages at the current width
+    """
+    logria.row_heights.sync(logria.messages, logria.width if logria.wrap else NO_WRAP)
+    return logria.row_heights
+
+
+def row_height(logria: 'Logria', messages_idx: int) -> int:  # type: ignore
+    """
+    Get the rows a message, or the separator between groups of context, takes
+    """
+    if messages_idx == SEPARATOR:
+        if not logria.wrap:
+            return 1
+        return ceil(len(CONTEXT_SEPARATOR) / max(logria.width, 1))
+    return logria.row_heights.height(messages_idx)
+
+
+def highlighted_segments(item: str, ranges: Sequence[Range],
+                         columns: Optional[Tuple[int, int]]) -> Tuple[Segment, ...]:
+    """
+    Get the segments of a message without color codes, colored by `ranges` and cut to `columns` if given
+    """
+    if columns is None:
+        return tuple(to_segments(item.rstrip(), ranges))
+    # Characters past the last column in the window are not drawn, so they need no segments
+    item = item[:column_index(item, sum(columns))]
+    return clip_segments(to_segments(item.rstrip(), ranges), *columns)
+
+
+def message_segments(logria: 'Logria', messages_idx: int, highlight: bool,  # type: ignore
+                     filtered: bool, columns: Optional[Tuple[int, int]]) -> Tuple[Segment, ...]:
+    """
+    Get the segments to draw a message with, cut to the `(column, width)` in `columns` if given
+
+    Messages keep their own colors unless highlight rules or filter matches color them
+    """
+    rules = logria.highlight_rules
+    ranges: Optional[Sequence[Range]] = rules.ranges(logria.messages, messages_idx) if rules.rules else None
+    # Context lines have no spans
+    spans = logria.match_spans.get(messages_idx) if highlight else None
+    if not (ranges or spans or (highlight and filtered)):
+        # Keep the message's own colors, tokenized once while it stays on screen
+        return logria.segment_cache.get(logria.messages, messages_idx, columns)
+    # Rule colors and matches are found on the message without its color codes, so remove them
+    item = logria.messages[messages_idx]
+    if '\x1b' in item or '\x9b' in item:
+        item = ANSI_COLOR_REGEX.sub('', item)
+    if spans:
+        # Draw the matches over the rule colors
+        ranges = overlay(ranges or (), spans)
+    return highlighted_segments(item, ranges or (), columns)
+
+
+def determine_position(logria: 'Logria', messages_pointer: Sequence) -> Tuple[int, int]:  # type: ignore
     """
     Determine the start and end positions for a screen render
     """
+    heights = row_heights(logria)
     if logria.stick_to_top:
-        end = 0
-        rows = 0
-        for i in messages_pointer:
-            if messages_pointer is logria.messages:
-                # No processing needed for normal messages
-                item: str = i
-            elif messages_pointer is logria.matched_rows:
-                # Grab the matched message
-                item = logria.messages[i]  # type: ignore
-            # Determine if the message will fit in the window
-            msg_lines = ceil(get_real_length(item) / logria.width)
-            rows += msg_lines
-            # If we can fit, increment the last row number
-            if rows < logria.last_row and end < len(messages_pointer) - 1:
-                end += 1
-            else:
-                break
+        if messages_pointer is logria.messages:
+            # The messages that fit above the last row, found from the prefix sums of their heights
+            end = max(0, min(heights.find(logria.last_row - 1), len(messages_pointer) - 1))
+        else:
+            end = 0
+            rows = 0
+            for i in messages_pointer:
+                # Determine if the filtered or context message will fit in the window
+                rows += row_height(logria, i)
+                # If we can fit, increment the last row number
+                if rows < logria.last_row and end < len(messages_pointer) - 1:
+                    end += 1
+                else:
+                    break
         logria.current_end = end  # Save this row so we know where we are
         # When iterating backwards, we need to end at 0, so we must create a range
         # object like range(10, -1, -1) to generate a list that ends at 0
@@ -64,3 +150,17 @@ def determine_position(logria: 'Logria', messages_pointer: List[str]) -> Tuple[i
     # Last index of a list is length - 1
     start = max(-1, end - logria.last_row - 1)
     return start, end
+
+
+def widest_row(logria: 'Logria') -> int:  # type: ignore
+    """
+    Get the columns taken by the widest message on screen, without its color codes
+    """
+    messages_pointer = display_rows(logria)
+    start, end = determine_position(logria, messages_pointer)
+    widest = 0
+    for i in range(end, start, -1):
+        messages_idx = i if messages_pointer is logria.messages else messages_pointer[i]
+        if messages_idx != SEPARATOR:
+            widest = max(widest, display_width(ANSI_COLOR_REGEX.sub('', logria.messages[messages_idx]).rstrip()))
+    return widest
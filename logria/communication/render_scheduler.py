@@ -0,0 +1,58 @@
+"""
+Limit how often the output window is rendered
+
+The main loop can run thousands of times per second while messages flood in, but
+the screen only needs to change as fast as someone can read it. Changes mark the
+scheduler dirty, and a render happens once the frame interval has passed, so every
+change since the last frame is drawn at once
+"""
+
+
+import time
+from typing import Optional
+
+from logria.utilities.constants import RENDER_MAX_FPS
+
+
+class RenderScheduler():
+    """
+    Coalesce changes to the output window into at most `max_fps` renders per second
+    """
+
+    def __init__(self, max_fps: float = RENDER_MAX_FPS):
+        self.interval: float = 0  # Seconds between renders, 0 for no limit
+        self.dirty: bool = True  # Whether something changed since the last render
+        self.last_render: float = float('-inf')  # When the last render happened
+        self.set_max_fps(max_fps)
+
+    def set_max_fps(self, max_fps: float) -> None:
+        """
+        Change the render limit; 0 renders on every change
+        """
+        self.interval = 1 / max_fps if max_fps > 0 else 0
+
+    def mark_dirty(self) -> None:
+        """
+        Note that the window needs to be rendered again
+        """
+        self.dirty = True
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """
+        Determine if there are changes to render and the frame interval has passed
+        """
+        if not self.dirty:
+            return False
+        if now is None:
+            now = time.perf_counter()
+        return now - self.last_render >= self.interval
+
+    def rendered(self, now: Optional[float] = None) -> None:
+        """
+        Note that every change was just rendered
+        """
+        self.dirty = False
+        self.last_render = time.perf_counter() if now is None else now
+
+    def __repr__(self):
+        return f'<Render Scheduler every {self.interval:.3f}s, {"dirty" if self.dirty else "clean"}>'
@@ -9,11 +9,15 @@ from os.path import isfile
 from typing import List
 
 from logria.commands.config import config_mode, resolve_delete_command
+from logria.commands.facets import build_facets
+from logria.commands.index import rebuild_indexes
 from logria.communication.input_handler import (CommandInputStream,
                                                 FileInputStream)
+from logria.communication.metadata import MessageMetadata
 from logria.utilities import constants
 from logria.utilities.command_parser import Resolver
 from logria.utilities.session import SessionHandler
+from logria.utilities.snapshot import is_snapshot, open_snapshot
 
 # from logria.communication.shell_output import Logria
 
@@ -33,6 +37,26 @@ def render_setup_messages(logria: 'Logria', session_handler: SessionHandler) ->
     logria.redraw()
 
 
+def restore_snapshot(logria: 'Logria', path: str) -> None:  # type: ignore
+    """
+    Replace the message buffers with the contents of a snapshot file
+    """
+    stdout_messages, stderr_messages = open_snapshot(path)
+    logria.stdout_messages = stdout_messages
+    logria.stdout_metadata = stdout_messages.metadata
+    logria.stderr_messages = stderr_messages
+    logria.stderr_metadata = stderr_messages.metadata
+    # Mapped records live in the page cache, not on the heap
+    logria.memory.reset('stdout_messages')
+    logria.memory.reset('stderr_messages')
+    # Show the buffer with the most messages, like we do on a first run
+    if len(logria.stdout_messages) >= len(logria.stderr_messages):
+        logria.messages = logria.stdout_messages
+    else:
+        logria.messages = logria.stderr_messages
+    logria.first_run = False
+
+
 def setup_streams(logria: 'Logria') -> None:  # type: ignore
     """
     When launched without a stream, allow the user to define them for us
@@ -44,6 +68,9 @@ def setup_streams(logria: 'Logria') -> None:  # type: ignore
     # Create resolver class to resolve commands
     resolver = Resolver()
 
+    # Snapshot file to restore instead of opening streams
+    snapshot_path = ''
+
     # Get user input
     while True:
         time.sleep(logria.poll_rate)
@@ -70,7 +97,9 @@ def setup_streams(logria: 'Logria') -> None:  # type: ignore
             stored_commands = session['commands']
             # Commands need a type
             for stored_command in stored_commands:
-                if session.get('type') == 'file':
+                if session.get('type') == 'snapshot':
+                    snapshot_path = '/'.join(stored_command)
+                elif session.get('type') == 'file':
                     logria.streams.append(FileInputStream(stored_command))
                 elif session.get('type') == 'command':
                     logria.streams.append(CommandInputStream(stored_command))
@@ -90,6 +119,10 @@ def setup_streams(logria: 'Logria') -> None:  # type: ignore
                 return
             elif command == ':q':
                 logria.stop()
+            elif isfile(command) and is_snapshot(command):
+                snapshot_path = command
+                session_handler.save_session(
+                    'Snapshot - ' + command.replace('/', '|'), [command.split('/')], 'snapshot')
             elif isfile(command):
                 logria.streams.append(
                     FileInputStream(command.split('/')))
@@ -115,4 +148,16 @@ def setup_streams(logria: 'Logria') -> None:  # type: ignore
 
     # Reset messages
     logria.stderr_messages = []
+    logria.stderr_metadata = MessageMetadata()
+    logria.memory.reset('stderr_messages')
     logria.messages = logria.stderr_messages
+
+    if snapshot_path:
+        try:
+            restore_snapshot(logria, snapshot_path)
+        except (OSError, ValueError) as err:
+            logria.messages.append(f'Unable to open snapshot: {err}')
+    rebuild_indexes(logria)
+    build_facets(logria)
+    logria.watchlist.clear_hits()  # Hits point into the old buffers
+    logria.filter_cache.clear()  # Cached results point into the old buffers
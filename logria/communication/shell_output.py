@@ -4,24 +4,42 @@ Contains the main class that controls the state of the app
 
 
 import curses
-import re
 import signal
 import time
-from math import ceil
 from types import FrameType
 from typing import Callable, List, Optional, Tuple, Union
 
-from logria.commands.regex import reset_regex_status
+from logria.commands.highlight import load_highlights
+from logria.commands.layers import update_layers
+from logria.commands.regex import disable_slow_filter, reset_regex_status
 from logria.communication.input_handler import InputStream
-from logria.communication.render import determine_position
+from logria.communication.metadata import MessageMetadata
+from logria.communication.render import (SEPARATOR_SEGMENTS,
+                                         determine_position, display_rows,
+                                         message_segments, row_height)
+from logria.communication.render_scheduler import RenderScheduler
 from logria.communication.setup import setup_streams
 from logria.interface import color_handler
+from logria.interface.screen_rows import Line, ScreenRows
+from logria.interface.segment_cache import SegmentCache
 from logria.interface.textbox import Textbox, rectangle
+from logria.utilities.context_view import SEPARATOR, ContextView
+from logria.utilities.facets import FacetIndex
+from logria.utilities.filter_cache import FilterCache
+from logria.utilities.highlight_rules import HighlightRules
+from logria.logger.filter_layers import FilterLayers
 from logria.logger.parser import Parser
-from logria.logger.processor import process_matches, process_parser
+from logria.logger.parallel_scan import ParallelScan, shutdown_executor
+from logria.logger.processor import (process_matches, process_parser,
+                                     stop_parallel_scan)
 from logria.utilities import constants
 from logria.utilities.keystrokes import resolve_keypress, validator
-from logria.utilities.regex_generator import get_real_length
+from logria.utilities.match_spans import MatchSpans
+from logria.utilities.memory import MemoryTracker
+from logria.utilities.row_heights import RowHeights
+from logria.utilities.trigram_index import TrigramIndex
+from logria.utilities.watchdog import FilterTimeout
+from logria.utilities.watchlist import Watchlist
 
 
 class Logria():
@@ -29,7 +47,8 @@ class Logria():
     Main app class that controls the logical flow of the app
     """
 
-    def __init__(self, stream: Optional[InputStream], history_tape_cache: bool = True, smart_poll_rate: bool = True, poll_rate=0.001):
+    def __init__(self, stream: Optional[InputStream], history_tape_cache: bool = True, smart_poll_rate: bool = True, poll_rate=0.001,
+                 max_fps: float = constants.RENDER_MAX_FPS):
         # UI Elements initialized to None
         # The entire window
         self.stdscr: curses.window = None  # type: ignore
@@ -50,6 +69,8 @@ class Logria():
         self.first_run: bool = True  # Whether this is a first run or not
         self.height: int = 0  # Window height
         self.width: int = 0  # Window width
+        self.wrap: bool = True  # Whether long messages wrap onto more rows or are cut off at the window edge
+        self.column: int = 0  # First column shown when messages do not wrap
         self.loop_time: float = 0  # How long a loop of the main app takes
         # Store the state of the previous render so we know if we need to refresh
         self.previous_render: Optional[Tuple[int, int]] = None
@@ -60,16 +81,46 @@ class Logria():
         # Message buffers
         self.stderr_messages: List[str] = []
         self.stdout_messages: List[str] = []
+        # Arrival time and source stream of each message in the buffers
+        self.stderr_metadata: MessageMetadata = MessageMetadata()
+        self.stdout_metadata: MessageMetadata = MessageMetadata()
         # Default to watching stderr
         self.messages: List[str] = self.stderr_messages
+        # Running byte totals for the buffers, so reporting usage is O(1)
+        self.memory: MemoryTracker = MemoryTracker()
+        # Optional trigram indexes over the buffers, enabled with `:index`
+        self.stderr_index: Optional[TrigramIndex] = None
+        self.stdout_index: Optional[TrigramIndex] = None
+        # Level and source of each message, for selecting them without a regex
+        self.stderr_facets: FacetIndex = FacetIndex()
+        self.stdout_facets: FacetIndex = FacetIndex()
+        # Named patterns counted on every incoming message
+        self.watchlist: Watchlist = Watchlist()
 
         # Regex Handler information
         # Regex func that handles filtering
         self.func_handle: Optional[Callable] = None
+        # Filter func that also finds the spans to highlight in each match
+        self.span_handle: Optional[Callable] = None
         self.regex_pattern: str = ''  # Current regex pattern
         # List of matches when filtering is active
         self.matched_rows: List[int] = []
+        self.match_spans: MatchSpans = MatchSpans()  # Spans to highlight in each match
         self.last_index_regexed: int = 0  # The last index the filtering function saw
+        # Scan of a large backlog running in other processes, if any
+        self.parallel_scan: Optional[ParallelScan] = None
+        self.filter_cache: FilterCache = FilterCache()  # Results of recent filters, to switch back instantly
+        # Rows of context to show around each match, if enabled
+        self.context_view: Optional[ContextView] = None
+        self.filter_layers: FilterLayers = FilterLayers()  # Include and exclude filters after the `/` filter
+        # Show every message while filtering, to jump between highlighted matches
+        self.show_all_messages: bool = False
+        # Patterns colored when rendered, saved with the patterns
+        self.highlight_rules: HighlightRules = HighlightRules()
+        self.row_heights: RowHeights = RowHeights()  # Wrapped height of each message, to position renders
+        self.screen_rows: ScreenRows = ScreenRows()  # What each row of the output window shows
+        self.segment_cache: SegmentCache = SegmentCache()  # Color segments of recently rendered messages
+        self.render_scheduler: RenderScheduler = RenderScheduler(max_fps)  # Limits renders while messages flood in
 
         # Processor information
         self.parser: Optional[Parser] = None  # Reference to the current parser
@@ -89,6 +140,7 @@ class Logria():
         self.stick_to_top: bool = False
         self.manually_controlled_line: bool = False  # Whether manual scroll is active
         self.current_end: int = 0  # Current last row we have rendered
+        load_highlights(self)
 
         # If we do not have a stream yet, tell the user to set one up
         if stream is None:
@@ -126,16 +178,16 @@ class Logria():
         """
         Renders stream content in the output window
 
-        If filters are inactive, we use `messages`. If they are active, we pull from `matched_rows`
+        If filters are inactive, we use `messages`. If they are active, we pull from `matched_rows`,
+        or from `context_view` to show the lines around each match, or show all `messages` with
+        matches highlighted
 
-        We write the whole message, regardless of length, because slicing a string allocates a new string
+        We write the whole message, regardless of length, because slicing a string allocates a new string.
+        When messages do not wrap, only the columns from `column` that fit in the window are drawn
         """
         # Store a pointer to the buffer of messages
-        if self.func_handle is None:
-            messages_pointer = self.messages
-        else:
-            # Ignore typing because we use different values depending on what this pointer is
-            messages_pointer = self.matched_rows  # type: ignore
+        # Ignore typing because we use different values depending on what this pointer is
+        messages_pointer = display_rows(self)
 
         # Determine the start and end position of the render
         start, end = determine_position(self, messages_pointer)
@@ -143,31 +195,37 @@ class Logria():
         if not self.analytics_enabled and self.previous_render == (max(start, 0), end):
             return  # Early escape
         self.previous_render = (max(start, 0), end)
-        self.outwin.erase()
+        highlight = self.highlight_match and self.func_handle is not None
+        # Matches and context lines, rather than every message
+        filtered = messages_pointer is not self.messages
+        # The first column and width shown, or None to draw whole messages
+        columns = None if self.wrap else (self.column, self.width)
+        lines: List[Line] = []  # The row each line starts on, its height, and the segments to draw
         current_row = self.last_row  # The row we are currently rendering
         for i in range(end, start, -1):
-            if messages_pointer is self.messages:
+            if not filtered:
                 # No processing needed for normal messages
-                item = messages_pointer[i]
-            elif messages_pointer is self.matched_rows:
-                # Grab the matched message and optionally highlight it
-                messages_idx = self.matched_rows[i]
-                item = self.messages[messages_idx]
-                if self.highlight_match:
-                    # Remove all color codes before applying highlighter
-                    item = re.sub(constants.ANSI_COLOR_PATTERN, '', item)
-                    match = re.search(self.regex_pattern, item)
-                    if match:
-                        start, end = match.span()
-                        matched_str = item[start:end]
-                        item = item.replace(
-                            matched_str, f'\u001b[35m{matched_str}\u001b[0m')
+                messages_idx = i
+            else:
+                # Grab the index of the matched or context message
+                messages_idx = messages_pointer[i]
             # Find the correct start position
-            current_row -= ceil(get_real_length(item) / self.width)
+            height = row_height(self, messages_idx)
+            current_row -= height
             if current_row < 0:
                 break
-            # Instead of window.addstr, handle colors
-            color_handler.addstr(self.outwin, current_row, 0, item.rstrip())
+            if messages_idx == SEPARATOR:
+                # The line between two groups of context
+                lines.append((current_row, height, SEPARATOR_SEGMENTS))
+                continue
+            lines.append((current_row, height, message_segments(self, messages_idx, highlight, filtered, columns)))
+        # Only redraw the rows that changed since the last frame
+        generation = color_handler.pair_generation()
+        self.screen_rows.draw(self.outwin, self.last_row, lines, color_handler.draw_line)
+        if color_handler.pair_generation() != generation:
+            # A pair used by rows still on screen was given new colors, so draw them again
+            self.screen_rows.invalidate()
+            self.screen_rows.draw(self.outwin, self.last_row, lines, color_handler.draw_line)
         self.outwin.refresh()
 
     def write_to_command_line(self, string: str) -> None:
@@ -188,17 +246,19 @@ class Logria():
         self.command_line.deleteln()
         curses.curs_set(0)
 
-    def activate_prompt(self, text='') -> None:
+    def activate_prompt(self, text='', on_change: Optional[Callable[[str], None]] = None,
+                        on_idle: Optional[Callable[[], None]] = None) -> None:
         """
         Activate the prompt so we can edit it
 
         text: str, some text to prepend to the command
+        on_change, on_idle: callbacks passed to `Textbox.edit`
         """
         self.reset_command_line()
         if text:
             self.write_to_command_line(text)
         curses.curs_set(1)
-        self.box.edit(validator)
+        self.box.edit(validator, on_change=on_change, on_idle=on_idle)
 
     def update_poll_rate(self, new_poll_rate: float) -> None:
         """
@@ -240,6 +300,7 @@ class Logria():
         Force re-render the content of the window as if it has never been rendered before
         """
         self.previous_render = None  # Force render
+        self.screen_rows.invalidate()
         self.render_text_in_output()
 
     def resize_window(self) -> None:
@@ -270,6 +331,8 @@ class Logria():
         """
         for stream in self.streams:
             stream.exit()
+        stop_parallel_scan(self)
+        shutdown_executor()
         self.exit_val = -1
         # If we crash before the command line is set up:
         if getattr(self, 'box', None):
@@ -315,15 +378,30 @@ class Logria():
             # Update messages from the input stream's queues, track time
             t_0 = time.perf_counter()
             new_messages: int = 0
-            for stream in self.streams:
+            received = time.time()  # Arrival time for every message in this loop
+            for source, stream in enumerate(self.streams):
                 while not stream.stderr.empty():
                     message = stream.stderr.get()
                     self.stderr_messages.append(message)
+                    self.stderr_metadata.append(received, source)
+                    self.memory.add('stderr_messages', message)
+                    if self.stderr_index is not None:
+                        self.stderr_index.add(message)
+                    self.stderr_facets.add(message, source)
+                    if self.watchlist.patterns:
+                        self.watchlist.check(message, 'stderr', len(self.stderr_messages) - 1)
                     new_messages += 1
 
                 while not stream.stdout.empty():
                     message = stream.stdout.get()
                     self.stdout_messages.append(message)
+                    self.stdout_metadata.append(received, source)
+                    self.memory.add('stdout_messages', message)
+                    if self.stdout_index is not None:
+                        self.stdout_index.add(message)
+                    self.stdout_facets.add(message, source)
+                    if self.watchlist.patterns:
+                        self.watchlist.check(message, 'stdout', len(self.stdout_messages) - 1)
                     new_messages += 1
             # Prevent this loop from taking up 100% of the CPU dedicated to the main thread by delaying loops
             t_1 = time.perf_counter() - t_0
@@ -347,6 +425,7 @@ class Logria():
                 # Get keypress, raise curses.error if nothing detected
                 keypress = self.command_line.getkey()
                 resolve_keypress(self, keypress)
+                self.render_scheduler.mark_dirty()
             except curses.error:
                 if self.exit_val == -1:
                     return
@@ -356,6 +435,17 @@ class Logria():
                     process_parser(self)
                 if self.func_handle:
                     # This may block if there are a lot of messages
-                    process_matches(self)
-                # Always try to render
-                self.render_text_in_output()
+                    try:
+                        process_matches(self)
+                    except FilterTimeout:
+                        disable_slow_filter(self)
+                if self.filter_layers.configured:
+                    # This may block if there are a lot of messages
+                    update_layers(self)
+                # New messages, forced renders, and results from a parallel scan change the screen
+                if new_messages or self.previous_render is None or self.parallel_scan is not None:
+                    self.render_scheduler.mark_dirty()
+                # Render every change at once, at most `max_fps` times per second
+                if self.render_scheduler.due():
+                    self.render_text_in_output()
+                    self.render_scheduler.rendered()
@@ -2,87 +2,230 @@
 Handles parsing color escape code sequences in logs to the relevant curses
 colors so that we do not get ugly strings like `033[94m Blue`
 
+Select Graphic Rendition codes are parsed like a terminal would, keeping the colors
+set by earlier codes, including 256 color `38;5;n` and true color `38;2;r;g;b` codes.
+Colors are kept as xterm 256 color numbers and mapped to the nearest color the
+terminal has when a pair is allocated. Pairs are reused least recently used first,
+so colorful logs never run out of them
+
 Adapted from https://github.com/spellr/culour/blob/master/culour/culour.py
 """
 
 import os
 import curses
-from typing import Dict, Tuple
+import re
+import sys
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from logria.utilities.constants import COLOR_PAIR_LIMIT
+from logria.utilities.memory import DICT_ENTRY_SIZE, INT_SIZE
 
-COLOR_PAIRS_CACHE: Dict[Tuple[int, int], int] = {}
+# (foreground, background) to its pair number, least recently used first
+COLOR_PAIRS_CACHE: 'OrderedDict[Tuple[int, int], int]' = OrderedDict()
 DEFAULT_COLOR = -1
+DEFAULT_PAIR = (DEFAULT_COLOR, DEFAULT_COLOR)
+# Use the pairs from 101 and after, so there's less chance they'll be overwritten by the user
+PAIR_START = 101
+# A run of text and the (foreground, background) colors to draw it in
+Segment = Tuple[str, Tuple[int, int]]
+# The escape sequences ANSI_COLOR_PATTERN removes, with their parameters; the ones ending in `m` set colors
+ESCAPE_REGEX = re.compile(r'(\x9B|\x1B\[)([0-?]*)[ -\/]*[@-~]')
+ESCAPE_START_REGEX = re.compile(r'[\x9B\x1B]')
+# Tabs move to the next multiple of this column, like curses draws them
+TAB_SIZE = 8
+
+# Source: https://en.wikipedia.org/wiki/ANSI_escape_code#8-bit
+STANDARD_RGB = [
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+]
+CUBE_LEVELS = [0, 95, 135, 175, 215, 255]
+# Red, green, and blue of each of the 256 colors
+PALETTE = STANDARD_RGB + \
+    [(CUBE_LEVELS[i // 36], CUBE_LEVELS[i // 6 % 6], CUBE_LEVELS[i % 6]) for i in range(216)] + \
+    [(8 + 10 * i,) * 3 for i in range(24)]
+
+_nearest_tables: Dict[int, List[int]] = {}  # Number of terminal colors to the nearest color for each of the 256
+_generation = 0  # Incremented whenever a pair is given new colors
+
+
+def _distance(first: Tuple[int, int, int], second: Tuple[int, int, int]) -> int:
+    """
+    Squared distance between two colors
+    """
+    return sum((a - b) ** 2 for a, b in zip(first, second))
+
+
+def rgb_to_color(red: int, green: int, blue: int) -> int:
+    """
+    Get the nearest of the 256 colors to a true color
+    """
+    cube = [0 if value < 48 else 1 if value < 115 else (value - 35) // 40 for value in (red, green, blue)]
+    cube_color = 16 + 36 * cube[0] + 6 * cube[1] + cube[2]
+    gray = 232 + min(23, max(0, (sum((red, green, blue)) // 3 - 3) // 10))
+    target = (red, green, blue)
+    return min((cube_color, gray), key=lambda color: _distance(PALETTE[color], target))
+
+
+def nearest_table(colors: int) -> List[int]:
+    """
+    Get the nearest color a terminal with `colors` colors has for each of the 256 colors
+    """
+    table = _nearest_tables.get(colors)
+    if table is None:
+        if colors >= 256:
+            table = list(range(256))
+        elif colors >= 8:
+            # Terminals with fewer than 256 colors only reliably have the standard ones
+            candidates = range(min(colors, 16))
+            table = [min(candidates, key=lambda candidate: _distance(PALETTE[candidate], rgb))  # pylint: disable=cell-var-from-loop
+                     for rgb in PALETTE]
+        else:
+            table = [DEFAULT_COLOR] * 256
+        _nearest_tables[colors] = table
+    return table
+
+
+def _pair_range() -> Tuple[int, int]:
+    """
+    Get the first pair number to use and the number after the last
+    """
+    # Before curses starts, assume the terminal has every pair
+    available = min(getattr(curses, 'COLOR_PAIRS', COLOR_PAIR_LIMIT), COLOR_PAIR_LIMIT)
+    first = PAIR_START if available > PAIR_START + 1 else 1
+    return first, available
 
 
-# Source: https://en.wikipedia.org/wiki/ANSI_escape_code#3/4_bit
-FOREGROUND = {
-    # Normal
-    '[37': curses.COLOR_WHITE,
-    '[36': curses.COLOR_CYAN,
-    '[35': curses.COLOR_MAGENTA,
-    '[34': curses.COLOR_BLUE,
-    '[33': curses.COLOR_YELLOW,
-    '[32': curses.COLOR_GREEN,
-    '[31': curses.COLOR_RED,
-    '[30': curses.COLOR_BLACK,
-    # Bright
-    '[97': curses.COLOR_WHITE,
-    '[96': curses.COLOR_CYAN,
-    '[95': curses.COLOR_MAGENTA,
-    '[94': curses.COLOR_BLUE,
-    '[93': curses.COLOR_YELLOW,
-    '[92': curses.COLOR_GREEN,
-    '[91': curses.COLOR_RED,
-    '[90': curses.COLOR_BLACK,
-}
-BACKGROUND = {
-    # Normal
-    '[47': curses.COLOR_WHITE,
-    '[46': curses.COLOR_CYAN,
-    '[45': curses.COLOR_MAGENTA,
-    '[44': curses.COLOR_BLUE,
-    '[43': curses.COLOR_YELLOW,
-    '[42': curses.COLOR_GREEN,
-    '[41': curses.COLOR_RED,
-    '[40': curses.COLOR_BLACK,
-    # Bright
-    '[107': curses.COLOR_WHITE,
-    '[106': curses.COLOR_CYAN,
-    '[105': curses.COLOR_MAGENTA,
-    '[104': curses.COLOR_BLUE,
-    '[103': curses.COLOR_YELLOW,
-    '[102': curses.COLOR_GREEN,
-    '[101': curses.COLOR_RED,
-    '[100': curses.COLOR_BLACK,
-}
-
-
-def _get_color(foreground: int, background: int):
+def _get_color(foreground: int, background: int) -> int:
     """
     Memoize init_pair wrapper; store an index of previously used color combinations
 
     init_color creates an integer and stores it as the primary key to a color pair,
-    so here we cache the results so we do not overwrite old pairs
+    so here we cache the results so we do not overwrite pairs in use. Once every
+    pair is used, the least recently used one is given the new colors
     """
+    global _generation  # pylint: disable=global-statement
     key = (foreground, background)
-    if key not in COLOR_PAIRS_CACHE:
-        # Use the pairs from 101 and after, so there's less chance they'll be overwritten by the user
-        pair_num = len(COLOR_PAIRS_CACHE) + 101
-        try:
-            curses.init_pair(pair_num, foreground, background)
-        except curses.error:
-            # If colors were never enabled, this call does not matter anyway
-            pass
-        COLOR_PAIRS_CACHE[key] = pair_num
+    pair_num = COLOR_PAIRS_CACHE.get(key)
+    if pair_num is not None:
+        COLOR_PAIRS_CACHE.move_to_end(key)
+        return pair_num
+    first, end = _pair_range()
+    if end <= first:
+        # The terminal has no colors, so everything is drawn with the default pair
+        return 0
+    if len(COLOR_PAIRS_CACHE) < end - first:
+        pair_num = first + len(COLOR_PAIRS_CACHE)
+    else:
+        _, pair_num = COLOR_PAIRS_CACHE.popitem(last=False)
+        _generation += 1
+    table = nearest_table(getattr(curses, 'COLORS', 256))
+    try:
+        curses.init_pair(pair_num,
+                         DEFAULT_COLOR if foreground == DEFAULT_COLOR else table[foreground],
+                         DEFAULT_COLOR if background == DEFAULT_COLOR else table[background])
+    except (curses.error, ValueError):
+        # If colors were never enabled, this call does not matter anyway
+        pass
+    COLOR_PAIRS_CACHE[key] = pair_num
+    return pair_num
 
-    return COLOR_PAIRS_CACHE[key]
+
+def pair_generation() -> int:
+    """
+    Get a number that changes whenever a pair in use is given new colors
+    """
+    return _generation
+
+
+def cache_size() -> int:
+    """
+    Approximate bytes held by the color pair cache
+    """
+    return len(COLOR_PAIRS_CACHE) * (DICT_ENTRY_SIZE + sys.getsizeof((0, 0)) + INT_SIZE)
+
+
+def _extended_color(params: List[str], position: int) -> Tuple[Optional[int], int]:
+    """
+    Read the color after a `38` or `48` code from `5;n` or `2;r;g;b`
+
+    Returns the color, or None if it is invalid, and the position of the next code
+    """
+    try:
+        mode = int(params[position + 1])
+        if mode == 5:
+            color = int(params[position + 2])
+            # Only the 256 colors exist; skip a number past them like a terminal does
+            return (color if color <= 255 else None), position + 3
+        if mode == 2:
+            red, green, blue = (min(255, int(value)) for value in params[position + 2:position + 5])
+            return rgb_to_color(red, green, blue), position + 5
+    except (IndexError, ValueError):
+        pass
+    return None, len(params)
+
+
+def apply_sgr(params: str, foreground: int, background: int) -> Tuple[int, int]:
+    """
+    Get the colors after the Select Graphic Rendition parameters `params`, like `1;38;5;208`
+    """
+    codes = params.split(';')
+    position = 0
+    while position < len(codes):
+        code = codes[position]
+        if ':' in code:
+            # Sub-parameters like `38:2::255:128:0`, where the color space may be left empty
+            parts = code.split(':')
+            if parts[0] in ('38', '48') and len(parts) > 2:
+                values = parts[:2] + (parts[-3:] if parts[1] == '2' else parts[2:3])
+                color, _ = _extended_color(values, 0)
+                if color is not None:
+                    if parts[0] == '38':
+                        foreground = color
+                    else:
+                        background = color
+            position += 1
+            continue
+        try:
+            number = int(code) if code else 0
+        except ValueError:
+            position += 1
+            continue
+        if number == 0:
+            foreground, background = DEFAULT_COLOR, DEFAULT_COLOR
+        elif 30 <= number <= 37:
+            foreground = number - 30
+        elif 90 <= number <= 97:
+            foreground = number - 82  # Bright colors are 8 through 15
+        elif 40 <= number <= 47:
+            background = number - 40
+        elif 100 <= number <= 107:
+            background = number - 92
+        elif number == 39:
+            foreground = DEFAULT_COLOR
+        elif number == 49:
+            background = DEFAULT_COLOR
+        elif number in (38, 48):
+            color, next_position = _extended_color(codes, position)
+            if color is not None:
+                if number == 38:
+                    foreground = color
+                else:
+                    background = color
+            position = next_position
+            continue
+        # Other attributes, like bold or underline, do not change colors
+        position += 1
+    return foreground, background
 
 
 def _color_str_to_color_pair(color: str):
     """
     Convert the escape code color to the curses color binding
     """
-    foreground = FOREGROUND.get(color, DEFAULT_COLOR)
-    background = BACKGROUND.get(color, DEFAULT_COLOR)
+    foreground, background = apply_sgr(color.lstrip('['), DEFAULT_COLOR, DEFAULT_COLOR)
     color_pair = _get_color(foreground, background)
     return color_pair
 
@@ -96,34 +239,155 @@ def _sanitize(line: str) -> str:
     return line
 
 
-def _add_line(y_coord: int, x_coord: int, window, line: str):
-    # Sanitize string
-    line = _sanitize(line)
-    # split but \033 which stands for a color change
-    color_split = line.split('\033')
+def char_width(char: str) -> int:
+    """
+    Number of columns a character is drawn in: 0 for combining marks and 2 for wide East Asian characters
+    """
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
 
-    # Print the first part of the line without color change
-    default_color_pair = _get_color(DEFAULT_COLOR, DEFAULT_COLOR)
-    try:
-        window.addstr(y_coord, x_coord,
-                      color_split[0], curses.color_pair(default_color_pair))
-        window.noutrefresh()
-        y_coord, x_coord = curses.getsyx()
-    except curses.error:
-        pass
 
-    # Iterate over the rest of the line-parts and print them with their colors
-    for substring in color_split[1:]:
-        color_str = substring.split('m')[0]
-        substring = substring[len(color_str)+1:]
-        color_pair = _color_str_to_color_pair(color_str)
-        try:
-            window.addstr(y_coord, x_coord, substring,
-                          curses.color_pair(color_pair))
-            window.noutrefresh()
-            y_coord, x_coord = curses.getsyx()
-        except curses.error:
-            pass
+def display_width(text: str) -> int:
+    """
+    Number of columns text without escape codes is drawn in
+    """
+    if text.isascii() and '\t' not in text:
+        return len(text)
+    column = 0
+    for char in text:
+        column += TAB_SIZE - column % TAB_SIZE if char == '\t' else char_width(char)
+    return column
+
+
+def column_index(text: str, end: int) -> int:
+    """
+    Index of the first character in text drawn at or past column `end`, or the length of text if none is
+    """
+    prefix = text[:end]
+    if prefix.isascii() and '\t' not in prefix:
+        # Every character is a column wide
+        return len(prefix)
+    column = 0
+    for index, char in enumerate(text):
+        if column >= end:
+            return index
+        column += TAB_SIZE - column % TAB_SIZE if char == '\t' else char_width(char)
+    return len(text)
+
+
+def _clip_text(text: str, column: int, start: int, end: int) -> Tuple[str, int]:
+    """
+    Keep the part of text drawn from column `start` up to `end`, given text that starts in `column`
+
+    Tabs are expanded to spaces and wide characters cut by `start` or `end` keep their drawn columns as spaces.
+    Returns the kept text and the column reached, which is at least `end` if text did not fit
+    """
+    if text.isascii() and '\t' not in text:
+        return text[max(start - column, 0):max(end - column, 0)], column + len(text)
+    kept: List[str] = []
+    for char in text:
+        if column >= end:
+            break
+        width = TAB_SIZE - column % TAB_SIZE if char == '\t' else char_width(char)
+        if column + width > start:
+            if char == '\t' or column < start or column + width > end:
+                kept.append(' ' * (min(column + width, end) - max(column, start)))
+            else:
+                kept.append(char)
+        column += width
+    return ''.join(kept), column
+
+
+def _append(segments: List[Segment], text: str, color: Tuple[int, int]) -> None:
+    """
+    Add text to the segments, joining it to the last segment if the colors did not change
+    """
+    if '\x1b' in text:
+        # An escape that does not start a sequence would be drawn as `^[`
+        text = text.replace('\x1b', '')
+    if not text:
+        return
+    if segments and segments[-1][1] == color:
+        # Codes that do not change the colors do not need another call to draw
+        segments[-1] = (segments[-1][0] + text, color)
+    else:
+        segments.append((text, color))
+
+
+def _strip_end(segments: List[Segment]) -> None:
+    """
+    Remove trailing whitespace from the last segments, dropping any left empty
+    """
+    while segments:
+        text, color = segments[-1]
+        text = text.rstrip()
+        if text:
+            segments[-1] = (text, color)
+            return
+        segments.pop()
+
+
+def _tokenize_columns(line: str, start: int, end: int) -> Tuple[Segment, ...]:
+    """
+    Tokenize the columns of a line from `start` up to `end`, without reading the line past them
+    """
+    segments: List[Segment] = []
+    color = DEFAULT_PAIR
+    position = 0  # Index in the line
+    column = 0  # Column the character at `position` is drawn in
+    while column < end:
+        # Characters past the next `end - column` cannot be drawn, so codes past them do not matter
+        limit = position + end - column
+        found = ESCAPE_START_REGEX.search(line, position, limit)
+        text_end = found.start() if found is not None else min(limit, len(line))
+        text, column = _clip_text(line[position:text_end], column, start, end)
+        _append(segments, text, color)
+        position = text_end
+        if found is None:
+            if position >= len(line):
+                break
+            # Combining marks take no column, so there can be more to read
+            continue
+        match = ESCAPE_REGEX.match(line, position)
+        if match is None:
+            # An escape that does not start a sequence is not drawn
+            position += 1
+            continue
+        if match.group(0).endswith('m'):
+            color = apply_sgr(match.group(2), *color)
+        position = match.end()
+    if position >= len(line):
+        # The line ended before the last column, so it may end with a newline
+        _strip_end(segments)
+    return tuple(segments)
+
+
+def tokenize(line: str, start: int = 0, width: Optional[int] = None) -> Tuple[Segment, ...]:
+    """
+    Split a line on its escape codes into (text, (foreground, background)) segments
+
+    Colors set by a code last until a later code changes them; text before the first code uses the default colors.
+    Given a `width`, only the `width` columns from column `start` are kept, reading the line no further than them
+    """
+    if width is not None:
+        return _tokenize_columns(line, start, start + width)
+    if '\x1b' not in line and '\x9b' not in line:
+        return ((line, DEFAULT_PAIR),) if line else ()
+    segments: List[Segment] = []
+    color = DEFAULT_PAIR
+    position = 0
+    for match in ESCAPE_REGEX.finditer(line):
+        _append(segments, line[position:match.start()], color)
+        if match.group(0).endswith('m'):
+            color = apply_sgr(match.group(2), *color)
+        position = match.end()
+    _append(segments, line[position:], color)
+    return tuple(segments)
+
+
+def _add_line(y_coord: int, x_coord: int, window, line: str):
+    add_segments(window, y_coord, x_coord, tokenize(line))
 
 
 def _inner_addstr(window, string: str, y_coord=-1, x_coord=-1):
@@ -167,3 +431,45 @@ def addstr(*args):
         x_coord = -1
 
     return _inner_addstr(window, string, y_coord, x_coord)
+
+
+def add_segments(window, y_coord: int, x_coord: int, segments: Sequence[Segment]):
+    """
+    Adds (text, (foreground, background)) segments to the given window, starting at the given coordinates
+
+    Each segment continues from where the last one ended, wrapping like a single string would,
+    so the cursor never has to be read back from curses
+    """
+    for position, (text, (foreground, background)) in enumerate(segments):
+        attr = curses.color_pair(_get_color(foreground, background))
+        try:
+            if position == 0:
+                window.addstr(y_coord, x_coord, _sanitize(text), attr)
+            else:
+                window.addstr(_sanitize(text), attr)
+        except curses.error:
+            # Writing the bottom right corner moves the cursor off the window
+            pass
+
+
+def clip_segments(segments: Sequence[Segment], start: int, width: int) -> Tuple[Segment, ...]:
+    """
+    Keep the `width` columns of the segments from column `start`
+    """
+    clipped: List[Segment] = []
+    end = start + width
+    column = 0
+    for text, color in segments:
+        if column >= end:
+            break
+        kept, column = _clip_text(text, column, start, end)
+        if kept:
+            clipped.append((kept, color))
+    return tuple(clipped)
+
+
+def draw_line(window, y_coord: int, segments: Sequence[Segment]):
+    """
+    Adds the segments of a line from the start of a row
+    """
+    add_segments(window, y_coord, 0, segments)
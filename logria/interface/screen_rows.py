@@ -0,0 +1,99 @@
+"""
+Track what each row of a window shows, so a frame only redraws the rows that changed
+
+A frame is a list of lines, each with the row it starts on, the rows it wraps onto,
+and what is drawn there. Lines already on screen at the same rows are skipped. When
+the frame is the previous one moved up, like when following a stream, the window is
+scrolled and only the new lines at the bottom are drawn
+"""
+
+
+import curses
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# The row it starts on, the number of rows it takes, and what is drawn
+Line = Tuple[int, int, Any]
+# What is drawn on a row: a line's contents and which of its rows this is
+Row = Optional[Tuple[Any, int]]
+
+
+class ScreenRows():
+    """
+    The contents of each row of a window as of the last frame
+    """
+
+    def __init__(self):
+        self.window = None  # The window the rows were drawn in
+        self.rows: List[Row] = []  # Contents of each row, None when blank
+
+    def invalidate(self) -> None:
+        """
+        Forget what is on screen, so the next frame redraws every row
+        """
+        self.window = None
+        self.rows = []
+
+    def draw(self, window, height: int, lines: Sequence[Line], draw_line: Callable[[Any, int, Any], None]) -> None:
+        """
+        Draw the lines of a frame with `draw_line(window, row, contents)`, skipping rows that did not change
+        """
+        new: List[Row] = [None] * height
+        for top, rows, contents in lines:
+            for part in range(rows):
+                if 0 <= top + part < height:
+                    new[top + part] = (contents, part)
+
+        if window is not self.window or len(self.rows) != height:
+            # A new window or size, so nothing on screen can be reused
+            window.erase()
+            window.idlok(True)  # Let the terminal scroll rows instead of redrawing them
+            self.window = window
+            old: List[Row] = [None] * height
+        else:
+            old = self.rows
+            shift = self._shift(old, new)
+            if shift:
+                window.scrollok(True)
+                window.scroll(shift)
+                # Writing the bottom right corner must not scroll the window again
+                window.scrollok(False)
+                old = old[shift:] + [None] * shift
+
+        for top, rows, contents in lines:
+            span = range(max(top, 0), min(top + rows, height))
+            if all(old[row] == new[row] for row in span):
+                continue
+            for row in span:
+                if old[row] is not None:
+                    self._clear_row(window, row)
+            draw_line(window, top, contents)
+        for row in range(height):
+            if new[row] is None and old[row] is not None:
+                self._clear_row(window, row)
+        self.rows = new
+
+    @staticmethod
+    def _shift(old: Sequence[Row], new: Sequence[Row]) -> int:
+        """
+        Get how many rows the new frame moved up from the old one, or 0 if it did not just move up
+        """
+        if new[0] is None:
+            return 0
+        for shift in range(1, len(old)):
+            if old[shift] == new[0] and all(old[shift + row] == new[row] for row in range(len(old) - shift)):
+                return shift
+        return 0
+
+    @staticmethod
+    def _clear_row(window, row: int) -> None:
+        """
+        Blank one row of the window
+        """
+        try:
+            window.move(row, 0)
+            window.clrtoeol()
+        except curses.error:
+            pass
+
+    def __repr__(self):
+        return f'<Screen Rows: {sum(row is not None for row in self.rows)} of {len(self.rows)} drawn>'
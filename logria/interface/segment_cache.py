@@ -0,0 +1,79 @@
+"""
+Segments of recently rendered messages, so each message is only tokenized once
+
+Following a stream redraws the same lines many times as they scroll up the window,
+and scrolling back over a buffer revisits lines, so the segments of each rendered
+message are kept by its index in the buffer, dropping the least recently drawn first.
+When lines do not wrap, only the columns on screen are tokenized and kept
+"""
+
+
+import sys
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+from logria.interface.color_handler import DEFAULT_PAIR, Segment, tokenize
+from logria.utilities.constants import SEGMENT_CACHE_SIZE
+from logria.utilities.memory import DICT_ENTRY_SIZE, INT_SIZE, item_size
+
+# Bytes held by each segment besides its text
+SEGMENT_SIZE = sys.getsizeof(('', DEFAULT_PAIR))
+
+
+class SegmentCache():
+    """
+    Least recently used cache of the segments of messages in one buffer
+    """
+
+    def __init__(self, max_lines: int = SEGMENT_CACHE_SIZE):
+        self.max_lines: int = max_lines
+        self.cache: 'OrderedDict[int, Tuple[Segment, ...]]' = OrderedDict()  # Message index to its segments
+        self.buffer: Optional[Sequence[str]] = None  # The buffer `cache` indexes into
+        self.columns: Optional[Tuple[int, int]] = None  # The first column and width of the cached segments
+
+    def get(self, messages: Sequence[str], index: int, columns: Optional[Tuple[int, int]] = None) -> Tuple[Segment, ...]:
+        """
+        Get the segments of the message at `index`, tokenizing it if it is not cached
+
+        Given `columns`, a first column and a width, only the segments in those columns are kept
+        """
+        if messages is not self.buffer or columns != self.columns:
+            self.cache.clear()
+            self.buffer = messages
+            self.columns = columns
+        segments = self.cache.get(index)
+        if segments is not None:
+            self.cache.move_to_end(index)
+            return segments
+        if columns is None:
+            segments = tokenize(messages[index].rstrip())
+        else:
+            segments = tokenize(messages[index], *columns)
+        self.cache[index] = segments
+        if len(self.cache) > self.max_lines:
+            self.cache.popitem(last=False)
+        return segments
+
+    def clear(self) -> None:
+        """
+        Drop every cached line
+        """
+        self.cache.clear()
+        self.buffer = None
+        self.columns = None
+
+    def size_bytes(self) -> int:
+        """
+        Approximate bytes held by the cached segments
+        """
+        total = len(self.cache) * (DICT_ENTRY_SIZE + INT_SIZE)
+        for segments in self.cache.values():
+            total += sys.getsizeof(segments)
+            total += sum(SEGMENT_SIZE + item_size(text) for text, _ in segments)
+        return total
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __repr__(self):
+        return f'<Segment Cache of {len(self.cache):,} lines>'
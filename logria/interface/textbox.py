@@ -197,12 +197,11 @@ class Textbox():
                         self._insert_printable_char(char)
         return 1
 
-    def gather(self) -> str:
+    def contents(self) -> str:
         """
-        Collect and return the contents of the window.
+        Collect the contents of the window without moving the cursor
         """
-        if self.exit_val == -1:
-            return ':q'  # exit string
+        cursor = self.win.getyx()
         result = ""
         self._update_max_yx()
         for y in range(self.maxy+1):
@@ -216,6 +215,16 @@ class Textbox():
                 result = result + chr(curses.ascii.ascii(self.win.inch(y, x)))
             if self.maxy > 0:
                 result = result + "\n"
+        self.win.move(*cursor)
+        return result
+
+    def gather(self) -> str:
+        """
+        Collect and return the contents of the window.
+        """
+        if self.exit_val == -1:
+            return ':q'  # exit string
+        result = self.contents()
         self.history_tape.add_item(result)
         return result
 
@@ -225,11 +234,14 @@ class Textbox():
         """
         self.exit_val = -1
 
-    def edit(self, validate: Optional[Callable] = None):
+    def edit(self, validate: Optional[Callable] = None,
+             on_change: Optional[Callable[[str], None]] = None,
+             on_idle: Optional[Callable[[], None]] = None):
         """
         Edit in the widget window and collect the results.
 
-        TODO: Async, not blocking
+        on_change: called with the contents of the window after each keystroke
+        on_idle: called each poll that has no keystroke, so work can continue while editing
         """
         while True:
             if self.exit_val == -1:
@@ -240,7 +252,14 @@ class Textbox():
                 ch = validate(ch)
             if not ch:
                 continue
+            if ch == curses.ERR:
+                # No keystroke this poll
+                if on_idle:
+                    on_idle()
+                continue
             if not self.do_command(ch):
                 break
             self.win.refresh()
+            if on_change:
+                on_change(self.contents())
         return self.gather()
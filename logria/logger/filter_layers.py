@@ -0,0 +1,244 @@
+"""
+Stacked include and exclude filters, like piping through `grep` and `grep -v`
+
+The first layer reads the matches of the `/` filter, or every message if there is
+none, narrowed to the selected log levels and sources if any are selected, and
+each later layer reads the output of the enabled layer before it. Each
+layer remembers how much of its input it has tested, so new messages are only
+tested once per layer. Adding a layer only tests the output below it, and removing
+or toggling layer `n` only recomputes layers `n` and after
+"""
+
+
+from typing import List, Optional, Sequence, Set
+
+from logria.logger.processor import select_messages
+from logria.utilities.facets import LEVELS, FacetIndex
+from logria.utilities.filter_expression import filter_test_generator
+from logria.utilities.memory import int_list_size
+from logria.utilities.watchdog import FilterTimeout
+
+
+class FilterLayer():
+    """
+    One include or exclude filter and the message indexes that pass it
+    """
+
+    def __init__(self, pattern: str, exclude: bool):
+        func_handle = filter_test_generator(pattern)
+        if func_handle is None:
+            raise ValueError(f'Invalid regex pattern: {pattern}')
+        self.pattern: str = pattern
+        self.exclude: bool = exclude  # Whether matching messages are removed instead of kept
+        self.enabled: bool = True
+        self.func_handle = func_handle
+        self.rows: List[int] = []  # Indexes of messages that passed this layer
+        self.tested: int = 0  # Number of input rows already tested
+
+    def reset(self) -> None:
+        """
+        Forget the results, so the whole input is tested again
+        """
+        self.rows = []
+        self.tested = 0
+
+    def update(self, messages: Sequence[str], source: Sequence[int]) -> None:
+        """
+        Test input rows added since the last update
+        """
+        select_messages(messages, source[self.tested:], self.func_handle, not self.exclude, self.rows)
+        self.tested = len(source)
+
+    def __str__(self):
+        return f'{"-" if self.exclude else "+"}{self.pattern}{"" if self.enabled else " (off)"}'
+
+
+class FacetLayer():
+    """
+    Selects messages by log level and source from a buffer's facet bitsets, with no regex
+    """
+
+    def __init__(self):
+        self.levels: Set[int] = set()  # Indexes in LEVELS to keep, or empty to keep every level
+        self.sources: Set[int] = set()  # Streams to keep, or empty to keep every stream
+        self.index: Optional[FacetIndex] = None  # Bitsets for the buffer being filtered
+        self.rows: List[int] = []  # Indexes of messages that passed
+        self.tested: int = 0  # Number of input rows already tested
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether anything is selected for a buffer with facets
+        """
+        return self.index is not None and bool(self.levels or self.sources)
+
+    def reset(self) -> None:
+        """
+        Forget the results, so the whole input is selected again
+        """
+        self.rows = []
+        self.tested = 0
+
+    def update(self, messages: Sequence[str], source: Sequence[int]) -> None:  # pylint: disable=unused-argument
+        """
+        Select from input rows added since the last update
+        """
+        index = self.index
+        if index is None:
+            # Nothing is selected until the buffer has facets
+            return
+        if isinstance(source, range):
+            # Every message: read the selection straight from the bitsets
+            end = min(len(source), index.size)
+            self.rows.extend(index.indexes(self.levels, self.sources, self.tested, end))
+            self.tested = max(self.tested, end)
+            return
+        if self.tested == len(source):
+            return
+        # The `/` filter's matches: test each one's bit, reading only the bits from the first new match,
+        # since matches are in buffer order
+        first = source[self.tested] & ~7
+        mask = index.mask(self.levels, self.sources, first, source[-1] + 1)
+        rows = self.rows
+        tested = self.tested
+        for tested in range(self.tested, len(source)):
+            row = source[tested]
+            if row >= index.size:
+                break  # Not classified yet
+            offset = row - first
+            if mask[offset >> 3] >> (offset & 7) & 1:
+                rows.append(row)
+        else:
+            tested = len(source)
+        self.tested = tested
+
+    def __str__(self):
+        selected = [LEVELS[level] for level in sorted(self.levels)]
+        selected += [f'stream {source}' for source in sorted(self.sources)]
+        return ', '.join(selected)
+
+
+class FilterLayers():
+    """
+    The stack of filter layers applied after the `/` filter
+    """
+
+    def __init__(self):
+        self.layers: List[FilterLayer] = []
+        self.facets: FacetLayer = FacetLayer()  # Runs before every layer
+        # What the first layer read, to notice when it is replaced instead of appended to
+        self.messages: Optional[Sequence[str]] = None
+        self.source: Optional[Sequence[int]] = None
+        self.source_first: Optional[int] = None
+        self.source_length: int = 0
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether any layer is filtering
+        """
+        return self.facets.enabled or any(layer.enabled for layer in self.layers)
+
+    @property
+    def configured(self) -> bool:
+        """
+        Whether there are layers or selected facets, enabled or not
+        """
+        return bool(self.layers or self.facets.levels or self.facets.sources)
+
+    @property
+    def rows(self) -> List[int]:
+        """
+        Indexes of the messages that passed every enabled layer
+        """
+        for layer in reversed(self.layers):
+            if layer.enabled:
+                return layer.rows
+        return self.facets.rows if self.facets.enabled else []
+
+    def add(self, layer: FilterLayer) -> None:
+        """
+        Add a layer to the bottom of the stack; layers above it are unchanged
+        """
+        self.layers.append(layer)
+
+    def remove(self, position: int) -> FilterLayer:
+        """
+        Remove the layer at `position`, recomputing the layers after it
+        """
+        layer = self.layers.pop(position)
+        self.invalidate(position)
+        return layer
+
+    def toggle(self, position: int) -> FilterLayer:
+        """
+        Enable or disable the layer at `position`, recomputing it and the layers after it
+        """
+        layer = self.layers[position]
+        layer.enabled = not layer.enabled
+        self.invalidate(position)
+        return layer
+
+    def select(self, levels: Set[int], sources: Set[int]) -> None:
+        """
+        Select log levels and sources, recomputing every layer
+        """
+        self.facets.levels = levels
+        self.facets.sources = sources
+        self.facets.reset()
+        self.invalidate(0)
+
+    def invalidate(self, position: int) -> None:
+        """
+        Reset the layers from `position` down
+        """
+        for layer in self.layers[position:]:
+            layer.reset()
+
+    def update(self, messages: Sequence[str], matched_rows: Optional[List[int]],
+               facet_index: Optional[FacetIndex] = None) -> Optional[FilterLayer]:
+        """
+        Run new input through the facets and every enabled layer
+
+        matched_rows: the `/` filter's matches, or None to read every message
+        facet_index: the level and source bitsets for `messages`, if it has them
+        Returns the layer that was disabled for taking too long, if any
+        """
+        source = matched_rows if matched_rows is not None else range(len(messages))
+        first = source[0] if source else None
+        if (messages is not self.messages or matched_rows is not self.source
+                or len(source) < self.source_length or first != self.source_first):
+            # Not appended to, so everything must be tested again
+            self.facets.reset()
+            self.invalidate(0)
+            self.messages = messages
+            self.source = matched_rows
+        self.source_first = first
+        self.source_length = len(source)
+        self.facets.index = facet_index
+        if self.facets.enabled:
+            self.facets.update(messages, source)
+            source = self.facets.rows
+        for position, layer in enumerate(self.layers):
+            if not layer.enabled:
+                continue
+            try:
+                layer.update(messages, source)
+            except FilterTimeout:
+                layer.enabled = False
+                self.invalidate(position)
+                return layer
+            source = layer.rows
+        return None
+
+    def size_bytes(self) -> int:
+        """
+        Approximate memory held by the layers' rows
+        """
+        return int_list_size(len(self.facets.rows)) + sum(int_list_size(len(layer.rows)) for layer in self.layers)
+
+    def __len__(self):
+        return len(self.layers)
+
+    def __str__(self):
+        return ', '.join(f'{position}: {layer}' for position, layer in enumerate(self.layers))
@@ -0,0 +1,219 @@
+"""
+Filter the output window while a `/` command is still being typed
+
+After each keystroke the filter waits for typing to pause, then tests the most
+recent messages so the visible screen updates immediately, then works backward
+through the rest of the buffer in small time-boxed batches between polls of the
+command line. Older matches join the results once the whole buffer is tested. A new keystroke replaces the scan in progress, and when the new
+text only narrows the previous filter, the existing matches are re-tested instead.
+A recently used filter starts from its cached results
+"""
+
+
+import time
+from itertools import chain
+from typing import Callable, List, Optional, Sequence
+
+from logria.commands.recent_filters import (active_buffer, save_filter,
+                                            take_saved_filter)
+from logria.logger.processor import stop_parallel_scan, test_messages
+from logria.utilities.constants import (LIVE_FILTER_BATCH_SECONDS,
+                                        LIVE_FILTER_BATCH_SIZE,
+                                        LIVE_FILTER_DEBOUNCE,
+                                        LIVE_FILTER_TAIL_MESSAGES)
+from logria.utilities.filter_expression import (filter_test_generator,
+                                               is_filter_refinement,
+                                               span_test_generator)
+from logria.utilities.filter_cache import CachedFilter
+from logria.utilities.match_spans import MatchSpans
+from logria.utilities.regex_generator import has_nested_quantifier
+from logria.utilities.watchdog import FilterTimeout, can_interrupt
+
+# from logria.communication.shell_output import Logria
+
+
+class LiveFilter():
+    """
+    Incremental filter state for one `/` prompt
+    """
+
+    def __init__(self, logria: 'Logria',  # type: ignore
+                 debounce: float = LIVE_FILTER_DEBOUNCE,
+                 tail: int = LIVE_FILTER_TAIL_MESSAGES,
+                 batch_seconds: float = LIVE_FILTER_BATCH_SECONDS):
+        self.logria = logria
+        self.debounce: float = debounce  # Seconds typing must pause before scanning
+        self.tail: int = tail  # Newest messages to test before anything else
+        self.batch_seconds: float = batch_seconds  # Time to spend backfilling per poll
+        # The prompt does not let the main loop read new messages, so the buffer is fixed
+        self.end: int = len(logria.messages)
+        self.pending: Optional[str] = None  # Text waiting for typing to pause
+        self.changed_at: float = 0  # When the text last changed
+        self.command: str = ''  # The command `matches` were found with
+        self.func_handle: Optional[Callable] = None
+        self.span_handle: Optional[Callable] = None
+        self.matches: List[int] = []  # Matches among the newest messages, then every message once the scan is done
+        self.backfilled: List[List[int]] = []  # Matches from each batch older than `matches`, newest batch first
+        self.spans: MatchSpans = MatchSpans()  # Highlighted spans of each match
+        self.scanned_from: int = self.end  # The oldest message tested so far
+        self.shown: bool = False  # Whether the live results replaced the app's filter state
+        self.rejected: Optional[str] = None  # A command that ran out of time, so is not retried
+        self.cached: bool = False  # Whether `matches` were taken from the filter cache
+        # The app's filter may be typed again, so make its results available
+        save_filter(logria)
+
+    def is_complete(self, command: str) -> bool:
+        """
+        Determine if every message has been tested against `command`
+        """
+        return bool(command) and self.command == command and self.scanned_from == 0
+
+    def on_change(self, text: str) -> None:
+        """
+        Textbox callback: the command text changed
+        """
+        self.pending = text.strip()
+        self.changed_at = time.perf_counter()
+
+    def on_idle(self) -> None:
+        """
+        Textbox callback: no keystroke this poll, so scan if typing has paused
+        """
+        try:
+            if self.pending is not None and time.perf_counter() - self.changed_at >= self.debounce:
+                command, self.pending = self.pending, None
+                if self.start(command):
+                    self.show()
+            elif self.command and self.scanned_from > 0:
+                self.backfill()
+                self.show()
+        except FilterTimeout:
+            # Leave the full search to report the slow filter when the command is submitted
+            self.rejected = self.command
+            self.cached = False  # Partly tested results must not go back in the cache
+            self.start('')
+            self.show()
+
+    def start(self, command: str) -> bool:
+        """
+        Replace the current scan with one for `command`, testing the newest messages first
+
+        Returns False if nothing changed, like for an incomplete regex
+        """
+        if command in (self.command, self.rejected):
+            return False
+        if not command:
+            self._release()
+            self.command = ''
+            self.func_handle = None
+            self.span_handle = None
+            self.matches = []
+            self.backfilled = []
+            self.spans = MatchSpans()
+            self.scanned_from = self.end
+            return True
+        if not can_interrupt() and has_nested_quantifier(command):
+            # A runaway regex could not be stopped while typing
+            return False
+        func_handle = filter_test_generator(command)
+        if func_handle is None:
+            return False
+        self._merge()
+        previous_matches = self.matches
+        refinement = bool(self.command) and is_filter_refinement(self.command, command)
+        self._release()
+        self.command = command
+        self.func_handle = func_handle
+        self.span_handle = span_test_generator(command)
+        self.matches = []
+        self.spans = MatchSpans()
+        cached = take_saved_filter(self.logria, command)
+        if cached is not None:
+            # Only messages that arrived since the filter was last used need testing
+            self.matches = cached.matched_rows
+            self.spans = cached.match_spans
+            self.cached = True
+            self.scanned_from = 0
+            self._test(range(cached.last_index_regexed, self.end), self.matches)
+        elif refinement:
+            # Messages the previous filter rejected cannot match, so keep the scan's progress
+            self._test(previous_matches, self.matches)
+        else:
+            self.scanned_from = max(0, self.end - self.tail)
+            self._test(range(self.scanned_from, self.end), self.matches)
+        return True
+
+    def _release(self) -> None:
+        """
+        Return results taken from the filter cache before replacing them
+        """
+        buffer = active_buffer(self.logria)
+        if self.cached and buffer is not None:
+            self.logria.filter_cache.store(buffer, self.command, CachedFilter(self.matches, self.spans, self.end))
+        self.cached = False
+
+    def _test(self, indexes: Sequence[int], matches: List[int]) -> None:
+        """
+        Test messages against the live filter, appending matches and recording their spans
+        """
+        if self.span_handle is None:
+            return  # No filter is set
+        test_messages(self.logria.messages, indexes, self.span_handle, matches, self.spans)
+
+    def backfill(self) -> None:
+        """
+        Test older messages until the batch time runs out
+        """
+        deadline = time.perf_counter() + self.batch_seconds
+        while self.scanned_from > 0 and time.perf_counter() < deadline:
+            first = max(0, self.scanned_from - LIVE_FILTER_BATCH_SIZE)
+            batch: List[int] = []
+            self._test(range(first, self.scanned_from), batch)
+            self.backfilled.append(batch)
+            self.scanned_from = first
+        if self.scanned_from == 0:
+            self._merge()
+
+    def _merge(self) -> None:
+        """
+        Put the matches from backfilled batches before the newer matches, in buffer order
+        """
+        if self.backfilled:
+            self.backfilled.reverse()
+            self.backfilled.append(self.matches)
+            self.matches = list(chain.from_iterable(self.backfilled))
+            self.backfilled = []
+
+    def apply(self) -> None:
+        """
+        Replace the app's filter state with the live results
+        """
+        logria = self.logria
+        stop_parallel_scan(logria)
+        logria.func_handle = self.func_handle
+        logria.span_handle = self.span_handle
+        logria.regex_pattern = self.command
+        logria.highlight_match = bool(self.command)
+        logria.matched_rows = self.matches
+        logria.match_spans = self.spans
+        logria.last_index_regexed = self.end
+        logria.current_end = 0
+        logria.stick_to_bottom = True
+        logria.previous_render = None
+        self.shown = True
+
+    def withdraw(self) -> None:
+        """
+        Remove partial live results from the app's filter state, so they are never cached as complete
+        """
+        if self.shown and self.scanned_from > 0:
+            self.logria.func_handle = None
+            self.logria.span_handle = None
+
+    def show(self) -> None:
+        """
+        Render the live results without leaving the prompt
+        """
+        self.apply()
+        self.logria.render_text_in_output()
+        self.logria.command_line.refresh()  # Put the cursor back on the prompt
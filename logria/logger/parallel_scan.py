@@ -0,0 +1,205 @@
+"""
+Scan large backlogs of messages for filter matches on every core
+
+Each chunk of messages is joined with a separator character the chunk does not
+contain, encoded once, and written to a shared memory segment, so worker processes
+read them in place instead of receiving pickled copies. Each worker rebuilds the
+filter from the `/` command text, scans one chunk, and returns the indexes that
+matched with the spans to highlight in each. Chunks are collected in order, so matches can be appended to
+`matched_rows` as soon as every chunk before them has finished. If a worker fails, the scan
+stops at that chunk so the rest can be scanned serially
+"""
+
+
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Sequence, Tuple
+
+from logria.utilities.constants import (FILTER_BATCH_SIZE,
+                                        FILTER_BATCH_TIME_LIMIT,
+                                        PARALLEL_SCAN_CHUNK_SIZE,
+                                        PARALLEL_SCAN_MIN_MESSAGES)
+from logria.utilities.filter_expression import span_test_generator
+from logria.utilities.watchdog import FilterTimeout, time_limit
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None  # type: ignore
+
+ENCODING = 'utf-8'
+# Lone surrogates can come from decoding arbitrary bytes; keep them intact across processes
+ENCODING_ERRORS = 'surrogatepass'
+# Characters log messages are unlikely to contain, tried in order
+SEPARATORS = ('\x00', '\x1e', '\x1f', '\ufffe', '\U0010ffff')
+
+# Shared by every scan so workers are only started once
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def can_scan_in_parallel(count: int) -> bool:
+    """
+    Determine if scanning `count` messages is worth spreading across processes
+    """
+    return shared_memory is not None and (os.cpu_count() or 1) > 1 and count >= PARALLEL_SCAN_MIN_MESSAGES
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Get the worker pool, starting it on first use
+    """
+    global _executor  # pylint: disable=global-statement
+    if _executor is None:
+        _executor = ProcessPoolExecutor()
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """
+    Stop the worker pool, if it was started, so the next scan starts a new one
+    """
+    global _executor  # pylint: disable=global-statement
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _join_chunk(messages: Sequence[str]) -> Tuple[str, bytes]:
+    """
+    Join messages with a separator none of them contain, and encode the result
+
+    Raises ValueError if every separator appears in the messages
+    """
+    for separator in SEPARATORS:
+        text = separator.join(messages)
+        if text.count(separator) == len(messages) - 1:
+            return separator, text.encode(ENCODING, ENCODING_ERRORS)
+    raise ValueError('Messages contain every separator')
+
+
+def _read_chunk(name: str, position: int, length: int) -> str:
+    """
+    Worker: decode the chunk at `position` in the shared segment `name`
+    """
+    segment = shared_memory.SharedMemory(name=name)
+    buf = segment.buf
+    assert buf is not None  # Only None once the segment is closed
+    view = buf[position:position + length]
+    try:
+        return str(view, ENCODING, ENCODING_ERRORS)
+    finally:
+        # The view must be released before the segment can close
+        view.release()
+        segment.close()
+
+
+def _scan_chunk(name: str, position: int, length: int, separator: str, command: str,
+                base: int) -> List[Tuple[int, List[int]]]:
+    """
+    Worker: test each message in the chunk at `position` in the shared segment `name` against `command`
+    """
+    span_handle = span_test_generator(command)
+    assert span_handle is not None  # The command was a valid filter in the main process
+    messages = _read_chunk(name, position, length).split(separator)
+    matches = []
+    # The same budget per message as a scan in the main process; FilterTimeout is raised in `collect`
+    with time_limit(FILTER_BATCH_TIME_LIMIT * max(1.0, len(messages) / FILTER_BATCH_SIZE)):
+        for offset, message in enumerate(messages):
+            spans = span_handle(message)
+            if spans is not None:
+                matches.append((base + offset, spans))
+    return matches
+
+
+class ParallelScan():
+    """
+    A running scan of messages `start` through `end` against a `/` command
+
+    Raises ValueError if the messages cannot be shared; scan them serially instead
+    """
+
+    def __init__(self, messages: Sequence[str], command: str, start: int, end: int,
+                 chunk_size: int = PARALLEL_SCAN_CHUNK_SIZE):
+        self.start: int = start
+        self.end: int = end
+        self.scanned: int = start  # Every message before this index has been collected
+        self.failed: bool = False  # Whether a worker failed, leaving the messages from `scanned` unscanned
+        if isinstance(messages, list):
+            backlog = messages[start:end]
+        else:
+            backlog = [messages[index] for index in range(start, end)]
+        # (first message index, separator, encoded chunk)
+        encoded = []
+        for first in range(0, len(backlog), chunk_size):
+            separator, data = _join_chunk(backlog[first:first + chunk_size])
+            encoded.append((start + first, separator, data))
+        del backlog
+
+        size = max(sum(len(data) for _, _, data in encoded), 1)
+        self.segment: Optional[shared_memory.SharedMemory] = shared_memory.SharedMemory(create=True, size=size)
+        buf = self.segment.buf
+        assert buf is not None  # Only None once the segment is closed
+        executor = get_executor()
+        # Ordered by position in the buffer, with the index each chunk ends at
+        self.chunks: List[Tuple[Future, int]] = []
+        position = 0
+        for first, separator, data in encoded:
+            buf[position:position + len(data)] = data
+            self.chunks.append((executor.submit(_scan_chunk, self.segment.name, position, len(data),
+                                                separator, command, first),
+                                min(first + chunk_size, end)))
+            position += len(data)
+        self.next_chunk: int = 0  # The first chunk not yet collected
+        if not self.chunks:
+            self.close()
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether every chunk has been collected
+        """
+        return self.next_chunk >= len(self.chunks)
+
+    def collect(self) -> List[Tuple[int, List[int]]]:
+        """
+        Get the (index, flattened spans) of matches from chunks that finished since the last call, in buffer order
+
+        Stops at the first unfinished chunk so later matches are never returned early
+        If a worker fails any other way, the scan is done with `failed` set, leaving messages from `scanned`
+        Raises FilterTimeout if a worker ran out of time
+        """
+        matches: List[Tuple[int, List[int]]] = []
+        while not self.done and self.chunks[self.next_chunk][0].done():
+            future, chunk_end = self.chunks[self.next_chunk]
+            try:
+                matches.extend(future.result())
+            except FilterTimeout:
+                raise
+            except Exception as error:  # pylint: disable=broad-except
+                if isinstance(error, BrokenProcessPool):
+                    # A worker died, so the pool cannot run any more chunks
+                    shutdown_executor()
+                self.failed = True
+                self.close()
+                self.next_chunk = len(self.chunks)
+                break
+            self.scanned = chunk_end
+            self.next_chunk += 1
+        if self.done:
+            self.close()
+        return matches
+
+    def close(self) -> None:
+        """
+        Cancel any chunks that have not started and release the shared segment
+        """
+        for future, _ in self.chunks[self.next_chunk:]:
+            future.cancel()
+        if self.segment is not None:
+            self.segment.close()
+            self.segment.unlink()
+            self.segment = None
+
+    def __repr__(self):
+        return f'<Parallel Scan of messages {self.start:,} to {self.end:,}, through {self.scanned:,}>'
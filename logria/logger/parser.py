@@ -7,10 +7,12 @@ import os
 import re
 from collections import Counter
 from pathlib import Path
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Pattern
 
 from logria.utilities import fs
-from logria.utilities.constants import ANSI_COLOR_PATTERN, SAVED_PATTERNS_PATH
+from logria.utilities.constants import SAVED_PATTERNS_PATH
+from logria.utilities.memory import DICT_ENTRY_SIZE, INT_SIZE, item_size
+from logria.utilities.regex_generator import compile_pattern, strip_ansi
 
 
 class Parser():
@@ -20,6 +22,7 @@ class Parser():
 
     def __init__(self, num_to_print=5):
         self._pattern: Optional[str] = None  # The raw pattern
+        self._compiled: Optional[Pattern] = None  # The compiled pattern
         # The type of pattern to parse, sring {'split', 'regex'}
         self._type: Optional[str] = None
         self._name: Optional[str] = None  # The name of the pattern
@@ -30,6 +33,7 @@ class Parser():
         self.num_to_print = num_to_print  # Number of items to print in analytics output
         self._analytics_map: dict = {}
         self.analytics: dict = {}  # Analytics the main script can access
+        self.analytics_bytes: int = 0  # Approximate size of the analytics containers
         self.setup_folder()
 
     def setup_folder(self):
@@ -52,13 +56,15 @@ class Parser():
         """
         Init the class variables when loading
         """
+        compiled = None
         if pattern is not None:
             try:
-                re.compile(pattern)
+                compiled = compile_pattern(pattern)
             except re.error as err:
                 raise ValueError(
                     f'Parser {name} has invalid regex pattern: /{pattern}/') from err
         self._pattern = pattern
+        self._compiled = compiled
         self._type = type_
         self._name = name
         self._example = example
@@ -71,6 +77,7 @@ class Parser():
         Resets the current analytics dictionary
         """
         self.analytics = {}
+        self.analytics_bytes = 0
 
     def get_analytics_for_index(self, index: int) -> str:
         """
@@ -106,6 +113,9 @@ class Parser():
         if rule == 'count':
             if not self.analytics[index]:
                 self.analytics[index] = Counter()
+            if part not in self.analytics[index]:
+                # Only new keys grow the Counter
+                self.analytics_bytes += item_size(part) + DICT_ENTRY_SIZE + INT_SIZE
             self.analytics[index].update([part])
         elif rule == 'sum':
             if not self.analytics[index]:
@@ -167,24 +177,24 @@ class Parser():
         """
         Remove ANSI escape sequences from a string
         """
-        return re.sub(ANSI_COLOR_PATTERN, '', string)
+        return strip_ansi(string)
 
     def split_pattern(self, message: str) -> List[str]:
         """
         Split a log message based on a delimiter
         """
-        if self._pattern is None:
+        if self._compiled is None:
             raise ValueError('Parsing pattern when pattern not set!')
-        parts = re.split(self._pattern, message)
+        parts = self._compiled.split(message)
         return parts
 
     def regex_pattern(self, message: str) -> List[str]:
         """
         Split a log message based on matches to a regex pattern
         """
-        if self._pattern is None:
+        if self._compiled is None:
             raise ValueError('Parsing pattern when pattern not set!')
-        matches = re.match(self._pattern, message)
+        matches = self._compiled.match(message)
         return list(matches.groups()) if matches is not None else []
 
     def parse(self, message: str) -> List[str]:
@@ -3,45 +3,134 @@ Processors functions to filter messages from Logria streams
 """
 
 
+from typing import Callable, List, Sequence
+
+from logria.commands.index import active_index
+from logria.logger.parallel_scan import ParallelScan, can_scan_in_parallel
+from logria.utilities.constants import FILTER_BATCH_SIZE, FILTER_BATCH_TIME_LIMIT
+from logria.utilities.filter_expression import filter_required_literals
+from logria.utilities.match_spans import MatchSpans
+from logria.utilities.trigram_index import split_candidates
+from logria.utilities.watchdog import time_limit
+
 # from logria.communication.shell_output import Logria
 
 
+def test_messages(messages: Sequence[str], indexes: Sequence[int], span_handle: Callable,
+                  matched_rows: List[int], match_spans: MatchSpans) -> None:
+    """
+    Test the messages at `indexes` in order with a handle from `span_test_generator`,
+    appending matches to `matched_rows` and recording the spans to highlight in `match_spans`
+
+    Raises FilterTimeout if a batch of messages takes longer than its time budget
+    """
+    add_spans = match_spans.add
+    for first in range(0, len(indexes), FILTER_BATCH_SIZE):
+        with time_limit(FILTER_BATCH_TIME_LIMIT):
+            for index in indexes[first:first + FILTER_BATCH_SIZE]:
+                spans = span_handle(messages[index])
+                if spans is not None:
+                    matched_rows.append(index)
+                    add_spans(index, spans)
+
+
+def select_messages(messages: Sequence[str], indexes: Sequence[int], func_handle: Callable,
+                    keep: bool, selected: List[int]) -> None:
+    """
+    Test the messages at `indexes` in order, appending the indexes where `func_handle` returns `keep` to `selected`
+
+    Raises FilterTimeout if a batch of messages takes longer than its time budget
+    """
+    add = selected.append
+    for first in range(0, len(indexes), FILTER_BATCH_SIZE):
+        with time_limit(FILTER_BATCH_TIME_LIMIT):
+            for index in indexes[first:first + FILTER_BATCH_SIZE]:
+                if bool(func_handle(messages[index])) is keep:
+                    add(index)
+
+
+def get_span_handle(logria: 'Logria') -> Callable:  # type: ignore
+    """
+    Get the span handle for the current filter, or one that highlights nothing if only `func_handle` is set
+    """
+    if logria.span_handle is not None:
+        return logria.span_handle
+    func_handle = logria.func_handle
+    return lambda string: [] if func_handle(string) else None
+
+
 def process_matches(logria: 'Logria') -> None:  # type: ignore
     """
-    Process the matches for filtering, should by async but the commented code here
-    does not work
+    Process the matches for filtering
 
-    # TODO: Fix this method
+    Large backlogs are handed to a `ParallelScan` that runs while the main loop
+    continues, and its matches are collected here on later calls
+
+    Raises FilterTimeout if the filter is too slow, so the caller can disable it
     """
-    # def add_to_list(result: multiprocessing.Queue, messages: list, last_idx_searched: int, func_handle: Callable):
-    #     """
-    #     Main loop will create this separate process to find matches while the main loop runs
-    #     """
-    #     for index, message in range(last_idx_searched, len(messages)):
-    #         print(index, message)
-    #         if func_handle(message):
-    #             result.put(index)
-    #         return result
-
-    # result = multiprocessing.Queue()
-    # proc = multiprocessing.Process(target=add_to_list, args=(result, logria.messages, logria.last_index_searched, logria.func_handle))
-    # proc.start()
-    # proc.join()
-    # print('done')
-    # logria.last_index_searched = len(logria.messages)
-    # while not result.empty:
-    #     idx = result.get()
-    #     print(idx)
-    #     logria.matched_rows.append(idx)
-    # logria.write_to_prompt('in method')
+    # Collect matches from a running parallel scan, in order; newer messages wait until it finishes
+    parallel = True
+    if logria.parallel_scan is not None:
+        for index, spans in logria.parallel_scan.collect():
+            logria.matched_rows.append(index)
+            logria.match_spans.add(index, spans)
+        logria.last_index_regexed = logria.parallel_scan.scanned
+        if not logria.parallel_scan.done:
+            return
+        # If a worker failed, scan what it left here instead
+        parallel = not logria.parallel_scan.failed
+        logria.parallel_scan = None
 
     # For each message, add its index to the list of matches; this is more efficient than
     # Storing a second copy of each match
-    for index in range(logria.last_index_regexed, len(logria.messages)):
-        # pylint: disable=not-callable
-        if logria.func_handle and logria.func_handle(logria.messages[index]):
-            logria.matched_rows.append(index)
-    logria.last_index_regexed = len(logria.messages)
+    func_handle = logria.func_handle
+    messages = logria.messages
+    start = logria.last_index_regexed
+    end = len(messages)
+    if func_handle:
+        trigram_index = active_index(logria)
+        if trigram_index is not None:
+            # Only run the filter on indexed messages that contain the filter's required literals
+            candidates, start = split_candidates(
+                trigram_index, filter_required_literals(logria.regex_pattern), start, end)
+            if candidates is not None:
+                test_messages(messages, candidates, get_span_handle(logria),
+                              logria.matched_rows, logria.match_spans)
+        # Messages the index does not cover
+        if parallel and can_scan_in_parallel(end - start):
+            try:
+                logria.parallel_scan = ParallelScan(messages, logria.regex_pattern, start, end)
+            except ValueError:
+                pass  # The messages cannot be shared, so scan them here
+            else:
+                logria.last_index_regexed = start
+                return
+        test_messages(messages, range(start, end), get_span_handle(logria),
+                      logria.matched_rows, logria.match_spans)
+    logria.last_index_regexed = end
+
+
+def stop_parallel_scan(logria: 'Logria') -> None:  # type: ignore
+    """
+    Abandon a running parallel scan, if any
+    """
+    if logria.parallel_scan is not None:
+        logria.parallel_scan.close()
+        logria.parallel_scan = None
+
+
+def narrow_matches(logria: 'Logria') -> None:  # type: ignore
+    """
+    Re-test only the existing matches against the current filter
+
+    Used when the new filter provably matches a subset of the previous one, so
+    messages that were not matched before cannot match now
+    """
+    previous_rows = logria.matched_rows
+    logria.matched_rows = []
+    logria.match_spans = MatchSpans()  # The new filter may highlight different text
+    test_messages(logria.messages, previous_rows, get_span_handle(logria),
+                  logria.matched_rows, logria.match_spans)
 
 
 def process_parser(logria: 'Logria'):  # type: ignore
@@ -64,6 +153,7 @@ def process_parser(logria: 'Logria'):  # type: ignore
             if match:
                 try:
                     logria.parsed_messages.append(match[logria.parser_index])
+                    logria.memory.add('parsed_messages', match[logria.parser_index])
                 except IndexError:
                     # If there was an error parsing, the message did not match the current pattern
                     pass
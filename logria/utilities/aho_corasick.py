@@ -0,0 +1,89 @@
+"""
+Aho-Corasick automaton to find any of a set of literal strings in one pass over a message
+"""
+
+
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+class AhoCorasick():
+    """
+    Matches a set of literals against a string in time linear in the length of the string,
+    regardless of how many literals there are
+
+    The failure links are folded into a full transition table when the automaton is built,
+    so scanning is a single dict lookup per character
+    """
+
+    def __init__(self, literals: Iterable[str]):
+        # Transition table; a character missing from a state's dict goes back to the root
+        self._transitions: List[Dict[str, int]] = [{}]
+        # Length of the longest literal that ends at each state, 0 if none
+        self._output: List[int] = [0]
+        self.literals: List[str] = []
+        for literal in literals:
+            if literal:
+                self._add(literal)
+        self._build()
+
+    def _add(self, literal: str) -> None:
+        """
+        Add a literal to the trie
+        """
+        state = 0
+        for char in literal:
+            next_state = self._transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self._transitions)
+                self._transitions[state][char] = next_state
+                self._transitions.append({})
+                self._output.append(0)
+            state = next_state
+        self._output[state] = max(self._output[state], len(literal))
+        self.literals.append(literal)
+
+    def _build(self) -> None:
+        """
+        Compute failure links breadth first and fold them into the transition table
+        """
+        children = [dict(edges) for edges in self._transitions]  # The plain trie
+        failure = [0] * len(self._transitions)
+        queue = deque(children[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in children[state].items():
+                # Shallower states are already folded, so this is the full transition
+                failure[target] = self._transitions[failure[state]].get(char, 0)
+                self._output[target] = max(self._output[target], self._output[failure[target]])
+                queue.append(target)
+            if state:
+                for char, target in self._transitions[failure[state]].items():
+                    self._transitions[state].setdefault(char, target)
+
+    def search(self, string: str) -> bool:
+        """
+        Determine if any literal occurs in `string`
+        """
+        transitions = self._transitions
+        output = self._output
+        state = 0
+        for char in string:
+            state = transitions[state].get(char, 0)
+            if output[state]:
+                return True
+        return False
+
+    def find_all(self, string: str) -> List[Tuple[int, int]]:
+        """
+        Get the (start, end) span of the longest literal ending at each position that has a match
+        """
+        transitions = self._transitions
+        output = self._output
+        spans = []
+        state = 0
+        for index, char in enumerate(string):
+            state = transitions[state].get(char, 0)
+            if output[state]:
+                spans.append((index + 1 - output[state], index + 1))
+        return spans
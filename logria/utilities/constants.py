@@ -14,13 +14,38 @@ LOGRIA_ROOT = os.environ.get('LOGRIA_ROOT', '.logria')
 SAVED_PATTERNS_PATH = f'{USER_HOME}/{LOGRIA_ROOT}/patterns'
 SAVED_SESSIONS_PATH = f'{USER_HOME}/{LOGRIA_ROOT}/sessions'
 SAVED_HISTORY_PATH = f'{USER_HOME}/{LOGRIA_ROOT}/history'
+SAVED_HIGHLIGHTS_PATH = f'{USER_HOME}/{LOGRIA_ROOT}/highlights'
 
 # Filenames
 HISTORY_TAPE_NAME = 'tape'
 
+# Rendering
+CONTEXT_SEPARATOR = '--'  # Shown between groups of context lines, like grep
+RENDER_MAX_FPS: float = 30  # Most renders per second of the output window
+SEGMENT_CACHE_SIZE: int = 4_096  # Rendered lines whose color segments are kept
+COLOR_PAIR_LIMIT: int = 256  # Pairs past this cannot be drawn, since attributes only hold 8 bits of pair
+
 # Numerical limits
 FASTEST_POLL_RATE: float = 0.0001   # Fast enough for smooth typing, 1000 hz
 SLOWEST_POLL_RATE: float = 0.1  # Poll ten times per second, 10 hz
+PATTERN_CACHE_SIZE: int = 128  # Compiled regex patterns to keep
+# Alternations with at least this many literals scan faster with Aho-Corasick than with `re`
+AHO_CORASICK_MIN_LITERALS: int = 48
+TRIGRAM_INDEX_MAX_BYTES: int = 256 * 1024 * 1024  # Stop growing a trigram index past this size
+TRIGRAM_INDEX_BLOCK_SIZE: int = 16  # Messages per trigram index posting
+# Backlogs with at least this many messages are scanned across processes
+PARALLEL_SCAN_MIN_MESSAGES: int = 250_000
+PARALLEL_SCAN_CHUNK_SIZE: int = 50_000  # Messages each worker scans at a time
+FILTER_BATCH_SIZE: int = 10_000  # Messages tested under one time limit
+FILTER_BATCH_TIME_LIMIT: float = 1.0  # Seconds a batch may take before its filter is disabled
+FILTER_PROBE_MESSAGES: int = 1_000  # Newest messages used to probe a filter in a worker
+FILTER_CACHE_SIZE: int = 8  # Recent filters whose results are kept for switching back
+FILTER_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Memory the cached filter results may hold
+LIVE_FILTER_DEBOUNCE: float = 0.15  # Seconds typing must pause before filtering as you type
+LIVE_FILTER_TAIL_MESSAGES: int = 10_000  # Newest messages to filter before the rest of the buffer
+LIVE_FILTER_BATCH_SIZE: int = 5_000  # Messages to backfill between checks of the time budget
+LIVE_FILTER_BATCH_SECONDS: float = 0.05  # Time to spend backfilling between keystroke checks
+HIGHLIGHT_CACHE_SIZE: int = 4_096  # Rendered lines whose highlight rule matches are kept
 
 # Text to exclude from message history
 HISTORY_EXCLUDES = {
@@ -71,6 +96,11 @@ APP_DESCRIPTION = 'A powerful CLI tool that puts log analytics at your fingertip
 EXEC_HELP = 'Command to listen to, ex: logria -e \'tail -f log.txt\''
 HISTORY_HELP = 'Disable command history disk cache'
 SMART_SPEED_HELP = 'Disable variable speed polling based on message receive rate'
+RECORD_HELP = 'Record the command passed with -e to this file, with the arrival time of each line'
+REPLAY_HELP = 'Replay a recording made with -r instead of listening to a command'
+FPS_HELP = 'Most times per second to redraw the output window; 0 redraws on every change'
+SPEED_HELP = 'Replay speed multiplier, ex: 10 for 10x; 0 replays as fast as possible'
+RECORD_WITHOUT_EXEC_ERROR = 'argument -r/--record: records the command passed with -e, so it needs -e and cannot be used with --replay'
 PIPE_INPUT_ERROR = \
 '''Piping is not supported as Logria cannot both
 listen to stdin as well as get user input from
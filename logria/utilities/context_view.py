@@ -0,0 +1,102 @@
+"""
+Display rows for filtered messages with lines of context around each match, like `grep -C`
+
+Each match shows up to `before` messages before it and `after` messages after it.
+Groups whose context touches are merged, and a separator row is shown between
+groups that do not. Rows are never stored: for each match we keep the number of
+rows shown through the end of its group, so a row is found by bisecting those
+totals and counting from the start of the group
+"""
+
+
+from array import array
+from bisect import bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+# Row value that stands for the line between two groups
+SEPARATOR = -1
+
+
+class ContextView():
+    """
+    Sequence of message indexes, or SEPARATOR, to show for `matched_rows` with context
+    """
+
+    def __init__(self, before: int, after: int):
+        self.before: int = before
+        self.after: int = after
+        self.matched_rows: List[int] = []  # The matches the rows are computed from
+        self.messages: Sequence[str] = []  # The buffer the matches index into
+        self.first_match: Optional[int] = None  # Detects matches inserted before the first
+        # Rows shown through the end of each match's group, for every match but the last,
+        # whose trailing context can still grow
+        self.ends: array = array('Q')
+
+    def update(self, matched_rows: List[int], messages: Sequence[str]) -> None:
+        """
+        Account for matches appended since the last update, or start over for a new set of matches
+        """
+        if (matched_rows is not self.matched_rows or len(matched_rows) <= len(self.ends)
+                or (matched_rows and matched_rows[0] != self.first_match)):
+            self.matched_rows = matched_rows
+            self.first_match = matched_rows[0] if matched_rows else None
+            self.ends = array('Q')
+        self.messages = messages
+        ends = self.ends
+        for k in range(len(ends), len(matched_rows) - 1):
+            ends.append((ends[-1] if ends else 0) + self._group_rows(k, matched_rows[k + 1] - 1))
+
+    def _group_start(self, k: int) -> Tuple[int, bool]:
+        """
+        Get the first message shown in match `k`'s group, and whether a separator comes before it
+        """
+        match = self.matched_rows[k]
+        if k == 0:
+            return max(0, match - self.before), False
+        previous = self.matched_rows[k - 1]
+        # The previous group's trailing context ends here
+        shown_through = previous + min(self.after, match - previous - 1)
+        start = max(match - self.before, shown_through + 1)
+        return start, start > shown_through + 1
+
+    def _group_rows(self, k: int, last_message: int) -> int:
+        """
+        Count the rows in match `k`'s group, with trailing context up to `last_message`
+        """
+        match = self.matched_rows[k]
+        start, separated = self._group_start(k)
+        return separated + match - start + 1 + min(self.after, last_message - match)
+
+    def size_bytes(self) -> int:
+        """
+        Approximate memory held by the row totals
+        """
+        return self.ends.itemsize * len(self.ends)
+
+    def __len__(self):
+        if not self.matched_rows:
+            return 0
+        base = self.ends[-1] if self.ends else 0
+        return base + self._group_rows(len(self.matched_rows) - 1, len(self.messages) - 1)
+
+    def __getitem__(self, row: int) -> int:
+        length = len(self)
+        if row < 0:
+            row += length
+        if not 0 <= row < length:
+            raise IndexError('ContextView index out of range')
+        k = bisect_right(self.ends, row)
+        offset = row - (self.ends[k - 1] if k else 0)
+        start, separated = self._group_start(k)
+        if separated:
+            if offset == 0:
+                return SEPARATOR
+            offset -= 1
+        return start + offset
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def __repr__(self):
+        return f'<Context View of {len(self.matched_rows):,} matches, {self.before} before and {self.after} after>'
@@ -0,0 +1,153 @@
+"""
+Bitmap indexes of each message's log level and source stream
+
+Messages are classified once, as they arrive, and each level and each source
+has a bitset with one bit per message. Selecting messages by level and source
+is then a few bitwise operations over those bitsets instead of a regex scan
+"""
+
+
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+# Log levels, from least to most severe; aliases are grouped into the closest one
+LEVELS = ('DEBUG', 'INFO', 'WARN', 'ERROR')
+LEVEL_ALIASES = {
+    'TRACE': 0, 'DEBUG': 0,
+    'INFO': 1, 'NOTICE': 1,
+    'WARN': 2, 'WARNING': 2,
+    'ERROR': 3, 'ERR': 3, 'CRIT': 3, 'CRITICAL': 3, 'FATAL': 3, 'PANIC': 3,
+}
+# Upper case level names, or lower case ones after `level=` or `"level":`, as structured loggers write them
+LEVEL_REGEX = re.compile(
+    r'\b(?:(' + '|'.join(LEVEL_ALIASES) + r')\b|level"?\s*[=:]\s*"?('
+    + '|'.join(alias.lower() for alias in LEVEL_ALIASES) + r')\b)')
+# Positions of the set bits in each byte value
+BIT_POSITIONS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+def classify_level(message: str) -> Optional[int]:
+    """
+    Get the index in LEVELS of the first log level named in a message, or None if there is none
+    """
+    match = LEVEL_REGEX.search(message)
+    if match is None:
+        return None
+    return LEVEL_ALIASES[(match.group(1) or match.group(2)).upper()]
+
+
+def parse_level(name: str) -> Optional[int]:
+    """
+    Get the index in LEVELS for a level name or alias typed by the user, like `warn` or `fatal`
+    """
+    return LEVEL_ALIASES.get(name.upper())
+
+
+def bit_indexes(bits: int, first: int, length: int) -> List[int]:
+    """
+    Get the message indexes of the set bits in a bitset covering `length` messages from `first`
+
+    `first` must be a multiple of 8
+    """
+    indexes: List[int] = []
+    extend = indexes.extend
+    data = bits.to_bytes((length + 7) // 8, 'little')
+    for offset, byte in enumerate(data):
+        if byte:
+            base = first + 8 * offset
+            extend(base + bit for bit in BIT_POSITIONS[byte])
+    return indexes
+
+
+def _set_bit(bitmap: bytearray, index: int) -> None:
+    """
+    Set the bit for message `index`, growing the bitmap as needed
+    """
+    byte = index >> 3
+    if len(bitmap) <= byte:
+        bitmap.extend(bytes(byte + 1 - len(bitmap)))
+    bitmap[byte] |= 1 << (index & 7)
+
+
+class FacetIndex():
+    """
+    Level and source bitsets for every message in one buffer
+    """
+
+    def __init__(self):
+        self.levels: List[bytearray] = [bytearray() for _ in LEVELS]
+        self.sources: Dict[int, bytearray] = {}
+        self.size: int = 0  # Number of messages classified
+
+    def add(self, message: str, source: int) -> None:
+        """
+        Classify the next message in the buffer
+        """
+        level = classify_level(message)
+        if level is not None:
+            _set_bit(self.levels[level], self.size)
+        bitmap = self.sources.get(source)
+        if bitmap is None:
+            bitmap = self.sources[source] = bytearray()
+        _set_bit(bitmap, self.size)
+        self.size += 1
+
+    def extend(self, messages: Iterable[str], sources: Iterable[int]) -> None:
+        """
+        Classify messages in order, with the source of each
+        """
+        for message, source in zip(messages, sources):
+            self.add(message, source)
+
+    def _union(self, bitmaps: Iterable[bytearray], first_byte: int, end_byte: int) -> int:
+        """
+        OR together the bytes from `first_byte` to `end_byte` of each bitmap
+        """
+        bits = 0
+        for bitmap in bitmaps:
+            bits |= int.from_bytes(bitmap[first_byte:end_byte], 'little')
+        return bits
+
+    def select(self, levels: Set[int], sources: Set[int], start: int = 0, end: Optional[int] = None) -> int:
+        """
+        Get a bitset, starting at the byte holding message `start`, of messages from `start` to `end`
+        with any of `levels` and any of `sources`; an empty set selects everything
+        """
+        end = self.size if end is None else min(end, self.size)
+        first_byte = start >> 3
+        end_byte = (end + 7) >> 3
+        # Only bits from `start` up to `end`
+        bits = ((1 << (end - start)) - 1) << (start & 7) if end > start else 0
+        if levels:
+            bits &= self._union((self.levels[level] for level in levels), first_byte, end_byte)
+        if sources:
+            bits &= self._union((self.sources[source] for source in sources if source in self.sources),
+                                first_byte, end_byte)
+        return bits
+
+    def indexes(self, levels: Set[int], sources: Set[int], start: int = 0, end: Optional[int] = None) -> List[int]:
+        """
+        Get the indexes of messages from `start` to `end` with any of `levels` and any of `sources`
+        """
+        end = self.size if end is None else min(end, self.size)
+        first = start & ~7
+        return bit_indexes(self.select(levels, sources, start, end), first, max(0, end - first))
+
+    def mask(self, levels: Set[int], sources: Set[int], start: int = 0, end: Optional[int] = None) -> bytes:
+        """
+        Get the bitset of selected messages from `start` to `end` as bytes, to test many messages by index
+
+        The first byte holds message `start & ~7`
+        """
+        end = self.size if end is None else min(end, self.size)
+        length = max(0, ((end + 7) >> 3) - (start >> 3))
+        return self.select(levels, sources, start, end).to_bytes(length, 'little')
+
+    def size_bytes(self) -> int:
+        """
+        Approximate memory held by the bitsets
+        """
+        return sum(len(bitmap) for bitmap in self.levels) + sum(len(bitmap) for bitmap in self.sources.values())
+
+    def __repr__(self):
+        return f'<Facet Index of {self.size:,} messages from {len(self.sources)} sources>'
@@ -0,0 +1,75 @@
+"""
+Results of recently used filters, kept so switching back to one is instant
+
+Each entry holds the matched indexes and spans a filter found in one buffer, and
+the index it had tested up to, so only messages appended since then need to be
+tested when it is used again. Entries are handed over instead of copied: taking
+one removes it, and the filter's results are stored again when it is replaced
+"""
+
+
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from logria.utilities.constants import FILTER_CACHE_MAX_BYTES, FILTER_CACHE_SIZE
+from logria.utilities.match_spans import MatchSpans
+from logria.utilities.memory import int_list_size
+
+
+class CachedFilter():
+    """
+    The results of one filter over one buffer
+    """
+
+    def __init__(self, matched_rows: List[int], match_spans: MatchSpans, last_index_regexed: int):
+        self.matched_rows: List[int] = matched_rows
+        self.match_spans: MatchSpans = match_spans
+        self.last_index_regexed: int = last_index_regexed  # Every message before this was tested
+        self.size_bytes: int = int_list_size(len(matched_rows)) + match_spans.size_bytes()
+
+
+class FilterCache():
+    """
+    Least recently used filter results, capped at `max_entries` and `max_bytes`
+    """
+
+    def __init__(self, max_entries: int = FILTER_CACHE_SIZE, max_bytes: int = FILTER_CACHE_MAX_BYTES):
+        self.entries: 'OrderedDict[Tuple[str, str], CachedFilter]' = OrderedDict()  # Oldest first
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+        self.size_bytes: int = 0
+
+    def store(self, buffer: str, pattern: str, entry: CachedFilter) -> None:
+        """
+        Save the results of `pattern` over `buffer`, evicting the oldest results to stay under the caps
+        """
+        self.take(buffer, pattern)
+        if entry.size_bytes > self.max_bytes or self.max_entries < 1:
+            return
+        self.entries[(buffer, pattern)] = entry
+        self.size_bytes += entry.size_bytes
+        while len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size_bytes -= evicted.size_bytes
+
+    def take(self, buffer: str, pattern: str) -> Optional[CachedFilter]:
+        """
+        Remove and return the results of `pattern` over `buffer`, if they are cached
+        """
+        entry = self.entries.pop((buffer, pattern), None)
+        if entry is not None:
+            self.size_bytes -= entry.size_bytes
+        return entry
+
+    def clear(self) -> None:
+        """
+        Forget every result, used when the buffers are replaced
+        """
+        self.entries.clear()
+        self.size_bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f'<Filter Cache of {len(self.entries):,} filters>'
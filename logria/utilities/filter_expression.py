@@ -0,0 +1,403 @@
+"""
+Boolean filter expressions for the `/` prompt
+
+An expression combines regex terms with `AND`, `OR`, `NOT`, and parentheses:
+    level=ERROR AND NOT healthcheck AND (db OR cache)
+
+`NOT` binds tightest, then `AND`, then `OR`. Terms containing spaces or keywords
+can be wrapped in double quotes. Parentheses that do not balance inside a term are
+treated as grouping, so `(db|cache)` is still a regex term but `(db` opens a group.
+
+Expressions compile into a single function that strips ANSI codes once per
+message, then evaluates each `AND`/`OR` with short-circuiting, cheapest term first
+"""
+
+
+import re
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+from logria.utilities.constants import PATTERN_CACHE_SIZE
+from logria.utilities.regex_generator import (ANSI_COLOR_REGEX,
+                                              compile_pattern, is_literal,
+                                              is_refinement,
+                                              regex_test_generator,
+                                              required_literals,
+                                              span_generator)
+from logria.utilities.watchlist import scoped_pattern
+
+KEYWORDS = frozenset({'AND', 'OR', 'NOT'})
+LEFT_PAREN = '('
+RIGHT_PAREN = ')'
+
+# Nodes are tuples so they can be compared when checking refinements:
+#   ('term', pattern), ('not', node), ('and', (nodes...)), ('or', (nodes...))
+Node = tuple
+
+
+class ExpressionError(ValueError):
+    """
+    Raised when a filter expression cannot be parsed
+    """
+
+
+def _unbalanced_parens(term: str) -> int:
+    """
+    Count of unclosed `(` minus unopened `)`, ignoring escaped characters
+    """
+    balance = 0
+    escaped = False
+    for char in term:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '(':
+            balance += 1
+        elif char == ')':
+            balance -= 1
+    return balance
+
+
+def tokenize(command: str) -> List[Tuple[str, str]]:
+    """
+    Split an expression into (kind, value) tokens where kind is one of
+    `keyword`, `term`, `(`, or `)`
+    """
+    tokens: List[Tuple[str, str]] = []
+    words: List[Tuple[bool, str]] = []  # (was quoted, text)
+    index = 0
+    while index < len(command):
+        char = command[index]
+        if char.isspace():
+            index += 1
+        elif char == '"':
+            end = index + 1
+            text = ''
+            while end < len(command) and command[end] != '"':
+                if command[end] == '\\' and command[end + 1:end + 2] == '"':
+                    end += 1
+                text += command[end]
+                end += 1
+            if end >= len(command):
+                raise ExpressionError('Unterminated quote')
+            words.append((True, text))
+            index = end + 1
+        else:
+            end = index
+            while end < len(command) and not command[end].isspace():
+                end += 1
+            words.append((False, command[index:end]))
+            index = end
+
+    for quoted, word in words:
+        if quoted:
+            tokens.append(('term', word))
+        elif word in KEYWORDS:
+            tokens.append(('keyword', word))
+        else:
+            # Leading `(` and trailing `)` that do not balance inside the word are grouping
+            opening = 0
+            while word.startswith(LEFT_PAREN) and _unbalanced_parens(word) > 0:
+                word = word[1:]
+                opening += 1
+            closing = 0
+            while word.endswith(RIGHT_PAREN) and _unbalanced_parens(word) < 0:
+                word = word[:-1]
+                closing += 1
+            tokens.extend([(LEFT_PAREN, LEFT_PAREN)] * opening)
+            if word:
+                tokens.append(('term', word))
+            tokens.extend([(RIGHT_PAREN, RIGHT_PAREN)] * closing)
+    return tokens
+
+
+def is_expression(command: str) -> bool:
+    """
+    Determine if a `/` command uses the expression syntax instead of being a single regex
+
+    Commands with keywords that do not parse as an expression, like `404 NOT FOUND`, are a single regex
+    """
+    try:
+        tokens = tokenize(command)
+        if not any(kind == 'keyword' for kind, _ in tokens):
+            return False
+        _Parser(tokens).parse()
+    except ExpressionError:
+        return False
+    return True
+
+
+class _Parser():
+    """
+    Recursive descent parser over a token list
+    """
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Tuple[str, str]:
+        """
+        Get the next token without consuming it
+        """
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return ('end', '')
+
+    def take(self) -> Tuple[str, str]:
+        """
+        Consume the next token
+        """
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self) -> Node:
+        """
+        Parse the whole token list
+        """
+        node = self.parse_or()
+        if self.peek()[0] != 'end':
+            raise ExpressionError(f'Unexpected {self.peek()[1]!r}')
+        return node
+
+    def parse_or(self) -> Node:
+        """
+        or := and ('OR' and)*
+        """
+        nodes = [self.parse_and()]
+        while self.peek() == ('keyword', 'OR'):
+            self.take()
+            nodes.append(self.parse_and())
+        return _combine('or', nodes)
+
+    def parse_and(self) -> Node:
+        """
+        and := not ('AND' not)*
+        """
+        nodes = [self.parse_not()]
+        while self.peek() == ('keyword', 'AND'):
+            self.take()
+            nodes.append(self.parse_not())
+        return _combine('and', nodes)
+
+    def parse_not(self) -> Node:
+        """
+        not := 'NOT' not | atom
+        """
+        if self.peek() == ('keyword', 'NOT'):
+            self.take()
+            return ('not', self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> Node:
+        """
+        atom := '(' or ')' | term
+        """
+        kind, value = self.take()
+        if kind == LEFT_PAREN:
+            node = self.parse_or()
+            if self.take()[0] != RIGHT_PAREN:
+                raise ExpressionError('Unbalanced parentheses')
+            return node
+        if kind == 'term':
+            try:
+                compile_pattern(value)
+            except re.error as err:
+                raise ExpressionError(f'Invalid regex pattern: {value}') from err
+            return ('term', value)
+        raise ExpressionError(f'Expected a term, got {value!r}' if value else 'Expected a term')
+
+
+def _combine(operator: str, nodes: List[Node]) -> Node:
+    """
+    Build an `and`/`or` node, flattening nested nodes of the same operator
+    """
+    if len(nodes) == 1:
+        return nodes[0]
+    flat: List[Node] = []
+    for node in nodes:
+        if node[0] == operator:
+            flat.extend(node[1])
+        else:
+            flat.append(node)
+    return (operator, tuple(flat))
+
+
+def parse_expression(command: str) -> Node:
+    """
+    Parse a filter expression into a tree of nodes
+    """
+    tokens = tokenize(command)
+    if not tokens:
+        raise ExpressionError('Empty expression')
+    return _Parser(tokens).parse()
+
+
+def _compile_node(node: Node) -> Tuple[Callable[[str], bool], int]:
+    """
+    Compile a node to a test function and its estimated cost
+    """
+    kind = node[0]
+    if kind == 'term':
+        pattern = node[1]
+        if is_literal(pattern):
+            return (lambda string: pattern in string), 1
+        search = compile_pattern(pattern).search
+        # Unbounded wildcards tend to backtrack the most
+        cost = 3 if '.*' in pattern or '.+' in pattern else 2
+        return (lambda string: search(string) is not None), cost
+    if kind == 'not':
+        func, cost = _compile_node(node[1])
+        return (lambda string: not func(string)), cost
+    compiled = sorted((_compile_node(child) for child in node[1]), key=lambda item: item[1])
+    funcs = tuple(func for func, _ in compiled)
+    cost = sum(cost for _, cost in compiled)
+    if kind == 'and':
+        def test_all(string: str) -> bool:
+            for func in funcs:
+                if not func(string):
+                    return False
+            return True
+        return test_all, cost
+
+    def test_any(string: str) -> bool:
+        for func in funcs:
+            if func(string):
+                return True
+        return False
+    return test_any, cost
+
+
+def expression_test_generator(command: str) -> Optional[Callable]:
+    """
+    Return a function that will test a string against the expression `command`
+    Ignores characters in ANSI color escape codes
+    """
+    try:
+        node = parse_expression(command)
+    except ExpressionError:
+        return None
+    test, _ = _compile_node(node)
+    strip = ANSI_COLOR_REGEX.sub
+
+    def test_expression(string: str) -> bool:
+        if '\x1b' in string or '\x9b' in string:
+            string = strip('', string)
+        return test(string)
+    return test_expression
+
+
+def filter_test_generator(command: str) -> Optional[Callable]:
+    """
+    Return a function that will test a string against a `/` command, either an expression or a regex
+    """
+    if is_expression(command):
+        return expression_test_generator(command)
+    return regex_test_generator(command)
+
+
+def span_test_generator(command: str) -> Optional[Callable[[str], Optional[List[int]]]]:
+    """
+    Return a function that tests a string against a `/` command like `filter_test_generator`,
+    returning None if it does not match, or the flattened spans of the text to highlight
+    on the string without ANSI color codes if it does
+    """
+    func_handle = filter_test_generator(command)
+    if func_handle is None:
+        return None
+    pattern = highlight_pattern(command)
+    find_spans: Callable[[str], List[int]] = lambda string: []
+    if pattern:
+        try:
+            find_spans = span_generator(pattern)
+        except re.error:
+            pass  # Terms that compile alone can clash when joined, like two groups with the same name
+    strip = ANSI_COLOR_REGEX.sub
+
+    def test_spans(string: str) -> Optional[List[int]]:
+        if not func_handle(string):
+            return None
+        if '\x1b' in string or '\x9b' in string:
+            string = strip('', string)
+        return find_spans(string)
+    return test_spans
+
+
+def positive_terms(node: Node) -> List[str]:
+    """
+    Get the terms of an expression that a matching message may contain
+    """
+    if node[0] == 'term':
+        return [node[1]]
+    if node[0] == 'not':
+        return []
+    return [term for child in node[1] for term in positive_terms(child)]
+
+
+def _node_literals(node: Node) -> List[str]:
+    """
+    Get literals every message matching `node` contains
+    """
+    if node[0] == 'term':
+        return required_literals(node[1])
+    if node[0] == 'and':
+        return [literal for child in node[1] for literal in _node_literals(child)]
+    # Either side of an `OR` may match, and `NOT` requires an absence
+    return []
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def filter_required_literals(command: str) -> Tuple[str, ...]:
+    """
+    Get literals every message matching a `/` command contains, for narrowing with the trigram index
+    """
+    if not is_expression(command):
+        return tuple(required_literals(command))
+    try:
+        return tuple(_node_literals(parse_expression(command)))
+    except ExpressionError:
+        return ()
+
+
+def highlight_pattern(command: str) -> str:
+    """
+    Get a single regex that highlights what a `/` command matched, or an empty string to highlight nothing
+
+    Inline flags on a term are scoped to that term; terms that cannot share a regex are not highlighted
+    """
+    if not is_expression(command):
+        return command
+    try:
+        terms = positive_terms(parse_expression(command))
+    except ExpressionError:
+        return ''
+    branches = [scoped_pattern(term) for term in terms]
+    if None in branches:
+        return ''
+    return '|'.join(f'(?:{branch})' for branch in branches)
+
+
+def is_filter_refinement(old: str, new: str) -> bool:
+    """
+    Determine if every string the `/` command `new` matches must also match `old`
+
+    In addition to the regex refinements from `is_refinement`, an expression that
+    adds `AND` clauses to the previous filter is a refinement
+    """
+    if not old or not new:
+        return False
+    if not is_expression(old) and not is_expression(new):
+        return is_refinement(old, new)
+    try:
+        old_node = parse_expression(old)
+        new_node = parse_expression(new)
+    except ExpressionError:
+        return False
+    if old_node == new_node:
+        return True
+    if new_node[0] != 'and':
+        return False
+    old_clauses = old_node[1] if old_node[0] == 'and' else (old_node,)
+    return all(clause in new_node[1] for clause in old_clauses)
@@ -0,0 +1,233 @@
+"""
+User defined rules that color the text matching a pattern when it is rendered
+
+Every rule is one branch of a single alternation with a named group around it,
+so a message is searched once and `lastgroup` tells which rule colored each match.
+The colored ranges of each message are kept for recently rendered lines, so
+scrolling back over them does not search them again. Ranges are rendered as
+segments by the color handler instead of being written into the message as
+escape codes
+"""
+
+
+import curses
+import json
+import os
+import re
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+from logria.utilities.constants import (HIGHLIGHT_CACHE_SIZE,
+                                        SAVED_HIGHLIGHTS_PATH)
+from logria.utilities.memory import DICT_ENTRY_SIZE, INT_SIZE
+from logria.utilities.regex_generator import ANSI_COLOR_REGEX
+from logria.utilities.watchlist import validate_pattern
+
+# A (foreground, background) pair of curses colors
+Color = Tuple[int, int]
+# Start, end, and color of a run of text
+Range = Tuple[int, int, Color]
+
+DEFAULT_COLOR = -1
+COLOR_NAMES = {
+    'default': DEFAULT_COLOR,
+    'black': curses.COLOR_BLACK,
+    'red': curses.COLOR_RED,
+    'green': curses.COLOR_GREEN,
+    'yellow': curses.COLOR_YELLOW,
+    'blue': curses.COLOR_BLUE,
+    'magenta': curses.COLOR_MAGENTA,
+    'cyan': curses.COLOR_CYAN,
+    'white': curses.COLOR_WHITE,
+}
+# The color of text matching the `/` filter, like the escape codes from `highlight_spans`
+MATCH_COLOR: Color = (curses.COLOR_MAGENTA, DEFAULT_COLOR)
+# Bytes held by each cached range
+RANGE_SIZE = sys.getsizeof((0, 0, MATCH_COLOR)) + 2 * INT_SIZE
+
+
+def parse_color(spec: str) -> Optional[Color]:
+    """
+    Parse a color like `red`, or a foreground and background like `black/yellow`
+    """
+    names = spec.lower().split('/')
+    if len(names) > 2 or any(name not in COLOR_NAMES for name in names):
+        return None
+    foreground = COLOR_NAMES[names[0]]
+    background = COLOR_NAMES[names[1]] if len(names) == 2 else DEFAULT_COLOR
+    return foreground, background
+
+
+class HighlightRule():
+    """
+    A named pattern and the color to draw its matches in
+    """
+
+    def __init__(self, name: str, pattern: str, color: str, branch: str):
+        self.name: str = name
+        self.pattern: str = pattern
+        self.branch: str = branch  # The pattern as a branch of the alternation
+        self.color: str = color  # As the user wrote it, so it is saved the same way
+        self.pair: Color = parse_color(color) or (DEFAULT_COLOR, DEFAULT_COLOR)
+
+    def __str__(self):
+        return f'{self.name} /{self.pattern}/ {self.color}'
+
+
+class HighlightRules():
+    """
+    Highlight rules and the colored ranges of recently rendered messages
+    """
+
+    def __init__(self, path: str = SAVED_HIGHLIGHTS_PATH, cache_size: int = HIGHLIGHT_CACHE_SIZE):
+        self.path: Path = Path(path)  # JSON file the rules are saved to
+        self.rules: 'OrderedDict[str, HighlightRule]' = OrderedDict()
+        self.combined: Optional[Pattern] = None  # Alternation of every rule
+        self.group_colors: Dict[str, Color] = {}  # Group in `combined` to its color
+        self.cache_size: int = cache_size
+        self.cache: 'OrderedDict[int, Tuple[Range, ...]]' = OrderedDict()  # Message index to its ranges
+        self.buffer: Optional[Sequence[str]] = None  # The buffer `cache` indexes into
+
+    def add(self, name: str, pattern: str, color: str) -> None:
+        """
+        Color text matching `pattern`, replacing any rule with the same name
+
+        Raises ValueError for an invalid regex or color, or a regex that cannot share the alternation
+        """
+        if parse_color(color) is None:
+            raise ValueError(f'Unknown color: {color}, use {"/".join(COLOR_NAMES)}')
+        _, branch = validate_pattern(pattern)
+        if branch is None:
+            raise ValueError(f'Pattern /{pattern}/ cannot refer to groups or set global flags')
+        self.rules.pop(name, None)
+        self.rules[name] = HighlightRule(name, pattern, color, branch)
+        self._compile()
+
+    def remove(self, name: str) -> bool:
+        """
+        Stop coloring the rule called `name`; returns False if there is none
+        """
+        if self.rules.pop(name, None) is None:
+            return False
+        self._compile()
+        return True
+
+    def _compile(self) -> None:
+        """
+        Rebuild the combined alternation; rules listed first win where matches start together
+        """
+        branches = []
+        self.group_colors = {}
+        for position, rule in enumerate(self.rules.values()):
+            group = f'h{position}'
+            self.group_colors[group] = rule.pair
+            branches.append(f'(?P<{group}>{rule.branch})')
+        self.combined = re.compile('|'.join(branches)) if branches else None
+        self.cache.clear()
+
+    def ranges(self, messages: Sequence[str], index: int) -> Tuple[Range, ...]:
+        """
+        Get the colored ranges of the message at `index`, found on the message without color codes
+        """
+        if messages is not self.buffer:
+            self.cache.clear()
+            self.buffer = messages
+        cached = self.cache.get(index)
+        if cached is not None:
+            self.cache.move_to_end(index)
+            return cached
+        found: Tuple[Range, ...] = ()
+        if self.combined is not None:
+            message = messages[index]
+            if '\x1b' in message or '\x9b' in message:
+                message = ANSI_COLOR_REGEX.sub('', message)
+            colors = self.group_colors
+            found = tuple((match.start(), match.end(), colors[str(match.lastgroup)])
+                          for match in self.combined.finditer(message) if match.end() > match.start())
+        self.cache[index] = found
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return found
+
+    def load(self) -> None:
+        """
+        Add the rules saved in `path`, if it exists
+
+        Raises ValueError if the file or a rule in it is invalid
+        """
+        if not self.path.exists():
+            return
+        with open(self.path, 'r') as rules_file:
+            saved = json.load(rules_file)
+        try:
+            for name, rule in saved.items():
+                self.add(str(name), str(rule['pattern']), str(rule['color']))
+        except (AttributeError, KeyError, TypeError) as err:
+            raise ValueError(f'Invalid highlight rules in {self.path}') from err
+
+    def save(self) -> None:
+        """
+        Write the rules to `path`, creating its folder if needed
+        """
+        if not self.path.parent.exists():
+            os.makedirs(self.path.parent)
+        out_d = {rule.name: {'pattern': rule.pattern, 'color': rule.color} for rule in self.rules.values()}
+        with open(self.path, 'w') as rules_file:
+            rules_file.write(json.dumps(out_d, indent=4))
+
+    def size_bytes(self) -> int:
+        """
+        Approximate bytes held by the cached ranges
+        """
+        ranges = sum(len(found) for found in self.cache.values())
+        return len(self.cache) * (DICT_ENTRY_SIZE + INT_SIZE) + ranges * RANGE_SIZE
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __repr__(self):
+        return f'<Highlight Rules: {", ".join(self.rules)}>'
+
+
+def overlay(ranges: Sequence[Range], spans: Sequence[Tuple[int, int]], color: Color = MATCH_COLOR) -> List[Range]:
+    """
+    Draw the (start, end) `spans` in `color` over the ranges, trimming the ranges they cover
+    """
+    top = [(start, end, color) for start, end in spans]
+    merged: List[Range] = []
+    position = 0  # The first span that could overlap the current range
+    for start, end, range_color in ranges:
+        while position < len(top) and top[position][1] <= start:
+            position += 1
+        cursor = start
+        for span_start, span_end, _ in top[position:]:
+            if span_start >= end:
+                break
+            if span_start > cursor:
+                merged.append((cursor, span_start, range_color))
+            cursor = max(cursor, span_end)
+        if cursor < end:
+            merged.append((cursor, end, range_color))
+    merged.extend(top)
+    merged.sort(key=lambda item: item[0])
+    return merged
+
+
+def to_segments(text: str, ranges: Sequence[Range]) -> List[Tuple[str, Color]]:
+    """
+    Split text into (text, color) segments from sorted, non-overlapping ranges
+    """
+    segments: List[Tuple[str, Color]] = []
+    default = (DEFAULT_COLOR, DEFAULT_COLOR)
+    last_end = 0
+    for start, end, color in ranges:
+        if start > last_end:
+            segments.append((text[last_end:start], default))
+        if end > start:
+            segments.append((text[start:end], color))
+        last_end = max(last_end, end)
+    if last_end < len(text):
+        segments.append((text[last_end:], default))
+    return [(piece, color) for piece, color in segments if piece]
@@ -3,19 +3,28 @@ Utilities to handle input validation
 """
 
 
+from functools import partial
 from typing import Callable, Dict
 
-from logria.commands import command, edit, parser, regex, scroll, window
+from logria.commands import (command, edit, facets, parser, regex, scroll,
+                             window)
 
 STROKES: Dict[str, Callable] = {
     '/': regex.handle_regex,
     'h': regex.toggle_highlight,
+    'f': regex.toggle_show_all,
+    'n': scroll.next_match,
+    'e': facets.toggle_errors,
+    'N': scroll.previous_match,
     ':': command.handle_command,
     'i': edit.toggle_insert_mode,
     's': window.swap_input,
     'p': parser.enable_parser,
     'a': parser.enable_analytics,
     'z': parser.teardown_parser,
+    'w': scroll.toggle_wrap,
+    '>': scroll.scroll_right,
+    '<': scroll.scroll_left,
     'KEY_RESIZE': window.resize,
     'KEY_UP': scroll.up,
     'KEY_DOWN': scroll.down,
@@ -23,6 +32,10 @@ STROKES: Dict[str, Callable] = {
     'KEY_NPAGE': scroll.pgdn,
     'KEY_RIGHT': scroll.bottom,
     'KEY_LEFT': scroll.top,
+    'KEY_SRIGHT': scroll.scroll_right,
+    'KEY_SLEFT': scroll.scroll_left,
+    # Show only the stream with this number
+    **{str(source): partial(facets.toggle_source, source=source) for source in range(10)},
 }
 
 
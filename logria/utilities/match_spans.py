@@ -0,0 +1,54 @@
+"""
+Compact storage for the highlighted spans of each matched message
+
+Spans are found once when a message is filtered, so rendering does not need to run
+the regex again. They are stored in a single flat array as
+    [span count, start, end, start, end, ...]
+per message, with a dict from message index to the offset of its record
+"""
+
+
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from logria.utilities.memory import DICT_ENTRY_SIZE, INT_SIZE
+
+
+class MatchSpans():
+    """
+    Flattened (start, end) spans of the text to highlight in each matched message
+    """
+
+    def __init__(self):
+        self.data: array = array('I')
+        self.offsets: Dict[int, int] = {}  # Message index to the offset of its record in `data`
+
+    def add(self, index: int, spans: Sequence[int]) -> None:
+        """
+        Record the flattened spans for the message at `index`
+        """
+        self.offsets[index] = len(self.data)
+        self.data.append(len(spans) // 2)
+        self.data.extend(spans)
+
+    def get(self, index: int) -> Optional[List[Tuple[int, int]]]:
+        """
+        Get the (start, end) spans for the message at `index`, or None if none were recorded
+        """
+        offset = self.offsets.get(index)
+        if offset is None:
+            return None
+        flat = self.data[offset + 1:offset + 1 + 2 * self.data[offset]]
+        return list(zip(flat[::2], flat[1::2]))
+
+    def size_bytes(self) -> int:
+        """
+        Approximate memory held by the spans
+        """
+        return self.data.itemsize * len(self.data) + len(self.offsets) * (DICT_ENTRY_SIZE + 2 * INT_SIZE)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, index: int):
+        return index in self.offsets
@@ -0,0 +1,86 @@
+"""
+Approximate memory accounting for Logria's buffers
+
+Sizes are tracked as items are added so that reporting is O(1) instead of
+walking every buffer with `sys.getsizeof`
+"""
+
+
+import struct
+import sys
+from typing import Dict
+
+# Size of a reference stored in a list or dict slot
+POINTER_SIZE: int = struct.calcsize('P')
+# Size of an int large enough to not be interned by CPython
+INT_SIZE: int = sys.getsizeof(2 ** 16)
+# Approximate cost of one hash table slot: hash, key pointer, value pointer
+DICT_ENTRY_SIZE: int = 3 * POINTER_SIZE
+
+
+def item_size(item: object) -> int:
+    """
+    Approximate bytes held by an item stored in a container, including the slot that points to it
+    """
+    return sys.getsizeof(item) + POINTER_SIZE
+
+
+def int_list_size(length: int) -> int:
+    """
+    Approximate bytes held by a list of `length` distinct integers
+    """
+    return length * (INT_SIZE + POINTER_SIZE)
+
+
+def human_readable(num_bytes: int) -> str:
+    """
+    Format a number of bytes using binary units
+    """
+    size = float(num_bytes)
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            return f'{size:,.1f} {unit}' if unit != 'B' else f'{int(size):,} {unit}'
+        size /= 1024
+    return f'{size:,.1f} TiB'
+
+
+class MemoryTracker():
+    """
+    Keeps running byte totals for named buffers
+    """
+
+    def __init__(self):
+        self._sizes: Dict[str, int] = {}
+
+    def add(self, name: str, item: object) -> None:
+        """
+        Account for `item` being appended to the buffer called `name`
+        """
+        self._sizes[name] = self._sizes.get(name, 0) + item_size(item)
+
+    def add_bytes(self, name: str, num_bytes: int) -> None:
+        """
+        Account for an arbitrary number of bytes in the buffer called `name`
+        """
+        self._sizes[name] = self._sizes.get(name, 0) + num_bytes
+
+    def reset(self, name: str) -> None:
+        """
+        Forget the size of a buffer, used when the buffer is replaced or cleared
+        """
+        self._sizes[name] = 0
+
+    def get(self, name: str) -> int:
+        """
+        Get the current size of a buffer in bytes
+        """
+        return self._sizes.get(name, 0)
+
+    def total(self) -> int:
+        """
+        Get the size of all tracked buffers in bytes
+        """
+        return sum(self._sizes.values())
+
+    def __repr__(self):
+        return f'<Memory Tracker holding {human_readable(self.total())} across {len(self._sizes)} buffers>'
@@ -3,28 +3,369 @@ Contains utilities and constants that control how the app handles regex
 """
 
 import re
-from typing import Callable, Optional
+from functools import lru_cache
+from string import hexdigits, octdigits
+from typing import Callable, List, Optional, Pattern, Sequence, Tuple
 
-from logria.utilities.constants import ANSI_COLOR_PATTERN
+from logria.utilities.aho_corasick import AhoCorasick
+from logria.utilities.constants import (AHO_CORASICK_MIN_LITERALS,
+                                        ANSI_COLOR_PATTERN, PATTERN_CACHE_SIZE)
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(pattern: str, flags: int = 0) -> Pattern:
+    """
+    Compile a pattern, sharing the result with every other caller using the same pattern and flags
+
+    Raises re.error if the pattern is invalid; failures are not cached
+    """
+    return re.compile(pattern, flags)
+
+
+# Characters that give a pattern meaning beyond its literal text
+REGEX_METACHARACTERS = frozenset('.^$*+?{}[]\\|()')
+# Inline flags that apply to the whole pattern, like `(?i)`
+INLINE_FLAGS_REGEX: Pattern = re.compile(r'\(\?[aiLmsux]+\)')
+# Escapes followed by this many hex digits, like `\x41`
+HEX_ESCAPE_LENGTHS = {'x': 2, 'u': 4, 'U': 8}
+
+# Compiled once so hot paths can hold a direct reference to its methods
+ANSI_COLOR_REGEX: Pattern = compile_pattern(ANSI_COLOR_PATTERN)
+
+
+def strip_ansi(string: str) -> str:
+    """
+    Remove ANSI escape sequences from a string
+    """
+    return ANSI_COLOR_REGEX.sub('', string)
+
+
+def is_literal(pattern: str) -> bool:
+    """
+    Determine if a pattern only matches its own text
+    """
+    return not REGEX_METACHARACTERS.intersection(pattern)
+
+
+def literal_alternatives(pattern: str) -> Optional[List[str]]:
+    """
+    If `pattern` is a literal or an alternation of literals like `id1|id2|id3`,
+    get the list of literals
+    """
+    if is_literal(pattern):
+        return [pattern] if pattern else None
+    parts = pattern.split('|')
+    if all(part and is_literal(part) for part in parts):
+        return parts
+    return None
 
 
 def regex_test_generator(pattern: str) -> Optional[Callable]:
     """
     Return a function that will test a string against `pattern`
     Ignores characters in ANSI color escape codes
+
+    Patterns without regex syntax skip the regex engine: a single literal uses `in`
+    and large sets of literals use an Aho-Corasick automaton
     """
-    try:
-        re.compile(pattern)
-    except re.error:
-        return None
-    return lambda string: bool(re.search(pattern,
-                                         re.sub(ANSI_COLOR_PATTERN,
-                                                '',
-                                                string)))
+    # Bind the methods here so each call skips the `re` module cache lookup
+    strip = ANSI_COLOR_REGEX.sub
+    literals = literal_alternatives(pattern)
+    if literals and len(literals) == 1:
+        needle = literals[0]
+
+        def test_literal(string: str) -> bool:
+            if '\x1b' in string or '\x9b' in string:
+                string = strip('', string)
+            return needle in string
+        return test_literal
+    # A match object or a bool, either of which is truthy when the string matches
+    search: Callable[[str], object]
+    if literals and len(literals) >= AHO_CORASICK_MIN_LITERALS:
+        search = AhoCorasick(literals).search
+    else:
+        try:
+            search = compile_pattern(pattern).search
+        except re.error:
+            return None
+
+    def test(string: str) -> bool:
+        if '\x1b' in string or '\x9b' in string:
+            string = strip('', string)
+        return bool(search(string))
+    return test
+
+
+def span_generator(pattern: str) -> Callable[[str], List[int]]:
+    """
+    Return a function that gets the flattened (start, end) spans of every non-empty,
+    non-overlapping match of `pattern` in a string that has no ANSI color codes
+    """
+    literals = literal_alternatives(pattern)
+    if literals and len(literals) == 1:
+        needle = literals[0]
+        width = len(needle)
+
+        def find_literal(string: str) -> List[int]:
+            spans: List[int] = []
+            position = string.find(needle)
+            while position >= 0:
+                spans += (position, position + width)
+                position = string.find(needle, position + width)
+            return spans
+        return find_literal
+    if literals and len(literals) >= AHO_CORASICK_MIN_LITERALS:
+        find_all = AhoCorasick(literals).find_all
+
+        def find_literals(string: str) -> List[int]:
+            spans: List[int] = []
+            last_end = 0
+            for start, end in find_all(string):
+                if start >= last_end:
+                    spans += (start, end)
+                    last_end = end
+            return spans
+        return find_literals
+    finditer = compile_pattern(pattern).finditer
+
+    def find_matches(string: str) -> List[int]:
+        spans: List[int] = []
+        for match in finditer(string):
+            if match.end() > match.start():
+                spans += match.span()
+        return spans
+    return find_matches
+
+
+def highlight_spans(string: str, spans: Sequence[Tuple[int, int]]) -> str:
+    """
+    Wrap each (start, end) span of a string without ANSI color codes in the highlight color
+    """
+    pieces = []
+    last_end = 0
+    for start, end in spans:
+        pieces.append(string[last_end:start])
+        pieces.append(f'\u001b[35m{string[start:end]}\u001b[0m')
+        last_end = end
+    pieces.append(string[last_end:])
+    return ''.join(pieces)
 
 
 def get_real_length(item: str) -> int:
     """
     Get the real length of a string without escape codes
     """
-    return len(re.sub(ANSI_COLOR_PATTERN, '', item))
+    if '\x1b' in item or '\x9b' in item:
+        return len(ANSI_COLOR_REGEX.sub('', item))
+    return len(item)
+
+
+def _clean_boundaries(pattern: str) -> List[bool]:
+    """
+    For each position 0..len(pattern), determine if the pattern can be split there
+    without breaking an escape, character class, group, or repetition count
+    """
+    clean = [True]
+    depth = 0
+    class_start = -1  # Index of the `[` that opened the current character class
+    in_braces = False
+    escaped = False
+    for index, char in enumerate(pattern):
+        in_class = class_start >= 0
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            # A `]` directly after `[` or `[^` is a literal
+            if char == ']' and pattern[class_start + 1:index] not in ('', '^'):
+                class_start = -1
+        elif char == '[':
+            class_start = index
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '{':
+            in_braces = True
+        elif char == '}':
+            in_braces = False
+        clean.append(not escaped and class_start < 0 and not in_braces and depth == 0)
+    return clean
+
+
+def has_top_level_alternation(pattern: str) -> bool:
+    """
+    Determine if a pattern has a `|` outside of any group or character class
+    """
+    clean = _clean_boundaries(pattern)
+    return any(char == '|' and clean[index] for index, char in enumerate(pattern))
+
+
+def is_refinement(old: str, new: str) -> bool:
+    """
+    Determine if every string `new` matches must also match `old`
+
+    This is conservative: False means we could not prove it, not that it is untrue
+    Provable cases are:
+        - The patterns are the same
+        - `new` is `old` with more pattern appended or prepended at the top level,
+          neither has a top level alternation, and `new` sets no inline flags `old` does not
+    """
+    if not old or not new:
+        return False
+    if old == new:
+        return True
+    try:
+        compile_pattern(old)
+        compile_pattern(new)
+    except re.error:
+        return False
+    # Flags like `(?i)` or `(?x)` apply to the whole pattern, so they can widen what `old` matched
+    if has_top_level_alternation(old) or has_top_level_alternation(new) or \
+            INLINE_FLAGS_REGEX.findall(old) != INLINE_FLAGS_REGEX.findall(new):
+        return False
+    clean = _clean_boundaries(new)
+    if new.startswith(old):
+        # `old` followed by more pattern; a quantifier would change the meaning of `old`
+        return clean[len(old)] and new[len(old)] not in '*+?{}'
+    # Prepending groups would renumber backreferences and conditional references in `old`
+    return new.endswith(old) and not re.search(r'\\\d|\(\?P=|\(\?\(', old) and old[0] not in '*+?{}' \
+        and clean[len(new) - len(old)]
+
+
+def _skip_group(pattern: str, index: int) -> int:
+    """
+    Get the index after the group or character class that opens at `index`
+    """
+    clean = _clean_boundaries(pattern[index:])
+    for offset in range(1, len(clean)):
+        if clean[offset]:
+            return index + offset
+    return len(pattern)
+
+
+def _escape_length(pattern: str, index: int) -> int:
+    """
+    Get the length of the escape starting with the backslash at `index`, including
+    the payload of escapes like `\\x41`, `\\u0041`, `\\101`, `\\12`, and `\\N{DIGIT ONE}`
+    """
+    escaped = pattern[index + 1:index + 2]
+    end = index + 2
+    if escaped in HEX_ESCAPE_LENGTHS:
+        limit = min(end + HEX_ESCAPE_LENGTHS[escaped], len(pattern))
+        while end < limit and pattern[end] in hexdigits:
+            end += 1
+    elif escaped == 'N' and pattern[end:end + 1] == '{':
+        closing = pattern.find('}', end)
+        end = closing + 1 if closing >= 0 else len(pattern)
+    elif escaped == '0':
+        # Octal: `\\0` and up to two more octal digits
+        limit = min(end + 2, len(pattern))
+        while end < limit and pattern[end] in octdigits:
+            end += 1
+    elif escaped.isdigit():
+        following = pattern[end:end + 2]
+        if len(following) == 2 and all(digit in octdigits for digit in escaped + following):
+            end += 2  # Three octal digits, like `\\101`
+        elif following[:1].isdigit():
+            end += 1  # A reference to a group numbered 10 or more
+    return end - index
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Get runs of at least 3 literal characters that every match of `pattern` contains
+
+    This is conservative: anything that is optional, repeated, grouped, or a class
+    ends the current run, and patterns with top level alternation or inline flags
+    have no required literals
+    """
+    if has_top_level_alternation(pattern) or re.search(r'\(\?[aiLmsux-]', pattern):
+        return []
+    runs: List[str] = []
+    run: List[str] = []
+
+    def end_run():
+        if len(run) >= 3:
+            runs.append(''.join(run))
+        run.clear()
+
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        literal: Optional[str] = None
+        if char == '\\':
+            escaped = pattern[index + 1:index + 2]
+            # `\.` is a literal, `\d`, `\b`, `\1` and friends are not
+            if escaped and not escaped.isalnum():
+                literal = escaped
+            index += _escape_length(pattern, index)
+        elif char in '([':
+            index = _skip_group(pattern, index)
+        elif char in REGEX_METACHARACTERS:
+            index += 1
+        else:
+            literal = char
+            index += 1
+
+        quantifier = pattern[index:index + 1]
+        if quantifier and quantifier in '*?{':
+            # The atom may not appear at all
+            literal = None
+            if quantifier == '{':
+                closing = pattern.find('}', index)
+                index = closing + 1 if closing >= 0 else index + 1
+            else:
+                index += 1
+        elif quantifier == '+':
+            index += 1
+            if literal is not None:
+                # At least one copy ends the run, and the last copy starts the next one
+                run.append(literal)
+                end_run()
+                run.append(literal)
+                literal = None
+                if pattern[index:index + 1] in ('?', '+'):
+                    index += 1  # Lazy or possessive modifier
+                continue
+        if pattern[index:index + 1] in ('?', '+') and quantifier and quantifier in '*?{+':
+            index += 1  # Lazy or possessive modifier
+
+        if literal is None:
+            end_run()
+        else:
+            run.append(literal)
+    end_run()
+    return runs
+
+
+def has_nested_quantifier(pattern: str) -> bool:
+    """
+    Determine if a group containing a repetition is itself repeated, like `(a+)+` or `(\\w+\\s*)*`
+
+    These patterns can backtrack exponentially on messages that almost match
+    """
+    groups: List[bool] = []  # For each open group, whether it contains a repetition
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == '[':
+            index = _skip_group(pattern, index)
+            continue
+        if char == '(':
+            groups.append(False)
+        elif char == ')' and groups:
+            repeats_inside = groups.pop()
+            repeated = pattern[index + 1:index + 2] in ('*', '+', '{')
+            if repeats_inside and repeated:
+                return True
+            if groups and (repeats_inside or repeated):
+                groups[-1] = True
+        elif char in '*+{' and groups:
+            groups[-1] = True
+        index += 1
+    return False
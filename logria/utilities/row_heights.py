@@ -0,0 +1,118 @@
+"""
+Number of screen rows each message takes when wrapped to the window width
+
+Heights are computed once per message and width, the first time they are needed,
+and kept in a compact array. A Fenwick tree over the heights of the first messages
+finds the rows taken by a run of messages, or the message at a given row, in
+O(log n) steps. When the width changes every height is recomputed lazily. When
+lines do not wrap, every message takes one row and nothing is measured
+"""
+
+
+from array import array
+from math import ceil
+from typing import Sequence
+
+from logria.utilities.regex_generator import get_real_length
+
+UNKNOWN = 0xFFFFFFFF  # Height of a message that was not measured yet
+NO_WRAP = 0  # Width at which messages do not wrap, so each takes one row
+
+
+class RowHeights():
+    """
+    Cached wrapped heights of the messages in one buffer
+    """
+
+    def __init__(self):
+        self.buffer: Sequence[str] = ()  # The buffer the heights were measured in
+        self.width: int = 0  # The width the heights were measured at
+        self.heights: array = array('I')  # Rows for each message, or UNKNOWN
+        self.tree: array = array('Q')  # Fenwick tree over the heights of the first `len(tree)` messages
+        self.total: int = 0  # Rows taken by the messages in the tree
+
+    def sync(self, messages: Sequence[str], width: int) -> None:
+        """
+        Measure heights in `messages` at `width`, dropping heights measured in another buffer or width
+        """
+        if messages is self.buffer and width == self.width:
+            return
+        self.buffer = messages
+        self.width = width
+        self.heights = array('I')
+        self.tree = array('Q')
+        self.total = 0
+
+    def height(self, index: int) -> int:
+        """
+        Get the rows the message at `index` takes
+        """
+        heights = self.heights
+        if index >= len(heights):
+            heights.extend(array('I', [UNKNOWN]) * (index + 1 - len(heights)))
+        rows = heights[index]
+        if rows == UNKNOWN:
+            if self.width == NO_WRAP:
+                rows = heights[index] = 1
+            else:
+                rows = heights[index] = ceil(get_real_length(self.buffer[index]) / self.width)
+        return rows
+
+    def _grow(self) -> None:
+        """
+        Add the next message to the tree
+        """
+        tree = self.tree
+        node = len(tree) + 1  # Tree nodes are numbered from 1
+        rows = self.height(node - 1)
+        self.total += rows
+        # Node `node` holds the sum of the `node & -node` heights ending at its message
+        child = node - 1
+        lowest = node - (node & -node)
+        while child > lowest:
+            rows += tree[child - 1]
+            child -= child & -child
+        tree.append(rows)
+
+    def prefix(self, count: int) -> int:
+        """
+        Get the rows taken by the first `count` messages
+        """
+        count = min(count, len(self.buffer))
+        while len(self.tree) < count:
+            self._grow()
+        tree = self.tree
+        rows = 0
+        while count > 0:
+            rows += tree[count - 1]
+            count -= count & -count
+        return rows
+
+    def find(self, rows: int) -> int:
+        """
+        Get the number of leading messages that fit in `rows` rows
+
+        This is also the index of the message that contains row `rows`, counting from 0
+        """
+        # Only measure as far as the answer
+        while self.total <= rows and len(self.tree) < len(self.buffer):
+            self._grow()
+        tree = self.tree
+        size = len(tree)
+        position = 0
+        step = 1 << size.bit_length()
+        while step:
+            if position + step <= size and tree[position + step - 1] <= rows:
+                position += step
+                rows -= tree[position - 1]
+            step >>= 1
+        return position
+
+    def size_bytes(self) -> int:
+        """
+        Approximate bytes held by the heights and tree
+        """
+        return self.heights.itemsize * len(self.heights) + self.tree.itemsize * len(self.tree)
+
+    def __repr__(self):
+        return f'<Row Heights for {len(self.heights):,} messages at width {self.width}>'
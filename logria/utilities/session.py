@@ -19,7 +19,7 @@ class SessionHandler():
 
     def __init__(self):
         self._commands: List[List[str]] = []
-        self._type: str = ''  # One of {'command', 'file'}
+        self._type: str = ''  # One of {'command', 'file', 'snapshot'}
         self.folder: Path = self.setup_folder()
 
     def set_params(self, command: List[str], type_: str) -> None:
@@ -109,6 +109,10 @@ class SessionHandler():
             out_l.append('Files:')
             for file in self._commands:
                 out_l.append(f'  {"/".join(file)}')
+        elif self._type == 'snapshot':
+            out_l.append('Snapshots:')
+            for file in self._commands:
+                out_l.append(f'  {"/".join(file)}')
         return out_l
 
     def sessions(self) -> dict:
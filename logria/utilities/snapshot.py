@@ -0,0 +1,187 @@
+"""
+Binary snapshots of Logria's message buffers
+
+A snapshot file is laid out as:
+
+    MAGIC
+    record*           struct RECORD_FORMAT followed by `length` bytes of utf-8 text
+    stdout index      little-endian uint64 offset of each stdout record
+    stderr index      little-endian uint64 offset of each stderr record
+    footer            struct FOOTER_FORMAT
+
+Because the footer has a fixed size and the indexes are plain arrays, a
+snapshot can be opened with `mmap` in constant time and records are only
+decoded when they are read
+"""
+
+
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Iterator, List, Sequence as SequenceType, Tuple, Union
+
+from logria.communication.metadata import MessageMetadata
+
+MAGIC = b'LGRSNAP1'
+# Text length, arrival timestamp, source stream
+RECORD_FORMAT = '<IdH'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+# stdout index offset, stdout count, stderr index offset, stderr count, magic
+FOOTER_FORMAT = '<QQQQ8s'
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+
+
+def is_snapshot(path: str) -> bool:
+    """
+    Determine if the file at `path` is a Logria snapshot
+    """
+    try:
+        with open(path, 'rb') as f_in:
+            return f_in.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def save_snapshot(path: str, buffers: SequenceType[Tuple[SequenceType[str], MessageMetadata]]) -> None:
+    """
+    Write the (messages, metadata) pairs for stdout and stderr to a snapshot file
+    """
+    if len(buffers) != 2:
+        raise ValueError('Snapshots require exactly a stdout and a stderr buffer!')
+    indexes: List[array] = []
+    with open(path, 'wb') as f_out:
+        f_out.write(MAGIC)
+        position = len(MAGIC)
+        for messages, metadata in buffers:
+            offsets = array('Q')
+            for index, message in enumerate(messages):
+                timestamp, source = metadata.get(index) if index < len(metadata) else (0.0, 0)
+                data = message.encode('utf-8', errors='replace')
+                offsets.append(position)
+                f_out.write(struct.pack(RECORD_FORMAT, len(data), timestamp, source))
+                f_out.write(data)
+                position += RECORD_SIZE + len(data)
+            indexes.append(offsets)
+        index_positions = []
+        for offsets in indexes:
+            index_positions.append(position)
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+            f_out.write(offsets.tobytes())
+            position += len(offsets) * offsets.itemsize
+        f_out.write(struct.pack(FOOTER_FORMAT,
+                                index_positions[0], len(indexes[0]),
+                                index_positions[1], len(indexes[1]),
+                                MAGIC))
+
+
+class SnapshotMetadata():
+    """
+    Metadata view over a snapshot buffer, with the same interface as MessageMetadata
+    """
+
+    def __init__(self, snapshot: 'SnapshotBuffer'):
+        self._snapshot = snapshot
+        self.tail = MessageMetadata()  # Metadata for messages appended after opening
+
+    def append(self, timestamp: float, source: int) -> None:
+        """
+        Store the metadata for the next message in the buffer
+        """
+        self.tail.append(timestamp, source)
+
+    @property
+    def sources(self) -> Iterator[int]:
+        """
+        The source stream of each message, in order, like `MessageMetadata.sources`
+        """
+        snapshot = self._snapshot
+        for offset in snapshot.offsets:
+            yield struct.unpack_from(RECORD_FORMAT, snapshot.data, offset)[2]
+        yield from self.tail.sources
+
+    def get(self, index: int) -> Tuple[float, int]:
+        """
+        Get the (timestamp, source) pair for the message at `index`
+        """
+        if index < 0:
+            index += len(self)
+        base = len(self._snapshot.offsets)
+        if index >= base:
+            return self.tail.get(index - base)
+        _, timestamp, source = struct.unpack_from(
+            RECORD_FORMAT, self._snapshot.data, self._snapshot.offsets[index])
+        return timestamp, source
+
+    def size_bytes(self) -> int:
+        """
+        Approximate bytes held in memory, mapped records are not counted
+        """
+        return self.tail.size_bytes()
+
+    def __len__(self) -> int:
+        return len(self._snapshot.offsets) + len(self.tail)
+
+
+class SnapshotBuffer(Sequence):
+    """
+    A message buffer backed by a memory mapped snapshot
+
+    Records are decoded on access; messages appended after opening are kept in memory
+    """
+
+    def __init__(self, data: mmap.mmap, index_offset: int, count: int):
+        self.data = data
+        view = memoryview(data)[index_offset:index_offset + count * 8]
+        if sys.byteorder == 'big':
+            offsets = array('Q', view.tobytes())
+            offsets.byteswap()
+            self.offsets: Union[array, memoryview] = offsets
+        else:
+            self.offsets = view.cast('Q')
+        self.tail: List[str] = []
+        self.metadata = SnapshotMetadata(self)
+
+    def _decode(self, index: int) -> str:
+        offset = self.offsets[index]
+        length = struct.unpack_from('<I', self.data, offset)[0]
+        start = offset + RECORD_SIZE
+        return self.data[start:start + length].decode('utf-8', errors='replace')
+
+    def append(self, message: str) -> None:
+        """
+        Add a message to the end of the buffer
+        """
+        self.tail.append(message)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        base = len(self.offsets)
+        if index >= base:
+            return self.tail[index - base]
+        if index < 0:
+            raise IndexError('snapshot index out of range')
+        return self._decode(index)
+
+    def __len__(self) -> int:
+        return len(self.offsets) + len(self.tail)
+
+
+def open_snapshot(path: str) -> Tuple[SnapshotBuffer, SnapshotBuffer]:
+    """
+    Open a snapshot file, returning the stdout and stderr buffers
+    """
+    with open(path, 'rb') as f_in:
+        data = mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < len(MAGIC) + FOOTER_SIZE or data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'{path} is not a Logria snapshot!')
+    stdout_offset, stdout_count, stderr_offset, stderr_count, magic = struct.unpack_from(
+        FOOTER_FORMAT, data, len(data) - FOOTER_SIZE)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is a truncated Logria snapshot!')
+    return SnapshotBuffer(data, stdout_offset, stdout_count), SnapshotBuffer(data, stderr_offset, stderr_count)
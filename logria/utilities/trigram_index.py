@@ -0,0 +1,143 @@
+"""
+Trigram inverted index over a message buffer
+
+Messages are grouped into fixed size blocks, and each distinct three character
+substring maps to the sorted list of blocks that contain it. A regex that requires
+some literal text can only match messages in blocks that contain every trigram of
+that text, so intersecting those posting lists gives a small set of candidates to
+run the real regex on. Indexing blocks instead of single messages keeps the
+posting lists several times smaller, at the cost of testing a few extra messages
+"""
+
+
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from logria.utilities.constants import (TRIGRAM_INDEX_BLOCK_SIZE,
+                                        TRIGRAM_INDEX_MAX_BYTES)
+from logria.utilities.memory import DICT_ENTRY_SIZE, item_size
+from logria.utilities.regex_generator import ANSI_COLOR_REGEX
+
+# Bytes held by a new posting list before it has any entries
+EMPTY_POSTING_SIZE = sys.getsizeof(array('I'))
+# Bytes for each block number in a posting list
+POSTING_ENTRY_SIZE = array('I').itemsize
+# Stop intersecting once the next posting list is this many times larger than the candidates
+INTERSECTION_RATIO = 64
+
+
+def trigrams(string: str) -> Set[str]:
+    """
+    Get the distinct trigrams in a string
+    """
+    return {a + b + c for a, b, c in zip(string, string[1:], string[2:])}
+
+
+class TrigramIndex():
+    """
+    Incrementally maintained trigram index, capped at `max_bytes`
+
+    Messages are indexed once their block fills, and once the cap is reached the
+    index stops growing; messages after `size` are not covered and must be
+    scanned directly
+    """
+
+    def __init__(self, max_bytes: int = TRIGRAM_INDEX_MAX_BYTES, block_size: int = TRIGRAM_INDEX_BLOCK_SIZE):
+        self.postings: Dict[str, array] = {}  # Trigram to sorted block numbers
+        self.block_size: int = block_size
+        self.pending: List[str] = []  # Messages waiting for their block to fill
+        self.size: int = 0  # Number of messages covered by the index
+        self.size_bytes: int = 0  # Approximate memory held by the index
+        self.max_bytes: int = max_bytes
+        self.full: bool = False  # Whether the cap stopped the index from growing
+
+    def add(self, message: str) -> None:
+        """
+        Index the next message in the buffer
+        """
+        if self.full:
+            return
+        self.pending.append(message)
+        if len(self.pending) == self.block_size:
+            self._add_block()
+
+    def _add_block(self) -> None:
+        """
+        Index the pending messages as the next block
+        """
+        # Trigrams that span two messages only add false candidates, which the filter rejects
+        text = '\n'.join(self.pending)
+        if '\x1b' in text or '\x9b' in text:
+            text = ANSI_COLOR_REGEX.sub('', text)
+        block = self.size // self.block_size
+        postings = self.postings
+        grams = trigrams(text)
+        for trigram in grams:
+            posting = postings.get(trigram)
+            if posting is None:
+                posting = postings[trigram] = array('I')
+                self.size_bytes += item_size(trigram) + DICT_ENTRY_SIZE + EMPTY_POSTING_SIZE
+            posting.append(block)
+        self.size_bytes += POSTING_ENTRY_SIZE * len(grams)
+        self.size += len(self.pending)
+        self.pending = []
+        if self.size_bytes >= self.max_bytes:
+            self.full = True
+
+    def extend(self, messages: Iterable[str]) -> None:
+        """
+        Index messages in order
+        """
+        for message in messages:
+            if self.full:
+                return
+            self.add(message)
+
+    def candidates(self, literals: Sequence[str], start: int = 0) -> Optional[List[int]]:
+        """
+        Get the sorted indexes from `start` up to `size` of messages that may contain every literal
+
+        Returns None if the literals are too short to use the index
+        """
+        needed = set()
+        for literal in literals:
+            needed.update(trigrams(literal))
+        if not needed:
+            return None
+        postings = []
+        for trigram in needed:
+            posting = self.postings.get(trigram)
+            if posting is None:
+                return []  # No indexed message contains this trigram
+            postings.append(posting)
+        postings.sort(key=len)
+        first_block = start // self.block_size
+        first = postings[0]
+        blocks = set(first[bisect_left(first, first_block):])
+        for posting in postings[1:]:
+            if not blocks or len(posting) > INTERSECTION_RATIO * len(blocks):
+                # Verifying the remaining candidates is cheaper than intersecting
+                break
+            blocks.intersection_update(posting[bisect_left(posting, first_block):])
+        block_size = self.block_size
+        return [index
+                for block in sorted(blocks)
+                for index in range(max(block * block_size, start), (block + 1) * block_size)]
+
+    def __repr__(self):
+        return f'<Trigram Index covering {self.size:,} messages with {len(self.postings):,} trigrams>'
+
+
+def split_candidates(index: TrigramIndex, literals: Sequence[str], start: int, end: int) -> Tuple[Optional[List[int]], int]:
+    """
+    Get the candidates in [start, end) the index covers, and the first index it does not cover
+    """
+    covered = min(index.size, end)
+    if start >= covered:
+        return [], start
+    candidates = index.candidates(literals, start)
+    if candidates is None:
+        return None, start
+    return [candidate for candidate in candidates if candidate < covered], covered
@@ -0,0 +1,82 @@
+"""
+Time limits for filter evaluation, so a catastrophically backtracking regex cannot freeze the app
+
+Where `SIGALRM` is available in the main thread, filtering runs under an interval
+timer that interrupts the regex engine mid-match. Elsewhere, filters that look
+dangerous are first probed in a worker process that can be killed
+"""
+
+
+import multiprocessing
+import signal
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from logria.utilities.filter_expression import filter_test_generator
+
+
+class FilterTimeout(Exception):
+    """
+    Raised when filtering takes longer than its time budget
+    """
+
+
+def can_interrupt() -> bool:
+    """
+    Determine if `time_limit` can interrupt work in the current thread
+    """
+    return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+
+def _raise_timeout(signum, frame):  # pylint: disable=unused-argument
+    """
+    Signal handler that interrupts the work under `time_limit`
+    """
+    raise FilterTimeout()
+
+
+@contextmanager
+def time_limit(seconds: float) -> Iterator[None]:
+    """
+    Raise FilterTimeout if the block takes longer than `seconds`
+
+    Does not limit anything if `can_interrupt` is False
+    """
+    if not can_interrupt():
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _probe(command: str, sample: List[str], connection) -> None:
+    """
+    Worker: test each sample message, then report that we finished
+    """
+    func_handle = filter_test_generator(command)
+    if func_handle is not None:
+        for message in sample:
+            func_handle(message)
+    connection.send(True)
+
+
+def probe_filter(command: str, sample: List[str], seconds: float) -> bool:
+    """
+    Test `command` against `sample` in a worker process, killing it after `seconds`
+
+    Returns True if the worker finished in time
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_probe, args=(command, sample, sender), daemon=True)
+    process.start()
+    finished = receiver.poll(seconds)
+    if not finished:
+        process.terminate()
+    process.join()
+    return finished
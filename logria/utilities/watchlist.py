@@ -0,0 +1,159 @@
+"""
+Named patterns tested against every incoming message, with a hit counter for each
+
+The patterns are joined into one alternation with a named group around each, so
+a message that matches nothing is searched once. When a pattern matches, the
+others are searched on their own from where it matched, since a match of one
+pattern can hide an overlapping match of another. Patterns that cannot share an
+alternation, because they refer to their own groups or set flags for the whole
+pattern, are always searched on their own
+"""
+
+
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# Patterns that use groups by number or name would refer to the wrong group once combined
+GROUP_REFERENCE_REGEX = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?<[A-Za-z_]')
+# Flags at the start of a pattern, which can be scoped to its group instead
+LEADING_FLAGS_REGEX = re.compile(r'^\(\?([aiLmsux]+)\)')
+
+
+class WatchedPattern():
+    """
+    A named pattern and its hits
+    """
+
+    def __init__(self, name: str, pattern: str, compiled: Pattern, branch: Optional[str]):
+        self.name: str = name
+        self.pattern: str = pattern
+        self.compiled: Pattern = compiled
+        self.branch: Optional[str] = branch  # The pattern as a branch of the alternation, if it can be one
+        self.hits: int = 0
+        self.last_hit: Optional[Tuple[str, int]] = None  # Buffer and index of the latest matching message
+
+
+def scoped_pattern(pattern: str) -> Optional[str]:
+    """
+    Rewrite a pattern so it can be one branch of an alternation, or None if it cannot
+    """
+    if GROUP_REFERENCE_REGEX.search(pattern):
+        return None
+    flags = LEADING_FLAGS_REGEX.match(pattern)
+    if flags is None:
+        return pattern
+    if set(flags.group(1)) - set('imsx'):
+        return None  # Only some flags can be scoped to a group
+    # In verbose patterns a trailing comment would hide the closing paren without a newline
+    end = '\n' if 'x' in flags.group(1) else ''
+    return f'(?{flags.group(1)}:{pattern[flags.end():]}{end})'
+
+
+def validate_pattern(pattern: str) -> Tuple[Pattern, Optional[str]]:
+    """
+    Compile a pattern, and get it as a branch of an alternation or None if it cannot be one
+
+    Raises ValueError for an invalid regex, or one that matches an empty string
+    """
+    try:
+        compiled = re.compile(pattern)
+    except re.error as err:
+        raise ValueError(f'Invalid regex pattern: {pattern}') from err
+    if compiled.search(''):
+        raise ValueError(f'Pattern /{pattern}/ matches an empty string')
+    branch = scoped_pattern(pattern)
+    if branch is not None:
+        try:
+            re.compile(branch)
+        except re.error:
+            branch = None
+    return compiled, branch
+
+
+class Watchlist():
+    """
+    Named patterns and their hit counters
+    """
+
+    def __init__(self):
+        self.patterns: 'OrderedDict[str, WatchedPattern]' = OrderedDict()
+        self.combined: Optional[Pattern] = None  # Alternation of every pattern that can share one
+        self.group_names: Dict[str, WatchedPattern] = {}  # Group in `combined` to its pattern
+        self.separate: List[Tuple[Pattern, WatchedPattern]] = []  # Patterns searched on their own
+
+    def add(self, name: str, pattern: str) -> None:
+        """
+        Watch for `pattern`, replacing any pattern with the same name
+
+        Raises ValueError for an invalid regex, or one that matches an empty string
+        """
+        compiled, branch = validate_pattern(pattern)
+        previous = self.patterns.pop(name, None)
+        watched = WatchedPattern(name, pattern, compiled, branch)
+        if previous is not None and previous.pattern == pattern:
+            watched = previous
+        self.patterns[name] = watched
+        self._compile()
+
+    def remove(self, name: str) -> bool:
+        """
+        Stop watching the pattern called `name`; returns False if there is none
+        """
+        if self.patterns.pop(name, None) is None:
+            return False
+        self._compile()
+        return True
+
+    def _compile(self) -> None:
+        """
+        Rebuild the combined alternation
+        """
+        branches = []
+        self.group_names = {}
+        self.separate = []
+        for position, watched in enumerate(self.patterns.values()):
+            if watched.branch is None:
+                self.separate.append((watched.compiled, watched))
+                continue
+            group = f'w{position}'
+            self.group_names[group] = watched
+            branches.append(f'(?P<{group}>{watched.branch})')
+        self.combined = re.compile('|'.join(branches)) if branches else None
+
+    def check(self, message: str, buffer: str, index: int) -> None:
+        """
+        Count the patterns that match the message at `index` in `buffer`
+        """
+        hit = set()
+        match = self.combined.search(message) if self.combined is not None else None
+        if match is not None:
+            assert match.lastgroup is not None
+            first = self.group_names[match.lastgroup]
+            hit.add(first)
+            # The leftmost match can hide overlapping or later matches of the other patterns,
+            # which cannot start before it
+            start = match.start()
+            for watched in self.group_names.values():
+                if watched is not first and watched.compiled.search(message, start):
+                    hit.add(watched)
+        for pattern, watched in self.separate:
+            if pattern.search(message):
+                hit.add(watched)
+        for watched in hit:
+            watched.hits += 1
+            watched.last_hit = (buffer, index)
+
+    def clear_hits(self) -> None:
+        """
+        Reset every counter, used when the buffers are replaced
+        """
+        for watched in self.patterns.values():
+            watched.hits = 0
+            watched.last_hit = None
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __repr__(self):
+        return f'<Watchlist of {len(self.patterns)} patterns>'
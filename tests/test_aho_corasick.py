@@ -0,0 +1,54 @@
+"""
+Unit Tests for the Aho-Corasick automaton
+"""
+
+import unittest
+
+from logria.utilities.aho_corasick import AhoCorasick
+
+
+class TestAhoCorasick(unittest.TestCase):
+    """
+    Test cases to ensure the automaton finds literals
+    """
+
+    def test_search(self):
+        """
+        Test that we find any of the literals
+        """
+        automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+        self.assertTrue(automaton.search('ushers'))
+        self.assertTrue(automaton.search('this'))
+        self.assertFalse(automaton.search('hat'))
+
+    def test_search_failure_links(self):
+        """
+        Test that matches are found after a partial match fails
+        """
+        automaton = AhoCorasick(['abcd', 'bce'])
+        self.assertTrue(automaton.search('abce'))
+        self.assertFalse(automaton.search('abcx'))
+
+    def test_find_all(self):
+        """
+        Test that we get the longest literal ending at each position
+        """
+        automaton = AhoCorasick(['he', 'she', 'hers'])
+        self.assertEqual(automaton.find_all('ushers'), [(1, 4), (2, 6)])
+
+    def test_empty(self):
+        """
+        Test that empty literals are ignored
+        """
+        automaton = AhoCorasick(['', 'a'])
+        self.assertEqual(automaton.literals, ['a'])
+        self.assertFalse(AhoCorasick([]).search('anything'))
+
+    def test_matches_substring_search(self):
+        """
+        Test that results agree with `in` for many overlapping literals
+        """
+        literals = ['aab', 'ab', 'bab', 'bba', 'abba', 'b']
+        automaton = AhoCorasick(literals)
+        for text in ('', 'a', 'aa', 'aaab', 'ccbcc', 'abab', 'cccc'):
+            self.assertEqual(automaton.search(text), any(literal in text for literal in literals))
@@ -2,10 +2,14 @@
 Tests the app launcher
 """
 
+import io
 import os
+import sys
 import unittest
 from curses import error
+from unittest.mock import patch
 
+from logria.__main__ import build_parser, main
 from logria.communication.input_handler import (CommandInputStream,
                                                 FileInputStream)
 from logria.communication.shell_output import Logria
@@ -47,3 +51,28 @@ class TestCanLaunchApp(unittest.TestCase):
             stream = FileInputStream(['readme.md'])
             app = Logria(stream, False)
             app.start()
+
+
+class TestCommandLineArgs(unittest.TestCase):
+    """
+    Tests parsing the command line args
+    """
+
+    def test_build_parser(self):
+        """
+        Test that the parser builds, with help text for every arg
+        """
+        parser = build_parser()
+        self.assertIn('--fps', parser.format_help())
+        args = parser.parse_args(['-e', 'ls', '--fps', '10', '-n'])
+        self.assertEqual((args.e, args.fps, args.no_smart_speed), (['ls'], 10.0, False))
+
+    def test_record_needs_command(self):
+        """
+        Test that recording without a command to record is rejected
+        """
+        for argv in (['-r', 'out.jsonl'], ['-r', 'out.jsonl', '-e', 'ls', '--replay', 'in.jsonl']):
+            with patch.object(sys, 'argv', ['logria'] + argv), patch('sys.stderr', new=io.StringIO()) as stderr:
+                with self.assertRaises(SystemExit):
+                    main()
+            self.assertIn('-r/--record', stderr.getvalue())
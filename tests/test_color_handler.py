@@ -3,9 +3,13 @@ Unit Tests for color handler
 """
 
 
+import curses
 import unittest
+from collections import OrderedDict
+from unittest.mock import patch
 
 from logria.interface import color_handler
+from logria.interface.segment_cache import SegmentCache
 
 
 class TestColorHandlerSatnitize(unittest.TestCase):
@@ -84,3 +88,202 @@ class TestColorHandlerCodes(unittest.TestCase):
         Test that we dont crash when given an invalid color
         """
         self.assertEqual(color_handler._color_str_to_color_pair('[108m108[0m'), 101)
+
+
+class TestColorHandlerTokenize(unittest.TestCase):
+    """
+    Test that lines are split into segments once, instead of on every frame
+    """
+
+    def test_tokenize(self):
+        """
+        Test that each code colors the text up to the next one
+        """
+        segments = color_handler.tokenize('start \033[31mred\033[0m plain \033[44mblue')
+        self.assertEqual(segments, (
+            ('start ', (-1, -1)),
+            ('red', (curses.COLOR_RED, -1)),
+            (' plain ', (-1, -1)),
+            ('blue', (-1, curses.COLOR_BLUE)),
+        ))
+
+    def test_tokenize_merges_colors(self):
+        """
+        Test that codes which do not change the colors, or have no text, do not add segments
+        """
+        self.assertEqual(color_handler.tokenize('\033[31ma\033[31mb\033[0m'), (('ab', (curses.COLOR_RED, -1)),))
+        self.assertEqual(color_handler.tokenize(''), ())
+
+    def test_tokenize_keeps_colors(self):
+        """
+        Test that a code only changes the colors it sets, until a reset
+        """
+        segments = color_handler.tokenize('\033[31ma\033[44mb\033[39mc\033[1md\033[me')
+        self.assertEqual(segments, (
+            ('a', (curses.COLOR_RED, -1)),
+            ('b', (curses.COLOR_RED, curses.COLOR_BLUE)),
+            ('cd', (-1, curses.COLOR_BLUE)),
+            ('e', (-1, -1)),
+        ))
+
+    def test_tokenize_drops_other_sequences(self):
+        """
+        Test that escape sequences which do not set colors, and stray escapes, are not drawn
+        """
+        self.assertEqual(color_handler.tokenize('\033[2Ka\033[1;5Hb\033c'), (('abc', (-1, -1)),))
+
+    def test_tokenize_columns(self):
+        """
+        Test that only the columns asked for are kept, with the colors set before them
+        """
+        line = 'ab\033[31mcdef\033[44mgh\033[0mij\n'
+        self.assertEqual(color_handler.tokenize(line, 3, 4), (
+            ('def', (curses.COLOR_RED, -1)),
+            ('g', (curses.COLOR_RED, curses.COLOR_BLUE)),
+        ))
+        self.assertEqual(color_handler.tokenize(line, 8, 10), (('ij', (-1, -1)),))
+        self.assertEqual(color_handler.tokenize(line, 20, 10), ())
+        self.assertEqual(color_handler.tokenize('plain text\n', 6, 2), (('te', (-1, -1)),))
+        self.assertEqual(color_handler.tokenize('plain text\n', 6, 10), (('text', (-1, -1)),))
+
+    def test_tokenize_columns_stops_early(self):
+        """
+        Test that the line is not searched past the last column
+        """
+        line = 'abc\033[31m' + 'x' * 10 + '\033[0m' * 10_000
+        limits = []
+        search = color_handler.ESCAPE_START_REGEX.search
+
+        def record(text, position, limit):
+            limits.append(limit)
+            return search(text, position, limit)
+
+        with patch.object(color_handler, 'ESCAPE_START_REGEX') as regex:
+            regex.search = record
+            segments = color_handler.tokenize(line, 1, 5)
+        self.assertEqual(segments, (('bc', (-1, -1)), ('xxx', (curses.COLOR_RED, -1))))
+        self.assertLess(max(limits), 20)
+
+    def test_clip_segments(self):
+        """
+        Test that segments are cut to the columns shown
+        """
+        segments = (('ERROR', (1, -1)), (' id=1', (-1, -1)))
+        self.assertEqual(color_handler.clip_segments(segments, 3, 4), (('OR', (1, -1)), (' i', (-1, -1))))
+        self.assertEqual(color_handler.clip_segments(segments, 12, 4), ())
+
+    def test_display_columns(self):
+        """
+        Test that tabs and wide characters are cut by the columns they are drawn in
+        """
+        self.assertEqual(color_handler.tokenize('a\tb\n', 0, 10), (('a       b', (-1, -1)),))
+        self.assertEqual(color_handler.tokenize('a\tb\n', 4, 5), (('    b', (-1, -1)),))
+        self.assertEqual(color_handler.tokenize('\033[31m日本語x\n', 2, 3), (('本', (curses.COLOR_RED, -1)),))
+        self.assertEqual(color_handler.tokenize('日本語x\n', 3, 4), ((' 語x', (-1, -1)),))
+        self.assertEqual(color_handler.tokenize('e\u0301tait\n', 0, 2), (('e\u0301t', (-1, -1)),))
+        self.assertEqual(color_handler.clip_segments((('日本語', (1, -1)),), 0, 3), (('日 ', (1, -1)),))
+        segments = (('日本', (1, -1)), ('\tid', (-1, -1)))
+        self.assertEqual(color_handler.clip_segments(segments, 1, 9), ((' 本', (1, -1)), ('    id', (-1, -1))))
+
+    def test_column_index(self):
+        """
+        Test finding the first character drawn past a column
+        """
+        self.assertEqual(color_handler.column_index('abcdef', 4), 4)
+        self.assertEqual(color_handler.column_index('abc', 4), 3)
+        self.assertEqual(color_handler.column_index('日本語x', 4), 2)
+        self.assertEqual(color_handler.column_index('日本語x', 5), 3)
+        self.assertEqual(color_handler.column_index('\tab', 9), 2)
+
+    def test_segment_cache(self):
+        """
+        Test that cached segments are reused until the buffer changes, dropping the least recent
+        """
+        cache = SegmentCache(max_lines=2)
+        messages = ['\033[31ma', 'b', 'c']
+        first = cache.get(messages, 0)
+        self.assertIs(cache.get(messages, 0), first)
+        cache.get(messages, 1)
+        cache.get(messages, 0)
+        cache.get(messages, 2)
+        self.assertEqual(list(cache.cache), [0, 2])
+        cache.get(['x'], 0)
+        self.assertEqual(list(cache.cache), [0])
+        self.assertGreater(cache.size_bytes(), 0)
+
+    def test_segment_cache_columns(self):
+        """
+        Test that cached segments are dropped when the columns shown change
+        """
+        cache = SegmentCache()
+        messages = ['\033[31mabcdef\n']
+        self.assertEqual(cache.get(messages, 0), (('abcdef', (curses.COLOR_RED, -1)),))
+        self.assertEqual(cache.get(messages, 0, (2, 2)), (('cd', (curses.COLOR_RED, -1)),))
+        self.assertEqual(cache.get(messages, 0, (4, 4)), (('ef', (curses.COLOR_RED, -1)),))
+        self.assertEqual(len(cache), 1)
+
+
+class TestColorHandlerSGR(unittest.TestCase):
+    """
+    Test that Select Graphic Rendition parameters resolve to the nearest of the 256 colors
+    """
+
+    def test_basic_colors(self):
+        """
+        Test that bright colors are kept apart from the normal ones
+        """
+        self.assertEqual(color_handler.apply_sgr('31;42', -1, -1), (1, 2))
+        self.assertEqual(color_handler.apply_sgr('91;102', -1, -1), (9, 10))
+        self.assertEqual(color_handler.apply_sgr('0', 9, 10), (-1, -1))
+        self.assertEqual(color_handler.apply_sgr('49', 9, 10), (9, -1))
+
+    def test_extended_colors(self):
+        """
+        Test that 256 color and true color codes are parsed, with semicolons or colons
+        """
+        self.assertEqual(color_handler.apply_sgr('38;5;208', -1, -1), (208, -1))
+        self.assertEqual(color_handler.apply_sgr('1;48;5;17;4', -1, -1), (-1, 17))
+        self.assertEqual(color_handler.apply_sgr('38;2;255;135;0', -1, -1), (208, -1))
+        self.assertEqual(color_handler.apply_sgr('38:2::255:135:0;48:5:17', -1, -1), (208, 17))
+        self.assertEqual(color_handler.apply_sgr('38;2;128;128;128', -1, -1), (244, -1))
+
+    def test_invalid_extended_colors(self):
+        """
+        Test that incomplete or out of range extended colors are ignored
+        """
+        self.assertEqual(color_handler.apply_sgr('38;5', 1, -1), (1, -1))
+        self.assertEqual(color_handler.apply_sgr('38;2;1;x;3', 1, -1), (1, -1))
+        self.assertEqual(color_handler.apply_sgr('38;5;300', 1, -1), (1, -1))
+        self.assertEqual(color_handler.apply_sgr('38;5;300;44', 1, -1), (1, curses.COLOR_BLUE))
+        self.assertEqual(color_handler.apply_sgr('38:5:256', 1, -1), (1, -1))
+
+    def test_nearest_table(self):
+        """
+        Test that colors the terminal does not have map to the nearest one it does
+        """
+        self.assertEqual(color_handler.nearest_table(256)[208], 208)
+        self.assertEqual(color_handler.nearest_table(16)[196], curses.COLOR_RED + 8)
+        self.assertEqual(color_handler.nearest_table(8)[196], curses.COLOR_RED)
+        self.assertEqual(color_handler.nearest_table(8)[9], curses.COLOR_RED)
+        self.assertEqual(color_handler.nearest_table(8)[232], curses.COLOR_BLACK)
+        self.assertEqual(color_handler.nearest_table(0)[9], -1)
+
+
+class TestColorHandlerPairs(unittest.TestCase):
+    """
+    Test that color pairs are bounded and reused least recently used first
+    """
+
+    def test_lru_pairs(self):
+        """
+        Test that the least recently used pair is given new colors once every pair is used
+        """
+        with patch.object(color_handler, 'COLOR_PAIRS_CACHE', OrderedDict()), \
+                patch.object(color_handler, '_pair_range', return_value=(101, 104)):
+            generation = color_handler.pair_generation()
+            self.assertEqual([color_handler._get_color(color, -1) for color in (1, 2, 3)], [101, 102, 103])
+            self.assertEqual(color_handler._get_color(1, -1), 101)
+            self.assertEqual(color_handler.pair_generation(), generation)
+            self.assertEqual(color_handler._get_color(4, -1), 102)
+            self.assertEqual(color_handler.pair_generation(), generation + 1)
+            self.assertEqual(list(color_handler.COLOR_PAIRS_CACHE), [(3, -1), (1, -1), (4, -1)])
@@ -0,0 +1,91 @@
+"""
+Unit Tests for showing context lines around matches
+"""
+
+import os
+import unittest
+
+from logria.communication.render import determine_position, display_rows
+from logria.communication.shell_output import Logria
+from logria.logger.processor import process_matches
+from logria.utilities import regex_generator
+from logria.utilities.context_view import SEPARATOR, ContextView
+
+
+class TestContextView(unittest.TestCase):
+    """
+    Test cases to ensure context rows match grep's output
+    """
+
+    def setUp(self):
+        self.messages = [str(x) for x in range(20)]
+
+    def test_separated_groups(self):
+        """
+        Test that groups that do not touch are separated
+        """
+        view = ContextView(1, 1)
+        view.update([3, 10], self.messages)
+        self.assertEqual(list(view), [2, 3, 4, SEPARATOR, 9, 10, 11])
+        self.assertEqual(view[-1], 11)
+
+    def test_merged_groups(self):
+        """
+        Test that overlapping and touching groups are merged
+        """
+        view = ContextView(2, 1)
+        view.update([3, 5, 9], self.messages)
+        self.assertEqual(list(view), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
+
+    def test_buffer_edges(self):
+        """
+        Test that context is clipped at the start and end of the buffer
+        """
+        view = ContextView(3, 3)
+        view.update([0, 19], self.messages)
+        self.assertEqual(list(view), [0, 1, 2, 3, SEPARATOR, 16, 17, 18, 19])
+
+    def test_incremental_matches(self):
+        """
+        Test that appended matches and messages extend the last group
+        """
+        messages = self.messages[:12]
+        matched_rows = [3, 10]
+        view = ContextView(0, 2)
+        view.update(matched_rows, messages)
+        self.assertEqual(list(view), [3, 4, 5, SEPARATOR, 10, 11])
+        messages.extend(self.messages[12:])
+        matched_rows.append(13)
+        view.update(matched_rows, messages)
+        self.assertEqual(list(view), [3, 4, 5, SEPARATOR, 10, 11, 12, 13, 14, 15])
+
+    def test_replaced_matches(self):
+        """
+        Test that matches inserted before the first are picked up
+        """
+        matched_rows = [10]
+        view = ContextView(0, 0)
+        view.update(matched_rows, self.messages)
+        matched_rows[:0] = [2]
+        view.update(matched_rows, self.messages)
+        self.assertEqual(list(view), [2, SEPARATOR, 10])
+
+    def test_render_position(self):
+        """
+        Test that render positions are computed over the context rows
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        app.height = 10
+        app.width = 100
+        app.last_row = app.height - 3
+        app.messages = self.messages
+        app.func_handle = regex_generator.regex_test_generator(r'^1[05]$')
+        process_matches(app)
+        app.context_view = ContextView(1, 1)
+        rows = display_rows(app)
+        self.assertEqual(list(rows), [9, 10, 11, SEPARATOR, 14, 15, 16])
+        app.stick_to_top = True
+        app.stick_to_bottom = False
+        self.assertEqual(determine_position(app, rows), (-1, 6))
+        app.stop()
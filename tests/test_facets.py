@@ -0,0 +1,198 @@
+"""
+Unit Tests for the log level and source bitsets
+"""
+
+import os
+import tempfile
+import unittest
+
+from logria.commands.facets import build_facets
+from logria.commands.layers import update_layers
+from logria.communication.metadata import MessageMetadata
+from logria.communication.render import display_rows
+from logria.communication.setup import restore_snapshot
+from logria.communication.shell_output import Logria
+from logria.logger.filter_layers import FilterLayer, FilterLayers
+from logria.utilities.facets import LEVELS, FacetIndex, bit_indexes, classify_level, parse_level
+from logria.utilities.snapshot import save_snapshot
+
+ERROR = LEVELS.index('ERROR')
+WARN = LEVELS.index('WARN')
+
+
+class TestClassifyLevel(unittest.TestCase):
+    """
+    Test cases to ensure log levels are recognized
+    """
+
+    def test_upper_case_levels(self):
+        """
+        Test that upper case level names and their aliases are classified
+        """
+        self.assertEqual(classify_level('2021-01-01 ERROR disk full'), ERROR)
+        self.assertEqual(classify_level('[WARNING] slow query'), WARN)
+        self.assertEqual(classify_level('FATAL: out of memory'), ERROR)
+        self.assertEqual(classify_level('TRACE entering loop'), LEVELS.index('DEBUG'))
+
+    def test_structured_levels(self):
+        """
+        Test that lower case levels are only classified after a level key
+        """
+        self.assertEqual(classify_level('ts=1 level=warn msg="slow"'), WARN)
+        self.assertEqual(classify_level('{"level": "error", "msg": "x"}'), ERROR)
+        self.assertIsNone(classify_level('no error here, for your information'))
+        self.assertIsNone(classify_level('ERRORS are not a level'))
+
+    def test_parse_level(self):
+        """
+        Test that user typed levels are case insensitive
+        """
+        self.assertEqual(parse_level('warning'), WARN)
+        self.assertIsNone(parse_level('loud'))
+
+
+class TestFacetIndex(unittest.TestCase):
+    """
+    Test cases to ensure selections match a scan of the messages
+    """
+
+    def setUp(self):
+        self.messages = [f'{LEVELS[x % 4]} message {x}' for x in range(50)]
+        self.index = FacetIndex()
+        self.index.extend(self.messages, [x % 3 for x in range(50)])
+
+    def test_select_level(self):
+        """
+        Test that a level selects every message at that level
+        """
+        self.assertEqual(self.index.indexes({ERROR}, set()), list(range(3, 50, 4)))
+
+    def test_select_level_and_source(self):
+        """
+        Test that levels and sources are combined with AND, and values of one facet with OR
+        """
+        expected = [x for x in range(50) if x % 4 in (WARN, ERROR) and x % 3 == 1]
+        self.assertEqual(self.index.indexes({WARN, ERROR}, {1}), expected)
+
+    def test_select_range(self):
+        """
+        Test that selecting part of the buffer is not byte aligned
+        """
+        self.assertEqual(self.index.indexes(set(), {0}, 13, 30), [15, 18, 21, 24, 27])
+
+    def test_mask(self):
+        """
+        Test that the mask has a bit for each selected message
+        """
+        mask = self.index.mask({ERROR}, set())
+        self.assertEqual([x for x in range(50) if mask[x >> 3] >> (x & 7) & 1], list(range(3, 50, 4)))
+        mask = self.index.mask({ERROR}, set(), 21, 40)
+        self.assertEqual(len(mask), 3)
+        self.assertEqual([x + 16 for x in range(24) if mask[x >> 3] >> (x & 7) & 1], [23, 27, 31, 35, 39])
+
+    def test_bit_indexes(self):
+        """
+        Test that set bits are converted to message indexes
+        """
+        self.assertEqual(bit_indexes(0b1000000101, 16, 10), [16, 18, 25])
+
+
+class TestFacetLayer(unittest.TestCase):
+    """
+    Test cases to ensure facets filter ahead of the layers
+    """
+
+    def setUp(self):
+        self.messages = [f'{LEVELS[x % 4]} message {x}' for x in range(40)]
+        self.index = FacetIndex()
+        self.index.extend(self.messages[:20], [0] * 20)
+        self.layers = FilterLayers()
+        self.layers.select({ERROR}, set())
+
+    def test_incremental(self):
+        """
+        Test that new messages are selected as they are classified
+        """
+        messages = self.messages[:20]
+        self.layers.update(messages, None, self.index)
+        self.assertEqual(self.layers.rows, [3, 7, 11, 15, 19])
+        messages.extend(self.messages[20:])
+        self.index.extend(self.messages[20:], [0] * 20)
+        self.layers.update(messages, None, self.index)
+        self.assertEqual(self.layers.rows, list(range(3, 40, 4)))
+
+    def test_with_matches_and_layers(self):
+        """
+        Test that facets AND with the `/` filter's matches and feed the layers
+        """
+        self.index.extend(self.messages[20:], [0] * 20)
+        self.layers.add(FilterLayer(r'\b1\d\b', exclude=True))
+        self.layers.update(self.messages, list(range(0, 40, 3)), self.index)
+        self.assertEqual(self.layers.facets.rows, [3, 15, 27, 39])
+        self.assertEqual(self.layers.rows, [3, 27, 39])
+
+    def test_matches_read_new_bits(self):
+        """
+        Test that new matches are tested against only the bits from the first new match
+        """
+        self.index.extend(self.messages[20:], [0] * 20)
+        matches = list(range(0, 20, 3))
+        self.layers.update(self.messages, matches, self.index)
+        matches.extend(range(21, 40, 3))
+        starts = []
+        mask = self.index.mask
+
+        def record(levels, sources, start=0, end=None):
+            starts.append(start)
+            return mask(levels, sources, start, end)
+
+        self.index.mask = record  # type: ignore
+        self.layers.update(self.messages, matches, self.index)
+        self.assertEqual(starts, [16])
+        self.assertEqual(self.layers.facets.rows, [3, 15, 27, 39])
+
+    def test_no_facets(self):
+        """
+        Test that buffers without facets are not filtered by them
+        """
+        self.layers.update(self.messages, None, None)
+        self.assertFalse(self.layers.active)
+
+    def test_app_selection(self):
+        """
+        Test that the app shows only the selected messages from its buffers
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        app.stdout_messages.extend(self.messages)
+        for x in range(40):
+            app.stdout_metadata.append(0, x % 2)
+        app.messages = app.stdout_messages
+        build_facets(app)
+        app.filter_layers.select({ERROR}, {1})
+        update_layers(app)
+        self.assertEqual(display_rows(app), [3, 7, 11, 15, 19, 23, 27, 31, 35, 39])
+        app.filter_layers.select(set(), {0})
+        update_layers(app)
+        self.assertEqual(display_rows(app), list(range(0, 40, 2)))
+        app.stop()
+
+    def test_snapshot_selection(self):
+        """
+        Test that messages restored from a snapshot are classified with their sources
+        """
+        metadata = MessageMetadata()
+        for x in range(40):
+            metadata.append(0, x % 2)
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        save_snapshot(path, [(self.messages, metadata), ([], MessageMetadata())])
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        restore_snapshot(app, path)
+        build_facets(app)
+        app.filter_layers.select({ERROR}, {1})
+        update_layers(app)
+        self.assertEqual(display_rows(app), [3, 7, 11, 15, 19, 23, 27, 31, 35, 39])
+        app.stop()
+        os.remove(path)
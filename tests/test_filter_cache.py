@@ -0,0 +1,108 @@
+"""
+Unit Tests for the cache of recent filter results
+"""
+
+import os
+import unittest
+
+from logria.commands.recent_filters import save_filter, take_saved_filter
+from logria.communication.shell_output import Logria
+from logria.logger.processor import process_matches
+from logria.utilities.filter_cache import CachedFilter, FilterCache
+from logria.utilities.filter_expression import filter_test_generator, span_test_generator
+from logria.utilities.match_spans import MatchSpans
+
+
+def make_entry(matched_rows):
+    """
+    Build a cached filter that tested every message up to its last match
+    """
+    spans = MatchSpans()
+    for index in matched_rows:
+        spans.add(index, [0, 1])
+    return CachedFilter(matched_rows, spans, matched_rows[-1] + 1 if matched_rows else 0)
+
+
+class TestFilterCache(unittest.TestCase):
+    """
+    Test cases to ensure the cache hands over results and stays under its caps
+    """
+
+    def test_take(self):
+        """
+        Test that taking results removes them from the cache
+        """
+        cache = FilterCache()
+        entry = make_entry([1, 2, 3])
+        cache.store('stdout', 'error', entry)
+        self.assertIsNone(cache.take('stderr', 'error'))
+        self.assertIs(cache.take('stdout', 'error'), entry)
+        self.assertIsNone(cache.take('stdout', 'error'))
+        self.assertEqual(cache.size_bytes, 0)
+
+    def test_evicts_least_recent(self):
+        """
+        Test that storing past the entry cap evicts the oldest results
+        """
+        cache = FilterCache(max_entries=2)
+        cache.store('stdout', 'a', make_entry([1]))
+        cache.store('stdout', 'b', make_entry([2]))
+        cache.store('stdout', 'a', cache.take('stdout', 'a'))
+        cache.store('stdout', 'c', make_entry([3]))
+        self.assertEqual(list(cache.entries), [('stdout', 'a'), ('stdout', 'c')])
+
+    def test_memory_cap(self):
+        """
+        Test that results are evicted to stay under the memory cap, and oversized results are not kept
+        """
+        small = make_entry([1])
+        cache = FilterCache(max_bytes=small.size_bytes * 2)
+        cache.store('stdout', 'a', small)
+        cache.store('stdout', 'b', make_entry([1]))
+        cache.store('stdout', 'c', make_entry([1]))
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.size_bytes, cache.max_bytes)
+        cache.store('stdout', 'd', make_entry(list(range(100))))
+        self.assertIsNone(cache.take('stdout', 'd'))
+
+
+class TestRecentFilters(unittest.TestCase):
+    """
+    Test cases to ensure switching back to a filter only tests new messages
+    """
+
+    def setUp(self):
+        os.environ['TERM'] = 'dumb'
+        self.app = Logria(None, False, False)
+        self.app.messages = self.app.stdout_messages
+        self.app.messages.extend(f'error {x}' if x % 3 == 0 else f'info {x}' for x in range(90))
+
+    def test_restore(self):
+        """
+        Test that restored results resume from where they were saved
+        """
+        self.app.regex_pattern = 'error'
+        self.app.func_handle = filter_test_generator('error')
+        self.app.span_handle = span_test_generator('error')
+        process_matches(self.app)
+        save_filter(self.app)
+        self.app.messages.extend(f'error {x}' for x in range(90, 93))
+
+        cached = take_saved_filter(self.app, 'error')
+        self.assertEqual(cached.last_index_regexed, 90)
+        self.app.matched_rows = cached.matched_rows
+        self.app.match_spans = cached.match_spans
+        self.app.last_index_regexed = cached.last_index_regexed
+        process_matches(self.app)
+        self.assertEqual(self.app.matched_rows, list(range(0, 90, 3)) + [90, 91, 92])
+        self.assertEqual(self.app.match_spans.get(91), [(0, 5)])
+
+    def test_other_buffers_not_saved(self):
+        """
+        Test that filters over buffers other than stdout and stderr are not cached
+        """
+        self.app.messages = ['error']
+        self.app.regex_pattern = 'error'
+        self.app.func_handle = filter_test_generator('error')
+        save_filter(self.app)
+        self.assertEqual(len(self.app.filter_cache), 0)
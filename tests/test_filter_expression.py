@@ -0,0 +1,202 @@
+"""
+Unit Tests for filter expressions
+"""
+
+import unittest
+
+from logria.utilities import filter_expression
+
+
+class TestTokenize(unittest.TestCase):
+    """
+    Test cases to ensure expressions are split into the expected tokens
+    """
+
+    def test_keywords(self):
+        """
+        Test that keywords are recognized
+        """
+        tokens = filter_expression.tokenize('a AND NOT b OR c')
+        self.assertEqual([kind for kind, _ in tokens],
+                         ['term', 'keyword', 'keyword', 'term', 'keyword', 'term'])
+
+    def test_grouping_parens(self):
+        """
+        Test that unbalanced parens are grouping but balanced ones stay in the regex
+        """
+        tokens = filter_expression.tokenize('(db OR cache) AND (a|b)')
+        self.assertEqual(tokens, [
+            ('(', '('), ('term', 'db'), ('keyword', 'OR'), ('term', 'cache'), (')', ')'),
+            ('keyword', 'AND'), ('term', '(a|b)'),
+        ])
+
+    def test_quoted(self):
+        """
+        Test that quoted terms keep spaces and keywords
+        """
+        tokens = filter_expression.tokenize('"GET / AND" OR "say \\"hi\\""')
+        self.assertEqual(tokens, [('term', 'GET / AND'), ('keyword', 'OR'), ('term', 'say "hi"')])
+
+    def test_unterminated_quote(self):
+        """
+        Test that an unterminated quote is an error
+        """
+        with self.assertRaises(filter_expression.ExpressionError):
+            filter_expression.tokenize('"abc')
+
+    def test_is_expression(self):
+        """
+        Test that plain regexes are not expressions
+        """
+        self.assertTrue(filter_expression.is_expression('a AND b'))
+        self.assertFalse(filter_expression.is_expression('error.*timeout'))
+        self.assertFalse(filter_expression.is_expression('(a|b) and c'))
+
+
+class TestParse(unittest.TestCase):
+    """
+    Test that expressions parse with the expected precedence
+    """
+
+    def test_precedence(self):
+        """
+        Test that NOT binds tighter than AND, which binds tighter than OR
+        """
+        node = filter_expression.parse_expression('a OR b AND NOT c')
+        self.assertEqual(node, ('or', (('term', 'a'), ('and', (('term', 'b'), ('not', ('term', 'c')))))))
+
+    def test_flatten(self):
+        """
+        Test that nested nodes of the same operator are flattened
+        """
+        node = filter_expression.parse_expression('a AND (b AND c)')
+        self.assertEqual(node, ('and', (('term', 'a'), ('term', 'b'), ('term', 'c'))))
+
+    def test_errors(self):
+        """
+        Test that malformed expressions raise
+        """
+        for command in ('a AND', '(a OR b', 'a OR b)', 'AND a', 'a AND ['):
+            with self.assertRaises(filter_expression.ExpressionError):
+                filter_expression.parse_expression(command)
+
+
+class TestExpressionTest(unittest.TestCase):
+    """
+    Test that compiled expressions match what they should
+    """
+
+    def test_example(self):
+        """
+        Test the motivating example
+        """
+        func = filter_expression.filter_test_generator('level=ERROR AND NOT healthcheck AND (db OR cache)')
+        self.assertTrue(func('level=ERROR db timeout'))
+        self.assertTrue(func('level=ERROR cache miss'))
+        self.assertFalse(func('level=ERROR healthcheck db'))
+        self.assertFalse(func('level=INFO db timeout'))
+        self.assertFalse(func('level=ERROR disk full'))
+
+    def test_ignores_color_codes(self):
+        """
+        Test that ANSI codes are stripped before testing terms
+        """
+        func = filter_expression.filter_test_generator('a-b AND c')
+        self.assertTrue(func('a\u001b[0m-\u001b[32mb c'))
+
+    def test_regex_terms(self):
+        """
+        Test that terms are regexes
+        """
+        func = filter_expression.filter_test_generator(r'\d+ms AND NOT ^GET')
+        self.assertTrue(func('POST 20ms'))
+        self.assertFalse(func('GET 20ms'))
+
+    def test_plain_regex(self):
+        """
+        Test that plain regexes still work
+        """
+        func = filter_expression.filter_test_generator('(a|b)c')
+        self.assertTrue(func('bc'))
+
+    def test_keywords_in_regex(self):
+        """
+        Test that regexes with keywords that do not parse as an expression match as a regex
+        """
+        for command, message in (('404 NOT FOUND', 'GET / 404 NOT FOUND'), ('HTTP/1.1 OR', 'HTTP/1.1 OR'),
+                                 ('AND', 'AND then'), ('NOT', 'NOT here')):
+            self.assertFalse(filter_expression.is_expression(command))
+            func = filter_expression.filter_test_generator(command)
+            self.assertIsNotNone(func, command)
+            self.assertTrue(func(message), command)
+            self.assertFalse(func('something else'), command)
+        self.assertEqual(filter_expression.highlight_pattern('404 NOT FOUND'), '404 NOT FOUND')
+
+    def test_invalid(self):
+        """
+        Test that invalid expressions do not build a function
+        """
+        self.assertIsNone(filter_expression.filter_test_generator('a AND ('))
+
+    def test_highlight_pattern(self):
+        """
+        Test that only positive terms are highlighted
+        """
+        self.assertEqual(filter_expression.highlight_pattern('a AND NOT b'), '(?:a)')
+        self.assertEqual(filter_expression.highlight_pattern('a.*b'), 'a.*b')
+        self.assertEqual(filter_expression.highlight_pattern('(?i)error AND db'), '(?:(?i:error))|(?:db)')
+        self.assertEqual(filter_expression.highlight_pattern(r'(a)\1 AND b'), '')
+
+    def test_span_test_inline_flags(self):
+        """
+        Test that terms with inline flags are highlighted without breaking the joined regex
+        """
+        func = filter_expression.span_test_generator('(?i)error AND db')
+        self.assertEqual(func('ERROR in DB db'), [0, 5, 12, 14])
+        func = filter_expression.span_test_generator('(?a)error OR db')
+        self.assertEqual(func('db error'), [])
+        func = filter_expression.span_test_generator('(?P<x>a) OR (?P<x>b)')
+        self.assertEqual(func('a b'), [])
+
+    def test_span_test_generator(self):
+        """
+        Test that span tests find every highlighted span of a match on the uncolored text
+        """
+        func = filter_expression.span_test_generator('timeout AND NOT retry')
+        self.assertEqual(func('\u001b[31mtimeout\u001b[0m after timeout'), [0, 7, 14, 21])
+        self.assertIsNone(func('timeout, retry'))
+        self.assertIsNone(filter_expression.span_test_generator('a AND ('))
+
+    def test_span_test_zero_width(self):
+        """
+        Test that a match with only empty spans still matches
+        """
+        func = filter_expression.span_test_generator('^')
+        self.assertEqual(func('anything'), [])
+
+
+class TestFilterRefinement(unittest.TestCase):
+    """
+    Test that adding AND clauses narrows the previous results
+    """
+
+    def test_added_clause(self):
+        """
+        Test that adding a clause is a refinement
+        """
+        self.assertTrue(filter_expression.is_filter_refinement('error', 'error AND timeout'))
+        self.assertTrue(filter_expression.is_filter_refinement('a AND b', 'b AND c AND a'))
+
+    def test_regex_refinement(self):
+        """
+        Test that plain regexes use the regex rules
+        """
+        self.assertTrue(filter_expression.is_filter_refinement('error', 'error.*timeout'))
+
+    def test_not_refinement(self):
+        """
+        Test that widening or replacing clauses is not a refinement
+        """
+        self.assertFalse(filter_expression.is_filter_refinement('error', 'error OR timeout'))
+        self.assertFalse(filter_expression.is_filter_refinement('a AND b', 'a AND c'))
+        self.assertFalse(filter_expression.is_filter_refinement('a OR b', 'a'))
@@ -0,0 +1,121 @@
+"""
+Unit Tests for stacked include and exclude filters
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+from logria.communication.render import display_rows
+from logria.communication.shell_output import Logria
+from logria.logger.filter_layers import FilterLayer, FilterLayers
+from logria.logger.processor import process_matches
+from logria.utilities import regex_generator
+
+
+class TestFilterLayers(unittest.TestCase):
+    """
+    Test cases to ensure layers filter incrementally and only recompute what changed
+    """
+
+    def setUp(self):
+        self.messages = [f'{"error" if x % 2 else "info"} {"db" if x % 3 else "cache"} {x}' for x in range(30)]
+        self.layers = FilterLayers()
+
+    def test_exclude(self):
+        """
+        Test that an exclude layer removes matching messages
+        """
+        self.layers.add(FilterLayer('info', exclude=True))
+        self.layers.update(self.messages, None)
+        self.assertEqual(self.layers.rows, list(range(1, 30, 2)))
+
+    def test_stacked_layers(self):
+        """
+        Test that each layer reads the previous layer's output
+        """
+        self.layers.add(FilterLayer('info', exclude=True))
+        self.layers.add(FilterLayer('cache', exclude=False))
+        self.layers.update(self.messages, None)
+        self.assertEqual(self.layers.rows, [3, 9, 15, 21, 27])
+        self.assertEqual(self.layers.layers[1].tested, 15)
+
+    def test_matched_rows_source(self):
+        """
+        Test that the first layer reads the `/` filter's matches
+        """
+        self.layers.add(FilterLayer('cache', exclude=True))
+        self.layers.update(self.messages, [0, 1, 2, 3, 4])
+        self.assertEqual(self.layers.rows, [1, 2, 4])
+
+    def test_incremental(self):
+        """
+        Test that new messages are only tested once
+        """
+        messages = self.messages[:10]
+        self.layers.add(FilterLayer('info', exclude=True))
+        self.layers.update(messages, None)
+        messages.extend(self.messages[10:])
+        with patch.object(self.layers.layers[0], 'func_handle', wraps=self.layers.layers[0].func_handle) as func:
+            self.layers.update(messages, None)
+        self.assertEqual(func.call_count, 20)
+        self.assertEqual(self.layers.rows, list(range(1, 30, 2)))
+
+    def test_toggle_recomputes_from_layer(self):
+        """
+        Test that toggling a layer keeps the layers above it and recomputes the ones below
+        """
+        self.layers.add(FilterLayer('info', exclude=True))
+        self.layers.add(FilterLayer('cache', exclude=False))
+        self.layers.add(FilterLayer(r'\b2\d\b', exclude=True))
+        self.layers.update(self.messages, None)
+        first_rows = self.layers.layers[0].rows
+        self.layers.toggle(1)
+        self.layers.update(self.messages, None)
+        self.assertIs(self.layers.layers[0].rows, first_rows)
+        self.assertEqual(self.layers.rows, [1, 3, 5, 7, 9, 11, 13, 15, 17, 19])
+        self.layers.remove(2)
+        self.layers.update(self.messages, None)
+        self.assertEqual(self.layers.rows, list(range(1, 30, 2)))
+        self.assertFalse(FilterLayers().active)
+
+    def test_replaced_source(self):
+        """
+        Test that replacing the `/` filter's matches recomputes every layer
+        """
+        self.layers.add(FilterLayer('info', exclude=True))
+        self.layers.update(self.messages, [0, 1, 2, 3])
+        self.layers.update(self.messages, [5, 6, 7])
+        self.assertEqual(self.layers.rows, [5, 7])
+
+    def test_invalid_pattern(self):
+        """
+        Test that an invalid regex is refused
+        """
+        with self.assertRaises(ValueError):
+            FilterLayer('error (', exclude=False)
+
+    def test_slow_layer_disabled(self):
+        """
+        Test that a layer that runs out of time is disabled and returned
+        """
+        self.layers.add(FilterLayer(r'(a+)+$', exclude=True))
+        with patch('logria.logger.processor.FILTER_BATCH_TIME_LIMIT', 0.1):
+            slow_layer = self.layers.update(['a' * 32 + 'b'], None)
+        self.assertIs(slow_layer, self.layers.layers[0])
+        self.assertFalse(slow_layer.enabled)
+        self.assertFalse(self.layers.active)
+
+    def test_display_rows(self):
+        """
+        Test that the app renders the last layer's output
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        app.messages = self.messages
+        app.func_handle = regex_generator.regex_test_generator('error')
+        process_matches(app)
+        app.filter_layers.add(FilterLayer('cache', exclude=True))
+        app.filter_layers.update(app.messages, app.matched_rows)
+        self.assertEqual(display_rows(app), [1, 5, 7, 11, 13, 17, 19, 23, 25, 29])
+        app.stop()
@@ -0,0 +1,181 @@
+"""
+Unit Tests for the highlight rules that color text when it is rendered
+"""
+
+import curses
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from logria.interface import color_handler
+from logria.utilities.highlight_rules import (DEFAULT_COLOR, MATCH_COLOR,
+                                              HighlightRules, overlay,
+                                              parse_color, to_segments)
+
+RED = (curses.COLOR_RED, DEFAULT_COLOR)
+BLUE = (curses.COLOR_BLUE, DEFAULT_COLOR)
+DEFAULT = (DEFAULT_COLOR, DEFAULT_COLOR)
+
+
+class TestHighlightRules(unittest.TestCase):
+    """
+    Test cases to ensure every rule is found with one search and cached by line
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.rules = HighlightRules(os.path.join(self.folder.name, 'highlights'))
+        self.rules.add('error', r'ERROR', 'red')
+        self.rules.add('id', r'id=\d+', 'blue')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_parse_color(self):
+        """
+        Test that colors can be a foreground, or a foreground and background
+        """
+        self.assertEqual(parse_color('red'), RED)
+        self.assertEqual(parse_color('Black/Yellow'), (curses.COLOR_BLACK, curses.COLOR_YELLOW))
+        self.assertIsNone(parse_color('purple'))
+        self.assertIsNone(parse_color('red/blue/green'))
+
+    def test_ranges(self):
+        """
+        Test that each match is colored by the rule it came from
+        """
+        messages = ['ERROR id=12 failed', 'ok']
+        self.assertEqual(self.rules.ranges(messages, 0), ((0, 5, RED), (6, 11, BLUE)))
+        self.assertEqual(self.rules.ranges(messages, 1), ())
+
+    def test_ranges_ignore_color_codes(self):
+        """
+        Test that ranges are found on the message without its color codes
+        """
+        messages = ['\x1b[31mERROR\x1b[0m id=3']
+        self.assertEqual(self.rules.ranges(messages, 0), ((0, 5, RED), (6, 10, BLUE)))
+
+    def test_ranges_cached(self):
+        """
+        Test that a line is only searched once, until the buffer or rules change
+        """
+        messages = ['ERROR']
+        first = self.rules.ranges(messages, 0)
+        messages[0] = 'fine'  # Not searched again, so the cached result is returned
+        self.assertIs(self.rules.ranges(messages, 0), first)
+        self.assertEqual(self.rules.ranges(['fine'], 0), ())
+        self.rules.add('fine', 'fine', 'blue')
+        self.assertEqual(self.rules.ranges(messages, 0), ((0, 4, BLUE),))
+
+    def test_cache_size(self):
+        """
+        Test that the least recently rendered lines are dropped from the cache
+        """
+        rules = HighlightRules(self.rules.path, cache_size=2)
+        rules.add('error', r'ERROR', 'red')
+        messages = ['ERROR'] * 3
+        for index in (0, 1, 0, 2):
+            rules.ranges(messages, index)
+        self.assertEqual(list(rules.cache), [0, 2])
+
+    def test_first_rule_wins(self):
+        """
+        Test that a rule added earlier colors text another rule also matches
+        """
+        self.rules.add('all caps', r'[A-Z]+', 'blue')
+        self.assertEqual(self.rules.ranges(['ERROR'], 0), ((0, 5, RED),))
+
+    def test_invalid_rules(self):
+        """
+        Test that rules which cannot be colored are rejected
+        """
+        for pattern, color in (('(', 'red'), ('a*', 'red'), (r'(a)\1', 'red'), ('a', 'purple')):
+            with self.assertRaises(ValueError):
+                self.rules.add('bad', pattern, color)
+        self.assertNotIn('bad', self.rules.rules)
+        self.assertEqual(list(self.rules.rules), ['error', 'id'])
+
+    def test_verbose_comment(self):
+        """
+        Test that a verbose pattern ending in a comment does not hide the rules after it
+        """
+        self.rules.add('verbose', '(?x)fail # comment', 'red')
+        self.rules.add('ok', 'ok', 'blue')
+        self.assertEqual(self.rules.ranges(['fail ok'], 0), ((0, 4, RED), (5, 7, BLUE)))
+
+    def test_remove(self):
+        """
+        Test that a removed rule no longer colors text
+        """
+        self.assertTrue(self.rules.remove('error'))
+        self.assertFalse(self.rules.remove('error'))
+        self.assertEqual(self.rules.ranges(['ERROR id=1'], 0), ((6, 10, BLUE),))
+
+    def test_save_and_load(self):
+        """
+        Test that rules are saved as JSON and loaded in the same order
+        """
+        self.rules.save()
+        with open(self.rules.path, 'r') as rules_file:
+            self.assertEqual(json.load(rules_file)['error'], {'pattern': 'ERROR', 'color': 'red'})
+        loaded = HighlightRules(self.rules.path)
+        loaded.load()
+        self.assertEqual(list(loaded.rules), ['error', 'id'])
+
+    def test_load_missing(self):
+        """
+        Test that there are no rules when none were saved
+        """
+        rules = HighlightRules(os.path.join(self.folder.name, 'missing'))
+        rules.load()
+        self.assertEqual(len(rules), 0)
+
+
+class TestSegments(unittest.TestCase):
+    """
+    Test cases to ensure colored ranges become segments the color handler can draw
+    """
+
+    def test_to_segments(self):
+        """
+        Test that uncolored text between ranges uses the default colors
+        """
+        segments = to_segments('ERROR id=12 failed', [(0, 5, RED), (6, 11, BLUE)])
+        self.assertEqual(segments, [('ERROR', RED), (' ', DEFAULT), ('id=12', BLUE), (' failed', DEFAULT)])
+
+    def test_to_segments_clipped(self):
+        """
+        Test that ranges past the end of stripped text are dropped
+        """
+        self.assertEqual(to_segments('ERROR', [(0, 5, RED), (5, 8, BLUE)]), [('ERROR', RED)])
+
+    def test_overlay(self):
+        """
+        Test that filter matches are drawn over the rules they overlap
+        """
+        ranges = [(0, 5, RED), (6, 11, BLUE)]
+        merged = overlay(ranges, [(3, 8)])
+        self.assertEqual(merged, [(0, 3, RED), (3, 8, MATCH_COLOR), (8, 11, BLUE)])
+        self.assertEqual(overlay(ranges, [(12, 14)]), ranges + [(12, 14, MATCH_COLOR)])
+
+    def test_add_segments(self):
+        """
+        Test that each segment continues where the last one ended
+        """
+        calls = []
+
+        class Window():
+            """
+            Records what would be drawn
+            """
+
+            def addstr(self, *args):
+                calls.append(args[:-1])
+
+        # Color pairs need a terminal, which tests do not have
+        with patch.object(color_handler, '_get_color', return_value=101), \
+                patch.object(color_handler.curses, 'color_pair', return_value=0):
+            color_handler.add_segments(Window(), 2, 0, [('ERROR', RED), (' ok', DEFAULT)])
+        self.assertEqual(calls, [(2, 0, 'ERROR'), (' ok',)])
@@ -64,3 +64,17 @@ class TestFileInputStream(unittest.TestCase):
         """
         i = input_handler.FileInputStream(['ls', '-l'])
         self.assertIsInstance(i, input_handler.FileInputStream)
+
+
+class TestReplayInputStream(unittest.TestCase):
+    """
+    Test cases to ensure ReplayInputStream can be initialized
+    """
+
+    def test_create_replay_input_stream(self):
+        """
+        Test that we can create a ReplayInputStream
+        """
+        i = input_handler.ReplayInputStream(['incident.rec'], speed=2)
+        self.assertIsInstance(i, input_handler.ReplayInputStream)
+        self.assertEqual(i.speed, 2)
@@ -0,0 +1,152 @@
+"""
+Unit Tests for filtering as the user types
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+from logria.communication.shell_output import Logria
+from logria.logger.live_filter import LiveFilter
+from logria.utilities.filter_cache import CachedFilter
+from logria.utilities.match_spans import MatchSpans
+
+
+class TestLiveFilter(unittest.TestCase):
+    """
+    Test cases to ensure live filtering scans newest messages first and backfills the rest
+    """
+
+    def setUp(self):
+        os.environ['TERM'] = 'dumb'
+        self.app = Logria(None, False, False)
+        self.app.messages = [f'error {x}' if x % 3 == 0 else f'info {x}' for x in range(100)]
+
+    def test_tail_first(self):
+        """
+        Test that starting a scan only tests the newest messages
+        """
+        live = LiveFilter(self.app, tail=10)
+        self.assertTrue(live.start('error'))
+        self.assertEqual(live.matches, [90, 93, 96, 99])
+        self.assertEqual(live.scanned_from, 90)
+        self.assertFalse(live.is_complete('error'))
+
+    def test_backfill(self):
+        """
+        Test that backfilling finds older matches in order
+        """
+        live = LiveFilter(self.app, tail=10, batch_seconds=60)
+        live.start('error')
+        live.backfill()
+        self.assertEqual(live.matches, list(range(0, 100, 3)))
+        self.assertTrue(live.is_complete('error'))
+
+    def test_partial_backfill(self):
+        """
+        Test that batches found by a partial backfill are kept apart until the scan is done
+        """
+        live = LiveFilter(self.app, tail=10, batch_seconds=0.5)
+        live.start('error')
+        # Each backfill has time for one batch
+        with patch('logria.logger.live_filter.LIVE_FILTER_BATCH_SIZE', 20), \
+                patch('logria.logger.live_filter.time.perf_counter', side_effect=[0, 0, 1] * 2):
+            live.backfill()
+            live.backfill()
+        self.assertEqual(live.matches, [90, 93, 96, 99])
+        self.assertEqual(live.scanned_from, 50)
+        # Narrowing re-tests the backfilled matches too
+        live.start('error 5')
+        self.assertEqual(live.matches, [51, 54, 57])
+        live.start('error')
+        live.batch_seconds = 60
+        live.backfill()
+        self.assertEqual(live.matches, list(range(0, 100, 3)))
+        self.assertEqual(live.backfilled, [])
+
+    def test_refinement_keeps_progress(self):
+        """
+        Test that narrowing the command re-tests matches without restarting the scan
+        """
+        live = LiveFilter(self.app, tail=10, batch_seconds=60)
+        live.start('error')
+        live.start('error 9')
+        self.assertEqual(live.matches, [90, 93, 96, 99])
+        self.assertEqual(live.scanned_from, 90)
+        live.backfill()
+        self.assertEqual(live.matches, [9, 90, 93, 96, 99])
+
+    def test_new_command_restarts(self):
+        """
+        Test that an unrelated command starts over from the newest messages
+        """
+        live = LiveFilter(self.app, tail=10, batch_seconds=60)
+        live.start('error')
+        live.backfill()
+        live.start('info 9')
+        self.assertEqual(live.matches, [91, 92, 94, 95, 97, 98])
+        self.assertEqual(live.scanned_from, 90)
+
+    def test_invalid_and_empty_commands(self):
+        """
+        Test that incomplete regexes keep the previous results and empty ones clear them
+        """
+        live = LiveFilter(self.app, tail=10)
+        live.start('error')
+        self.assertFalse(live.start('error ('))
+        self.assertEqual(live.command, 'error')
+        self.assertTrue(live.start(''))
+        self.assertEqual(live.matches, [])
+        self.assertIsNone(live.func_handle)
+
+    def test_debounce(self):
+        """
+        Test that nothing is scanned until typing pauses
+        """
+        live = LiveFilter(self.app, debounce=60)
+        live.on_change('error ')
+        live.on_idle()
+        self.assertEqual(live.command, '')
+        self.assertEqual(live.pending, 'error')
+
+    def test_apply(self):
+        """
+        Test that applying the results sets the app's filter state
+        """
+        live = LiveFilter(self.app, batch_seconds=60)
+        live.start('error')
+        live.backfill()
+        live.apply()
+        self.assertIs(self.app.func_handle, live.func_handle)
+        self.assertEqual(self.app.regex_pattern, 'error')
+        self.assertEqual(self.app.matched_rows, list(range(0, 100, 3)))
+        self.assertEqual(self.app.last_index_regexed, 100)
+        self.assertEqual(self.app.match_spans.get(3), [(0, 5)])
+
+    def test_timeout_rejects_command(self):
+        """
+        Test that a filter that runs out of time is cleared and not retried
+        """
+        self.app.messages = ['a' * 32 + 'b']
+        live = LiveFilter(self.app, debounce=0)
+        live.show = lambda: None
+        with patch('logria.logger.processor.FILTER_BATCH_TIME_LIMIT', 0.1):
+            live.on_change(r'(a+)+$')
+            live.on_idle()
+        self.assertEqual(live.command, '')
+        self.assertEqual(live.rejected, r'(a+)+$')
+        self.assertFalse(live.start(r'(a+)+$'))
+
+    def test_cached_results(self):
+        """
+        Test that typing a recently used filter resumes its cached results, and replacing them caches them again
+        """
+        self.app.messages = self.app.stdout_messages
+        self.app.messages.extend(f'error {x}' if x % 3 == 0 else f'info {x}' for x in range(100))
+        self.app.filter_cache.store('stdout', 'error', CachedFilter([0, 3], MatchSpans(), 6))
+        live = LiveFilter(self.app, tail=10)
+        live.start('error')
+        self.assertTrue(live.is_complete('error'))
+        self.assertEqual(live.matches, [0, 3] + list(range(6, 100, 3)))
+        live.start('info')
+        self.assertEqual(self.app.filter_cache.take('stdout', 'error').last_index_regexed, 100)
@@ -0,0 +1,35 @@
+"""
+Unit Tests for match span storage
+"""
+
+import unittest
+
+from logria.utilities.match_spans import MatchSpans
+
+
+class TestMatchSpans(unittest.TestCase):
+    """
+    Test cases to ensure spans are stored and read back per message
+    """
+
+    def test_add_get(self):
+        """
+        Test that spans are read back as pairs
+        """
+        spans = MatchSpans()
+        spans.add(4, [0, 3, 10, 12])
+        spans.add(9, [])
+        self.assertEqual(spans.get(4), [(0, 3), (10, 12)])
+        self.assertEqual(spans.get(9), [])
+        self.assertIsNone(spans.get(5))
+        self.assertEqual(len(spans), 2)
+        self.assertIn(9, spans)
+
+    def test_size(self):
+        """
+        Test that size grows with the spans stored
+        """
+        spans = MatchSpans()
+        empty = spans.size_bytes()
+        spans.add(0, [0, 1])
+        self.assertGreater(spans.size_bytes(), empty)
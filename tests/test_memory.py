@@ -0,0 +1,117 @@
+"""
+Unit Tests for memory accounting
+"""
+
+import sys
+import unittest
+
+from logria.communication.input_history import HistoryTape
+from logria.logger.parser import Parser
+from logria.utilities import memory
+
+
+class TestMemoryTracker(unittest.TestCase):
+    """
+    Test cases to ensure the memory tracker keeps running totals
+    """
+
+    def test_add(self):
+        """
+        Test that adding items accumulates their sizes
+        """
+        tracker = memory.MemoryTracker()
+        tracker.add('stdout_messages', 'a')
+        tracker.add('stdout_messages', 'bb')
+        expected = memory.item_size('a') + memory.item_size('bb')
+        self.assertEqual(tracker.get('stdout_messages'), expected)
+
+    def test_reset(self):
+        """
+        Test that resetting a buffer only clears that buffer
+        """
+        tracker = memory.MemoryTracker()
+        tracker.add('stdout_messages', 'a')
+        tracker.add('stderr_messages', 'a')
+        tracker.reset('stdout_messages')
+        self.assertEqual(tracker.get('stdout_messages'), 0)
+        self.assertEqual(tracker.total(), memory.item_size('a'))
+
+    def test_get_missing(self):
+        """
+        Test that unknown buffers have no size
+        """
+        tracker = memory.MemoryTracker()
+        self.assertEqual(tracker.get('missing'), 0)
+
+    def test_item_size(self):
+        """
+        Test that item size includes the pointer to the item
+        """
+        self.assertEqual(memory.item_size('word'), sys.getsizeof('word') + memory.POINTER_SIZE)
+
+    def test_int_list_size(self):
+        """
+        Test that int list size scales with length
+        """
+        self.assertEqual(memory.int_list_size(0), 0)
+        self.assertEqual(memory.int_list_size(10), 10 * memory.int_list_size(1))
+
+
+class TestHumanReadable(unittest.TestCase):
+    """
+    Test that we format byte counts
+    """
+
+    def test_bytes(self):
+        """
+        Test small values stay in bytes
+        """
+        self.assertEqual(memory.human_readable(512), '512 B')
+
+    def test_kibibytes(self):
+        """
+        Test values over 1024 use binary units
+        """
+        self.assertEqual(memory.human_readable(2048), '2.0 KiB')
+
+    def test_mebibytes(self):
+        """
+        Test values over 1024 ** 2 use binary units
+        """
+        self.assertEqual(memory.human_readable(3 * 1024 ** 2), '3.0 MiB')
+
+
+class TestBufferAccounting(unittest.TestCase):
+    """
+    Test that buffers outside of Logria track their own sizes
+    """
+
+    def test_parser_analytics_bytes(self):
+        """
+        Test that only new Counter keys grow the analytics size
+        """
+        parser = Parser()
+        parser.set_pattern(
+            pattern=r'(\d)',
+            type_='regex',
+            name='Test',
+            example='4',
+            analytics_methods={
+                'Item': 'count'
+            }
+        )
+        parser.handle_analytics_for_message('1')
+        size = parser.analytics_bytes
+        self.assertGreater(size, 0)
+        parser.handle_analytics_for_message('1')
+        self.assertEqual(parser.analytics_bytes, size)
+        parser.reset_analytics()
+        self.assertEqual(parser.analytics_bytes, 0)
+
+    def test_history_tape_bytes(self):
+        """
+        Test that the history tape tracks its size
+        """
+        tape = HistoryTape(use_cache=False)
+        tape.add_item('test')
+        self.assertEqual(tape.size_bytes, memory.item_size('test'))
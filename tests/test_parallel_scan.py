@@ -0,0 +1,140 @@
+"""
+Unit Tests for scanning messages across processes
+"""
+
+import os
+import time
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+
+from logria.communication.shell_output import Logria
+from logria.logger import parallel_scan
+from logria.logger.parallel_scan import ParallelScan
+from logria.logger.processor import process_matches
+from logria.utilities.filter_expression import filter_test_generator
+
+
+def wait_for(scan: ParallelScan) -> list:
+    """
+    Collect every match from a scan
+    """
+    matches: List[int] = []
+    deadline = time.time() + 30
+    while not scan.done and time.time() < deadline:
+        matches.extend(index for index, _ in scan.collect())
+        time.sleep(0.01)
+    return matches
+
+
+class TestParallelScan(unittest.TestCase):
+    """
+    Test cases to ensure parallel scans match a serial scan
+    """
+
+    def setUp(self):
+        self.messages = [f'\u001b[32mrequest {x}\u001b[0m status={500 if x % 9 == 0 else 200} é'
+                         for x in range(1000)]
+
+    def test_matches_in_order(self):
+        """
+        Test that chunks are merged in buffer order
+        """
+        scan = ParallelScan(self.messages, 'status=500', 0, len(self.messages), chunk_size=64)
+        self.assertEqual(wait_for(scan), list(range(0, 1000, 9)))
+        self.assertEqual(scan.scanned, 1000)
+        self.assertIsNone(scan.segment)
+
+    def test_partial_range(self):
+        """
+        Test that a scan of part of the buffer returns buffer indexes
+        """
+        command = 'request AND NOT status=200'
+        scan = ParallelScan(self.messages, command, 500, 700, chunk_size=64)
+        func_handle = filter_test_generator(command)
+        expected = [index for index in range(500, 700) if func_handle(self.messages[index])]
+        self.assertEqual(wait_for(scan), expected)
+
+    def test_separator_in_messages(self):
+        """
+        Test that messages containing the first separator still split correctly
+        """
+        messages = ['a\x00b', 'status=500', 'c\x00status=500']
+        scan = ParallelScan(messages, 'status=500', 0, 3)
+        self.assertEqual(wait_for(scan), [1, 2])
+
+    def test_empty_range(self):
+        """
+        Test that an empty scan is done immediately
+        """
+        scan = ParallelScan(self.messages, 'status', 10, 10)
+        self.assertTrue(scan.done)
+        self.assertEqual(scan.collect(), [])
+
+    def test_spans(self):
+        """
+        Test that workers return the spans to highlight on the uncolored message
+        """
+        scan = ParallelScan(self.messages, 'status=500', 0, 10)
+        matches = []
+        while not scan.done:
+            matches.extend(scan.collect())
+            time.sleep(0.01)
+        self.assertEqual(matches, [(0, [10, 20]), (9, [10, 20])])
+
+    def test_process_matches_collects(self):
+        """
+        Test that process_matches collects a running scan, then continues serially
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        app.messages = self.messages
+        app.regex_pattern = 'status=500'
+        app.func_handle = filter_test_generator(app.regex_pattern)
+        app.parallel_scan = ParallelScan(app.messages, app.regex_pattern, 0, 900, chunk_size=100)
+        deadline = time.time() + 30
+        while app.parallel_scan is not None and time.time() < deadline:
+            process_matches(app)
+            time.sleep(0.01)
+        self.assertIsNone(app.parallel_scan)
+        process_matches(app)
+        self.assertEqual(app.matched_rows, list(range(0, 1000, 9)))
+        self.assertEqual(app.last_index_regexed, 1000)
+
+    def test_worker_failure(self):
+        """
+        Test that a failed worker ends the scan at its chunk and replaces a broken pool
+        """
+        scan = ParallelScan(self.messages, 'status=500', 0, 300, chunk_size=100)
+        executor = parallel_scan.get_executor()
+        for future, _ in scan.chunks:
+            future.result(timeout=30)
+        broken: Future = Future()
+        broken.set_exception(BrokenProcessPool())
+        scan.chunks[1] = (broken, scan.chunks[1][1])
+        self.assertEqual([index for index, _ in scan.collect()], list(range(0, 100, 9)))
+        self.assertTrue(scan.done)
+        self.assertTrue(scan.failed)
+        self.assertEqual(scan.scanned, 100)
+        self.assertIsNone(scan.segment)
+        self.assertIsNot(parallel_scan.get_executor(), executor)
+
+    def test_process_matches_after_failure(self):
+        """
+        Test that process_matches scans what a failed worker left in this process
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        app.messages = self.messages
+        app.regex_pattern = 'status=500'
+        app.func_handle = filter_test_generator(app.regex_pattern)
+        app.parallel_scan = ParallelScan(app.messages, app.regex_pattern, 0, 900, chunk_size=100)
+        failed: Future = Future()
+        failed.set_exception(MemoryError())
+        app.parallel_scan.chunks[0][0].cancel()
+        app.parallel_scan.chunks[0] = (failed, app.parallel_scan.chunks[0][1])
+        process_matches(app)
+        self.assertIsNone(app.parallel_scan)
+        self.assertEqual(app.matched_rows, list(range(0, 1000, 9)))
+        self.assertEqual(app.last_index_regexed, 1000)
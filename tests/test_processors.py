@@ -4,11 +4,15 @@ Unit Tests for processors
 
 import os
 import unittest
+from unittest.mock import patch
 
+from logria.commands.index import build_indexes
 from logria.communication.shell_output import Logria
 from logria.logger.parser import Parser
-from logria.logger.processor import process_matches, process_parser
+from logria.logger.processor import narrow_matches, process_matches, process_parser
 from logria.utilities import regex_generator
+from logria.utilities.filter_expression import filter_test_generator, span_test_generator
+from logria.utilities.watchdog import FilterTimeout
 
 
 class TestProcessors(unittest.TestCase):
@@ -40,6 +44,76 @@ class TestProcessors(unittest.TestCase):
 
         self.assertEqual(app.messages, [str(x) for x in range(20)])
 
+    def test_narrow_matches(self):
+        """
+        Test that narrowing only keeps previous matches that still match
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+
+        # Set fake messages
+        app.messages = [f'error {x}' if x % 2 else f'info {x}' for x in range(20)]
+
+        # Set regex function, process
+        app.func_handle = regex_generator.regex_test_generator('error')
+        process_matches(app)
+        self.assertEqual(app.matched_rows, list(range(1, 20, 2)))
+
+        # Refine the pattern, only previous matches are tested
+        app.func_handle = regex_generator.regex_test_generator('error 1')
+        narrow_matches(app)
+        self.assertEqual(app.matched_rows, [1, 11, 13, 15, 17, 19])
+
+        # New messages are still processed
+        app.messages.append('error 1000')
+        process_matches(app)
+        self.assertEqual(app.matched_rows, [1, 11, 13, 15, 17, 19, 20])
+
+    def test_process_matches_spans(self):
+        """
+        Test that processing and narrowing matches records their highlight spans
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        app.messages = ['error 1 error', 'info 2', 'error 3']
+
+        app.func_handle = filter_test_generator('error')
+        app.span_handle = span_test_generator('error')
+        process_matches(app)
+        self.assertEqual(app.matched_rows, [0, 2])
+        self.assertEqual(app.match_spans.get(0), [(0, 5), (8, 13)])
+        self.assertIsNone(app.match_spans.get(1))
+
+        app.func_handle = filter_test_generator('error 3')
+        app.span_handle = span_test_generator('error 3')
+        narrow_matches(app)
+        self.assertEqual(app.matched_rows, [2])
+        self.assertEqual(app.match_spans.get(2), [(0, 7)])
+        self.assertNotIn(0, app.match_spans)
+
+    def test_process_matches_with_index(self):
+        """
+        Test that indexed filtering finds the same matches as a full scan
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+
+        app.stdout_messages.extend(f'request {x} took {x % 7}ms' for x in range(50))
+        app.messages = app.stdout_messages
+        build_indexes(app)
+        app.stdout_messages.append('request 50 took 1ms')  # Not indexed
+
+        app.regex_pattern = r'took 3ms'
+        app.func_handle = regex_generator.regex_test_generator(app.regex_pattern)
+        process_matches(app)
+        self.assertEqual(app.matched_rows, [x for x in range(50) if x % 7 == 3])
+
+        # Messages indexed as they arrive are filtered by the index
+        app.stdout_messages.append('request 51 took 3ms')
+        app.stdout_index.add('request 51 took 3ms')
+        process_matches(app)
+        self.assertEqual(app.matched_rows[-1], 51)
+
     def test_process_parser_no_analytics(self):
         """
         Test that we correctly process parser with no analytics
@@ -544,3 +618,17 @@ class TestProcessors(unittest.TestCase):
         # Since we manually construct alaytics, create the the key
         app.parser.analytics[0] = None
         self.assertIsNone(app.parser.apply_analytics(0, 'A'))
+
+    def test_process_matches_timeout(self):
+        """
+        Test that a runaway filter raises instead of blocking
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        app.messages = ['a' * 32 + 'b']
+        app.regex_pattern = r'(a+)+$'
+        app.func_handle = filter_test_generator(app.regex_pattern)
+        app.span_handle = span_test_generator(app.regex_pattern)
+        with patch('logria.logger.processor.FILTER_BATCH_TIME_LIMIT', 0.1):
+            with self.assertRaises(FilterTimeout):
+                process_matches(app)
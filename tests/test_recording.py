@@ -0,0 +1,119 @@
+"""
+Unit Tests for recording and replaying streams
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from queue import Empty
+
+from logria.communication.input_handler import CommandInputStream, ReplayInputStream
+from logria.communication.recording import StreamRecorder, read_recording
+
+
+def drain(queue: multiprocessing.Queue) -> list:
+    """
+    Get all of the items currently in a queue
+    """
+    out_l = []
+    while True:
+        try:
+            out_l.append(queue.get(timeout=0.5))
+        except Empty:
+            return out_l
+
+
+class TestRecording(unittest.TestCase):
+    """
+    Test cases to ensure streams are recorded with timing
+    """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_recorder_round_trip(self):
+        """
+        Test that we read back what we record
+        """
+        with open(self.path, 'w') as f_out:
+            recorder = StreamRecorder(f_out)
+            recorder.write('stdout', 'a\n')
+            recorder.write('stderr', 'b\n')
+        records = list(read_recording(self.path))
+        self.assertEqual([(channel, message) for _, channel, message in records],
+                         [('stdout', 'a\n'), ('stderr', 'b\n')])
+        self.assertLessEqual(records[0][0], records[1][0])
+
+    def test_partial_line_ignored(self):
+        """
+        Test that a truncated final record is skipped
+        """
+        with open(self.path, 'w') as f_out:
+            f_out.write('[1.0, "stdout", "a"]\n[2.0, "std')
+        self.assertEqual(list(read_recording(self.path)), [(1.0, 'stdout', 'a')])
+
+    def test_command_stream_records(self):
+        """
+        Test that a command stream writes its messages to the recording
+        """
+        stream = CommandInputStream(['echo', 'recorded'], record_path=self.path)
+        stdoutq: multiprocessing.Queue = multiprocessing.Queue()
+        stderrq: multiprocessing.Queue = multiprocessing.Queue()
+        stream.run(['echo', 'recorded'], stdoutq, stderrq)
+        self.assertEqual([message for _, _, message in read_recording(self.path)], ['recorded\n'])
+
+    def test_command_stream_record_error(self):
+        """
+        Test that a recording file that cannot be opened is reported on stderr
+        """
+        path = os.path.join(self.path, 'recording.jsonl')
+        stream = CommandInputStream(['echo', 'recorded'], record_path=path)
+        stdoutq: multiprocessing.Queue = multiprocessing.Queue()
+        stderrq: multiprocessing.Queue = multiprocessing.Queue()
+        stream.run(['echo', 'recorded'], stdoutq, stderrq)
+        errors = drain(stderrq)
+        self.assertEqual(len(errors), 1)
+        self.assertIn(path, errors[0])
+
+    def test_replay_as_fast_as_possible(self):
+        """
+        Test that a replay with speed 0 sends every message to its queue
+        """
+        with open(self.path, 'w') as f_out:
+            f_out.write('[1.0, "stdout", "a"]\n[100.0, "stderr", "b"]\n[200.0, "stdout", "c"]\n')
+        stream = ReplayInputStream([self.path], speed=0)
+        stdoutq: multiprocessing.Queue = multiprocessing.Queue()
+        stderrq: multiprocessing.Queue = multiprocessing.Queue()
+        stream.run(self.path.split('/'), stdoutq, stderrq)
+        self.assertEqual(drain(stdoutq), ['a', 'c'])
+        self.assertEqual(drain(stderrq), ['b'])
+
+    def test_replay_speed(self):
+        """
+        Test that a replay waits for the recorded delay divided by the speed
+        """
+        with open(self.path, 'w') as f_out:
+            f_out.write('[1.0, "stdout", "a"]\n[2.0, "stdout", "b"]\n')
+        stream = ReplayInputStream([self.path], speed=10)
+        stdoutq: multiprocessing.Queue = multiprocessing.Queue()
+        stderrq: multiprocessing.Queue = multiprocessing.Queue()
+        started = time.perf_counter()
+        stream.run(self.path.split('/'), stdoutq, stderrq)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.1)
+        self.assertEqual(drain(stdoutq), ['a', 'b'])
+
+    def test_replay_missing_file(self):
+        """
+        Test that a missing recording is reported on stderr
+        """
+        stream = ReplayInputStream(['not_a_file'], speed=0)
+        stdoutq: multiprocessing.Queue = multiprocessing.Queue()
+        stderrq: multiprocessing.Queue = multiprocessing.Queue()
+        stream.run(['not_a_file'], stdoutq, stderrq)
+        self.assertEqual(len(drain(stderrq)), 1)
@@ -2,6 +2,7 @@
 Unit Tests for regex_generator
 """
 
+import re
 import unittest
 
 from logria.utilities import regex_generator
@@ -32,6 +33,35 @@ class TestRegexGenerator(unittest.TestCase):
         pattern = regex_generator.regex_test_generator(' - ')
         self.assertTrue(pattern(' \u001b[0m-\u001b[32m '))
 
+    def test_generated_literal_func(self):
+        """
+        Test that literal patterns match with and without escape codes
+        """
+        pattern = regex_generator.regex_test_generator('a-b')
+        self.assertTrue(pattern('xa-bx'))
+        self.assertTrue(pattern('a\u001b[0m-\u001b[32mb'))
+        self.assertFalse(pattern('a b'))
+
+    def test_generated_many_literals_func(self):
+        """
+        Test that large literal alternations match like the regex would
+        """
+        literals = [f'id{x:04}' for x in range(100)]
+        pattern = regex_generator.regex_test_generator('|'.join(literals))
+        self.assertTrue(pattern('request id0042 served'))
+        self.assertTrue(pattern('\u001b[32mid0099\u001b[0m'))
+        self.assertFalse(pattern('request id9999 served'))
+
+    def test_literal_alternatives(self):
+        """
+        Test that we only find literals in regex-free patterns
+        """
+        self.assertEqual(regex_generator.literal_alternatives('abc'), ['abc'])
+        self.assertEqual(regex_generator.literal_alternatives('a|b|c'), ['a', 'b', 'c'])
+        self.assertIsNone(regex_generator.literal_alternatives('a|b.c'))
+        self.assertIsNone(regex_generator.literal_alternatives('a||b'))
+        self.assertIsNone(regex_generator.literal_alternatives(''))
+
     def test_generated_invalid_regex(self):
         """
         Test that we match properly against a string with escape codes
@@ -40,6 +70,232 @@ class TestRegexGenerator(unittest.TestCase):
         self.assertIsNone(pattern)
 
 
+class TestCompilePattern(unittest.TestCase):
+    """
+    Test that compiled patterns are shared
+    """
+
+    def test_compile_pattern_cached(self):
+        """
+        Test that the same pattern returns the same compiled object
+        """
+        self.assertIs(regex_generator.compile_pattern('cache-me'),
+                      regex_generator.compile_pattern('cache-me'))
+
+    def test_compile_pattern_flags_in_key(self):
+        """
+        Test that flags are part of the cache key
+        """
+        sensitive = regex_generator.compile_pattern('flags')
+        insensitive = regex_generator.compile_pattern('flags', re.IGNORECASE)
+        self.assertIsNot(sensitive, insensitive)
+        self.assertTrue(insensitive.search('FLAGS'))
+        self.assertFalse(sensitive.search('FLAGS'))
+
+    def test_compile_pattern_invalid(self):
+        """
+        Test that invalid patterns still raise
+        """
+        with self.assertRaises(re.error):
+            regex_generator.compile_pattern('(')
+
+    def test_strip_ansi(self):
+        """
+        Test that we remove escape codes
+        """
+        self.assertEqual(regex_generator.strip_ansi('\u001b[0m word \u001b[32m'), ' word ')
+
+
+class TestRefinement(unittest.TestCase):
+    """
+    Test that we only narrow searches when the new pattern provably matches a subset
+    """
+
+    def test_same_pattern(self):
+        """
+        Test that a pattern refines itself
+        """
+        self.assertTrue(regex_generator.is_refinement('error', 'error'))
+
+    def test_appended_pattern(self):
+        """
+        Test that appending to a pattern refines it
+        """
+        self.assertTrue(regex_generator.is_refinement('error', 'error.*timeout'))
+        self.assertTrue(regex_generator.is_refinement('[ab]', '[ab]c'))
+        self.assertTrue(regex_generator.is_refinement('(a|b)', '(a|b)c'))
+
+    def test_prepended_pattern(self):
+        """
+        Test that prepending to a pattern refines it
+        """
+        self.assertTrue(regex_generator.is_refinement('timeout', 'error.*timeout'))
+
+    def test_quantifier_not_refinement(self):
+        """
+        Test that appending a quantifier changes the meaning of the old pattern
+        """
+        self.assertFalse(regex_generator.is_refinement('a', 'a*'))
+        self.assertFalse(regex_generator.is_refinement('a{2', 'a{2}'))
+
+    def test_alternation_not_refinement(self):
+        """
+        Test that top level alternations are never treated as refinements
+        """
+        self.assertFalse(regex_generator.is_refinement('a', 'a|b'))
+        self.assertFalse(regex_generator.is_refinement('a|b', 'a|bc'))
+
+    def test_character_class_not_refinement(self):
+        """
+        Test that wrapping a pattern in a class is not a refinement
+        """
+        self.assertFalse(regex_generator.is_refinement('a]', '[a]'))
+
+    def test_backreference_not_refinement(self):
+        """
+        Test that prepending groups to a pattern with backreferences is not a refinement
+        """
+        self.assertFalse(regex_generator.is_refinement(r'(a)\1', r'(b)(a)\1'))
+        self.assertFalse(regex_generator.is_refinement('(a)?(?(1)b|c)', '(x)(a)?(?(1)b|c)'))
+
+    def test_inline_flags_not_refinement(self):
+        """
+        Test that adding inline flags, which can widen the match, is not a refinement
+        """
+        self.assertFalse(regex_generator.is_refinement('error', '(?i)error'))
+        self.assertFalse(regex_generator.is_refinement('a', '(?i)a'))
+        self.assertFalse(regex_generator.is_refinement('a b', '(?x)a b'))
+        self.assertTrue(regex_generator.is_refinement('(?i)error', '(?i)error.*timeout'))
+
+    def test_unrelated_pattern(self):
+        """
+        Test that unrelated patterns are not refinements
+        """
+        self.assertFalse(regex_generator.is_refinement('abc', 'xyz'))
+        self.assertFalse(regex_generator.is_refinement('', 'xyz'))
+        self.assertFalse(regex_generator.is_refinement('a', '(a'))
+
+    def test_top_level_alternation(self):
+        """
+        Test that we only find alternations outside of groups, classes, and escapes
+        """
+        self.assertTrue(regex_generator.has_top_level_alternation('a|b'))
+        self.assertFalse(regex_generator.has_top_level_alternation('(a|b)'))
+        self.assertFalse(regex_generator.has_top_level_alternation('[|]'))
+        self.assertFalse(regex_generator.has_top_level_alternation(r'a\|b'))
+
+
+class TestRequiredLiterals(unittest.TestCase):
+    """
+    Test that we find the literal text every match of a pattern contains
+    """
+
+    def test_literal_pattern(self):
+        """
+        Test that a literal requires itself
+        """
+        self.assertEqual(regex_generator.required_literals('error'), ['error'])
+
+    def test_runs_split_on_syntax(self):
+        """
+        Test that groups, classes, and wildcards end a run
+        """
+        self.assertEqual(regex_generator.required_literals('foo.*barbaz'), ['foo', 'barbaz'])
+        self.assertEqual(regex_generator.required_literals('ERROR (db|cache) down'), ['ERROR ', ' down'])
+        self.assertEqual(regex_generator.required_literals('[abc]def'), ['def'])
+
+    def test_optional_characters_dropped(self):
+        """
+        Test that characters that may not appear are not required
+        """
+        self.assertEqual(regex_generator.required_literals('colou?r code'), ['colo', 'r code'])
+        self.assertEqual(regex_generator.required_literals('abc{0,2}def'), ['def'])
+        self.assertEqual(regex_generator.required_literals('ab+cd'), ['bcd'])
+
+    def test_escapes(self):
+        """
+        Test that escaped punctuation is literal and escaped classes are not
+        """
+        self.assertEqual(regex_generator.required_literals(r'x\.com'), ['x.com'])
+        self.assertEqual(regex_generator.required_literals(r'\d+ ms'), [' ms'])
+
+    def test_escape_payloads(self):
+        """
+        Test that the characters of a hex, octal, named, or group reference escape are not literals
+        """
+        for pattern in (r'\x41bcd', r'\u0041bcd', r'\U00000041bcd', r'\101bcd', r'\0bcd', r'\07bcd',
+                        r'\N{LATIN CAPITAL LETTER A}bcd', r'(A)\1bcd', r'(A)(b)(c)(d)(e)(f)(g)(h)(i)(j)(k)(l)\12bcd'):
+            self.assertEqual(regex_generator.required_literals(pattern), ['bcd'], pattern)
+
+    def test_no_required_literals(self):
+        """
+        Test that alternations and inline flags require nothing
+        """
+        self.assertEqual(regex_generator.required_literals('error|warn'), [])
+        self.assertEqual(regex_generator.required_literals('(?i)error'), [])
+        self.assertEqual(regex_generator.required_literals('ab'), [])
+
+
+class TestNestedQuantifier(unittest.TestCase):
+    """
+    Test that we find patterns that can backtrack catastrophically
+    """
+
+    def test_nested_quantifiers(self):
+        """
+        Test that quantified groups containing quantifiers are found
+        """
+        self.assertTrue(regex_generator.has_nested_quantifier(r'(a+)+$'))
+        self.assertTrue(regex_generator.has_nested_quantifier(r'(\w+\s*)*'))
+        self.assertTrue(regex_generator.has_nested_quantifier(r'((ab)+c)+'))
+        self.assertTrue(regex_generator.has_nested_quantifier(r'(?:x*y)*'))
+
+    def test_safe_patterns(self):
+        """
+        Test that single quantifiers, classes, and escaped parentheses are not flagged
+        """
+        self.assertFalse(regex_generator.has_nested_quantifier(r'(a|b)+'))
+        self.assertFalse(regex_generator.has_nested_quantifier(r'a+b+'))
+        self.assertFalse(regex_generator.has_nested_quantifier(r'[(a+)]+'))
+        self.assertFalse(regex_generator.has_nested_quantifier(r'\(a+\)+'))
+
+
+class TestSpans(unittest.TestCase):
+    """
+    Test that we find and highlight every match span
+    """
+
+    def test_literal_spans(self):
+        """
+        Test that every occurrence of a literal is found
+        """
+        find_spans = regex_generator.span_generator('ab')
+        self.assertEqual(find_spans('ab abab'), [0, 2, 3, 5, 5, 7])
+        self.assertEqual(find_spans('xyz'), [])
+
+    def test_many_literal_spans(self):
+        """
+        Test that Aho-Corasick spans do not overlap
+        """
+        literals = [f'id{x:03}' for x in range(100)]
+        find_spans = regex_generator.span_generator('|'.join(literals))
+        self.assertEqual(find_spans('id001 and id099'), [0, 5, 10, 15])
+
+    def test_regex_spans(self):
+        """
+        Test that empty regex matches are skipped
+        """
+        self.assertEqual(regex_generator.span_generator(r'\d*')('a12b3'), [1, 3, 4, 5])
+
+    def test_highlight_spans(self):
+        """
+        Test that only the spans are highlighted, not other occurrences of the same text
+        """
+        self.assertEqual(regex_generator.highlight_spans('ab ab', [(3, 5)]),
+                         'ab \u001b[35mab\u001b[0m')
+        self.assertEqual(regex_generator.highlight_spans('ab', []), 'ab')
+
+
 class TestRealLength(unittest.TestCase):
     """
     Test that we properly get real lengths
@@ -4,9 +4,11 @@ Tests the app launcher
 
 import os
 import unittest
+from unittest.mock import patch
 
 from logria.commands import scroll
-from logria.communication.render import determine_position
+from logria.commands.regex import reset_regex_status
+from logria.communication.render import determine_position, highlighted_segments
 from logria.communication.shell_output import Logria
 from logria.logger.processor import process_matches
 from logria.utilities import regex_generator
@@ -711,3 +713,202 @@ class TestCanRenderContentRangeKeypress(unittest.TestCase):
         self.assertEqual(start, 25)
         self.assertEqual(end, 33)
         app.stop()
+
+
+class TestMatchNavigation(unittest.TestCase):
+    """
+    Tests jumping between matches while showing every message
+    """
+
+    def setUp(self):
+        os.environ['TERM'] = 'dumb'
+        self.app = Logria(None, False, False)
+        self.app.height = 10
+        self.app.width = 100
+        self.app.last_row = self.app.height - 3
+        self.app.messages = [f'error {x}' if x % 10 == 5 else f'info {x}' for x in range(50)]
+        self.app.func_handle = regex_generator.regex_test_generator('error')
+        process_matches(self.app)
+        self.app.show_all_messages = True
+
+    def tearDown(self):
+        self.app.stop()
+
+    def test_next_and_previous(self):
+        """
+        Test that n and N move the last row to the adjacent match
+        """
+        self.app.current_end = 20
+        resolve_keypress(self.app, 'n')
+        self.assertEqual(self.app.current_end, 25)
+        self.assertTrue(self.app.manually_controlled_line)
+        resolve_keypress(self.app, 'n')
+        self.assertEqual(self.app.current_end, 35)
+        resolve_keypress(self.app, 'N')
+        resolve_keypress(self.app, 'N')
+        self.assertEqual(self.app.current_end, 15)
+        self.assertEqual(determine_position(self.app, self.app.messages), (7, 15))
+
+    def test_no_more_matches(self):
+        """
+        Test that jumping past the last match stays put
+        """
+        self.app.current_end = 45
+        resolve_keypress(self.app, 'n')
+        self.assertEqual(self.app.current_end, 45)
+        self.app.current_end = 5
+        resolve_keypress(self.app, 'N')
+        self.assertEqual(self.app.current_end, 5)
+
+    def test_filtered_view_ignores_jumps(self):
+        """
+        Test that n does nothing while only matches are shown
+        """
+        self.app.show_all_messages = False
+        self.app.current_end = 2
+        resolve_keypress(self.app, 'n')
+        self.assertEqual(self.app.current_end, 2)
+
+    def test_toggle_keeps_position(self):
+        """
+        Test that toggling the view keeps the same message on the last row
+        """
+        scroll.up(self.app)
+        self.app.current_end = 27
+        resolve_keypress(self.app, 'f')
+        self.assertFalse(self.app.show_all_messages)
+        self.assertEqual(self.app.matched_rows[self.app.current_end], 25)
+        resolve_keypress(self.app, 'f')
+        self.assertTrue(self.app.show_all_messages)
+        self.assertEqual(self.app.current_end, 25)
+
+    def test_reset_shows_matches(self):
+        """
+        Test that clearing the filter also stops showing every message, so the next filter shows only matches
+        """
+        with patch.object(self.app, 'write_to_command_line'):
+            reset_regex_status(self.app)
+        self.assertFalse(self.app.show_all_messages)
+
+
+class TestWrappedRows(unittest.TestCase):
+    """
+    Tests positioning renders by the wrapped height of each message
+    """
+
+    def setUp(self):
+        os.environ['TERM'] = 'dumb'
+        self.app = Logria(None, False, False)
+        self.app.height = 10
+        self.app.width = 10
+        self.app.last_row = self.app.height - 3
+        # Every third message wraps onto three rows
+        self.app.messages = ['a' * 25 if x % 3 == 0 else str(x) for x in range(60)]
+
+    def tearDown(self):
+        self.app.stop()
+
+    def test_stick_to_top(self):
+        """
+        Test that only the messages that fit on screen are rendered from the top
+        """
+        scroll.top(self.app)
+        start, end = determine_position(self.app, self.app.messages)
+        self.assertEqual(start, -1)
+        self.assertEqual(end, 3)  # Messages 0-2 take 5 rows, and message 3 would not fit
+
+    def test_pgup_by_rows(self):
+        """
+        Test that page up moves by a screen of wrapped rows, not messages
+        """
+        scroll.jump_to(self.app, 30)
+        resolve_keypress(self.app, 'KEY_PPAGE')
+        # Messages 28-30 take 5 rows and message 27 did not fit, so it is now on the last row
+        self.assertEqual(self.app.current_end, 27)
+
+    def test_pgdn_by_rows(self):
+        """
+        Test that page down moves by a screen of wrapped rows, and stops at the last message
+        """
+        scroll.jump_to(self.app, 30)
+        resolve_keypress(self.app, 'KEY_NPAGE')
+        self.assertEqual(self.app.current_end, 35)  # Messages 31-35 take the next 7 rows
+        scroll.jump_to(self.app, 58)
+        resolve_keypress(self.app, 'KEY_NPAGE')
+        self.assertEqual(self.app.current_end, 59)
+
+    def test_percent(self):
+        """
+        Test jumping a percentage of the way through the rows
+        """
+        scroll.to_percent(self.app, 0)
+        self.assertEqual(self.app.current_end, 0)
+        scroll.to_percent(self.app, 50)
+        self.assertEqual(self.app.current_end, 29)
+        scroll.to_percent(self.app, 100)
+        self.assertEqual(self.app.current_end, 59)
+
+    def test_no_wrap(self):
+        """
+        Test that every message takes one row when messages do not wrap
+        """
+        resolve_keypress(self.app, 'w')
+        scroll.top(self.app)
+        start, end = determine_position(self.app, self.app.messages)
+        self.assertEqual((start, end), (-1, 6))  # Messages 0-6 fill the 7 rows
+        scroll.jump_to(self.app, 30)
+        resolve_keypress(self.app, 'KEY_PPAGE')
+        self.assertEqual(self.app.current_end, 23)
+
+    def test_scroll_columns(self):
+        """
+        Test that columns only scroll when messages do not wrap, and not past the first column
+        """
+        resolve_keypress(self.app, '>')
+        self.assertEqual(self.app.column, 0)
+        resolve_keypress(self.app, 'w')
+        resolve_keypress(self.app, '>')
+        resolve_keypress(self.app, 'KEY_SRIGHT')
+        self.assertEqual(self.app.column, 10)
+        resolve_keypress(self.app, '<')
+        resolve_keypress(self.app, '<')
+        resolve_keypress(self.app, 'KEY_SLEFT')
+        self.assertEqual(self.app.column, 0)
+        resolve_keypress(self.app, '>')
+        resolve_keypress(self.app, 'w')
+        self.assertEqual((self.app.wrap, self.app.column), (True, 0))
+
+    def test_scroll_columns_stops(self):
+        """
+        Test that columns do not scroll past the end of the widest message on screen
+        """
+        resolve_keypress(self.app, 'w')
+        for _ in range(10):
+            resolve_keypress(self.app, '>')
+        self.assertEqual(self.app.column, 15)  # The 25 column messages end at the window edge
+        resolve_keypress(self.app, '<')
+        self.assertEqual(self.app.column, 10)
+        self.app.messages = [str(x) for x in range(60)]
+        resolve_keypress(self.app, '>')
+        self.assertEqual(self.app.column, 10)
+
+
+class TestHighlightedSegments(unittest.TestCase):
+    """
+    Tests building the segments of messages colored by highlight rules or matches
+    """
+
+    def test_whole_message(self):
+        """
+        Test that wrapped messages keep every colored range
+        """
+        self.assertEqual(highlighted_segments('error 日本\n', [(0, 5, (1, -1))], None),
+                         (('error', (1, -1)), (' 日本', (-1, -1))))
+
+    def test_columns(self):
+        """
+        Test that messages that do not wrap are cut to the columns shown
+        """
+        self.assertEqual(highlighted_segments('error 日本 x', [(0, 5, (1, -1))], (3, 6)),
+                         (('or', (1, -1)), (' 日 ', (-1, -1))))
+        self.assertEqual(highlighted_segments('error', [(0, 5, (1, -1))], (10, 6)), ())
@@ -0,0 +1,49 @@
+"""
+Unit Tests for limiting how often the output window is rendered
+"""
+
+import unittest
+
+from logria.communication.render_scheduler import RenderScheduler
+
+
+class TestRenderScheduler(unittest.TestCase):
+    """
+    Test cases to ensure changes are coalesced into frames
+    """
+
+    def test_first_render(self):
+        """
+        Test that the first frame is rendered immediately
+        """
+        self.assertTrue(RenderScheduler(30).due(now=0))
+
+    def test_clean(self):
+        """
+        Test that nothing is rendered when nothing changed
+        """
+        scheduler = RenderScheduler(30)
+        scheduler.rendered(now=0)
+        self.assertFalse(scheduler.due(now=10))
+
+    def test_coalesce(self):
+        """
+        Test that changes within one frame interval are rendered together once it passes
+        """
+        scheduler = RenderScheduler(10)
+        scheduler.rendered(now=0)
+        scheduler.mark_dirty()
+        self.assertFalse(scheduler.due(now=0.05))
+        scheduler.mark_dirty()
+        self.assertTrue(scheduler.due(now=0.1))
+        scheduler.rendered(now=0.1)
+        self.assertFalse(scheduler.due(now=0.3))
+
+    def test_unlimited(self):
+        """
+        Test that 0 renders on every change
+        """
+        scheduler = RenderScheduler(0)
+        scheduler.rendered(now=5)
+        scheduler.mark_dirty()
+        self.assertTrue(scheduler.due(now=5))
@@ -0,0 +1,91 @@
+"""
+Unit Tests for the wrapped heights of messages
+"""
+
+import random
+import unittest
+from math import ceil
+
+from logria.utilities.row_heights import NO_WRAP, UNKNOWN, RowHeights
+
+
+class TestRowHeights(unittest.TestCase):
+    """
+    Test cases to ensure rows are found from the cached heights
+    """
+
+    def setUp(self):
+        self.messages = ['a' * length for length in (5, 25, 0, 10, 31, 3)]
+        self.heights = RowHeights()
+        self.heights.sync(self.messages, 10)
+
+    def test_height(self):
+        """
+        Test that heights count wrapped rows, ignoring color codes
+        """
+        self.assertEqual([self.heights.height(i) for i in range(6)], [1, 3, 0, 1, 4, 1])
+        self.heights.sync(['\x1b[31m' + 'a' * 10 + '\x1b[0m'], 10)
+        self.assertEqual(self.heights.height(0), 1)
+
+    def test_lazy(self):
+        """
+        Test that only the messages asked for are measured
+        """
+        self.heights.height(4)
+        self.assertEqual(list(self.heights.heights), [UNKNOWN] * 4 + [4])
+        self.assertEqual(self.heights.find(3), 1)
+        self.assertEqual(len(self.heights.tree), 2)
+
+    def test_prefix_and_find(self):
+        """
+        Test that prefix sums and row lookups match a linear scan
+        """
+        rows = [1, 3, 0, 1, 4, 1]
+        for count in range(7):
+            self.assertEqual(self.heights.prefix(count), sum(rows[:count]))
+        # Row 0 is in message 0, rows 1-3 in message 1, and row 4 in message 3 since message 2 is empty
+        self.assertEqual([self.heights.find(row) for row in range(11)], [0, 1, 1, 1, 3, 4, 4, 4, 4, 5, 6])
+
+    def test_random(self):
+        """
+        Test random buffers against a linear scan
+        """
+        rng = random.Random(7)
+        for _ in range(50):
+            width = rng.randint(1, 20)
+            messages = ['a' * rng.randint(0, 60) for _ in range(rng.randint(0, 100))]
+            heights = RowHeights()
+            heights.sync(messages, width)
+            rows = [ceil(len(message) / width) for message in messages]
+            for _ in range(10):
+                row = rng.randint(0, sum(rows) + 2)
+                expected = max(count for count in range(len(rows) + 1) if sum(rows[:count]) <= row)
+                self.assertEqual(heights.find(row), expected)
+
+    def test_append(self):
+        """
+        Test that messages added to the buffer are measured
+        """
+        self.assertEqual(self.heights.prefix(6), 10)
+        self.messages.append('a' * 20)
+        self.assertEqual(self.heights.prefix(7), 12)
+
+    def test_resize(self):
+        """
+        Test that a new width or buffer drops the old heights
+        """
+        self.heights.prefix(6)
+        self.heights.sync(self.messages, 5)
+        self.assertEqual(len(self.heights.tree), 0)
+        self.assertEqual(self.heights.prefix(6), 16)
+        self.heights.sync(['a'], 5)
+        self.assertEqual(self.heights.prefix(6), 1)
+
+    def test_no_wrap(self):
+        """
+        Test that every message takes one row when messages do not wrap
+        """
+        self.heights.sync(self.messages, NO_WRAP)
+        self.assertEqual([self.heights.height(i) for i in range(6)], [1] * 6)
+        self.assertEqual(self.heights.prefix(6), 6)
+        self.assertEqual(self.heights.find(3), 3)
@@ -0,0 +1,116 @@
+"""
+Unit Tests for redrawing only the rows of the output window that changed
+"""
+
+import unittest
+
+from logria.interface.screen_rows import ScreenRows
+
+
+class Window():
+    """
+    Records the rows drawn, cleared, and scrolled instead of drawing them
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def erase(self):
+        self.calls.append(('erase',))
+
+    def idlok(self, flag):
+        pass
+
+    def scrollok(self, flag):
+        pass
+
+    def scroll(self, lines):
+        self.calls.append(('scroll', lines))
+
+    def move(self, row, column):
+        pass
+
+    def clrtoeol(self):
+        self.calls.append(('clear',))
+
+
+def one_row_lines(messages, height):
+    """
+    Lay out one row messages from the bottom of the window, like a render does
+    """
+    return [(height - 1 - position, 1, message) for position, message in enumerate(reversed(messages))]
+
+
+class TestScreenRows(unittest.TestCase):
+    """
+    Test cases to ensure frames only draw what changed
+    """
+
+    def setUp(self):
+        self.window = Window()
+        self.screen = ScreenRows()
+        self.drawn = []
+
+    def draw(self, lines, height=4):
+        """
+        Draw a frame, returning the lines drawn and the calls made to the window
+        """
+        self.drawn = []
+        self.window.calls = []
+        self.screen.draw(self.window, height, lines, lambda window, row, contents: self.drawn.append((row, contents)))
+        return self.drawn, self.window.calls
+
+    def test_first_frame(self):
+        """
+        Test that the first frame erases the window and draws every line
+        """
+        drawn, calls = self.draw(one_row_lines(['a', 'b', 'c', 'd'], 4))
+        self.assertEqual(calls, [('erase',)])
+        self.assertEqual(sorted(drawn), [(0, 'a'), (1, 'b'), (2, 'c'), (3, 'd')])
+
+    def test_unchanged(self):
+        """
+        Test that drawing the same frame again draws nothing
+        """
+        self.draw(one_row_lines(['a', 'b', 'c', 'd'], 4))
+        drawn, calls = self.draw(one_row_lines(['a', 'b', 'c', 'd'], 4))
+        self.assertEqual((drawn, calls), ([], []))
+
+    def test_append_scrolls(self):
+        """
+        Test that new messages scroll the window and only the new rows are drawn
+        """
+        self.draw(one_row_lines(['a', 'b', 'c', 'd'], 4))
+        drawn, calls = self.draw(one_row_lines(['c', 'd', 'e', 'f'], 4))
+        self.assertEqual(calls[0], ('scroll', 2))
+        self.assertEqual(sorted(drawn), [(2, 'e'), (3, 'f')])
+
+    def test_changed_rows(self):
+        """
+        Test that only rows whose contents changed are redrawn, like after a new filter
+        """
+        self.draw(one_row_lines(['a', 'b', 'c', 'd'], 4))
+        drawn, calls = self.draw(one_row_lines(['a', 'x', 'c', 'y'], 4))
+        self.assertNotIn(('scroll', 2), calls)
+        self.assertEqual(sorted(drawn), [(1, 'x'), (3, 'y')])
+
+    def test_wrapped_lines(self):
+        """
+        Test that a wrapped line is redrawn when any of its rows change, and blank rows are cleared
+        """
+        self.draw([(0, 2, 'long'), (2, 1, 'b'), (3, 1, 'c')])
+        drawn, calls = self.draw([(1, 2, 'long'), (3, 1, 'c')])
+        self.assertEqual(drawn, [(1, 'long')])
+        self.assertEqual(calls.count(('clear',)), 3)  # The two rows of the line, and the blank row 0
+
+    def test_invalidate(self):
+        """
+        Test that every row is drawn again after invalidating, or in a new window
+        """
+        self.draw(one_row_lines(['a', 'b'], 4))
+        self.screen.invalidate()
+        drawn, calls = self.draw(one_row_lines(['a', 'b'], 4))
+        self.assertEqual((len(drawn), calls), (2, [('erase',)]))
+        self.window = Window()
+        drawn, _ = self.draw(one_row_lines(['a', 'b'], 4))
+        self.assertEqual(len(drawn), 2)
@@ -0,0 +1,137 @@
+"""
+Unit Tests for buffer snapshots
+"""
+
+import os
+import tempfile
+import unittest
+
+from logria.communication.metadata import MessageMetadata
+from logria.utilities import snapshot
+
+
+def build_buffer(messages, source=0):
+    """
+    Create a messages list and its metadata
+    """
+    metadata = MessageMetadata()
+    for index, _ in enumerate(messages):
+        metadata.append(1000.0 + index, source)
+    return messages, metadata
+
+
+class TestSnapshot(unittest.TestCase):
+    """
+    Test cases to ensure snapshots can be saved and restored
+    """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        """
+        Test that we restore the same messages we saved
+        """
+        stdout = [f'line {x}\n' for x in range(100)]
+        stderr = ['error ✓\n', '']
+        snapshot.save_snapshot(self.path, [build_buffer(stdout), build_buffer(stderr, 1)])
+        stdout_buffer, stderr_buffer = snapshot.open_snapshot(self.path)
+        self.assertEqual(list(stdout_buffer), stdout)
+        self.assertEqual(list(stderr_buffer), stderr)
+
+    def test_metadata(self):
+        """
+        Test that we restore the timestamp and source of each message
+        """
+        snapshot.save_snapshot(self.path, [build_buffer(['a', 'b']), build_buffer(['c'], 3)])
+        stdout_buffer, stderr_buffer = snapshot.open_snapshot(self.path)
+        self.assertEqual(stdout_buffer.metadata.get(1), (1001.0, 0))
+        self.assertEqual(stderr_buffer.metadata.get(0), (1000.0, 3))
+        self.assertEqual(len(stdout_buffer.metadata), 2)
+
+    def test_empty(self):
+        """
+        Test that we can save and restore empty buffers
+        """
+        snapshot.save_snapshot(self.path, [build_buffer([]), build_buffer([])])
+        stdout_buffer, stderr_buffer = snapshot.open_snapshot(self.path)
+        self.assertEqual(len(stdout_buffer), 0)
+        self.assertEqual(len(stderr_buffer), 0)
+
+    def test_indexing(self):
+        """
+        Test that negative indexes and slices work like lists
+        """
+        messages = [str(x) for x in range(10)]
+        snapshot.save_snapshot(self.path, [build_buffer(messages), build_buffer([])])
+        stdout_buffer, _ = snapshot.open_snapshot(self.path)
+        self.assertEqual(stdout_buffer[-1], '9')
+        self.assertEqual(stdout_buffer[2:5], ['2', '3', '4'])
+        with self.assertRaises(IndexError):
+            stdout_buffer[10]  # pylint: disable=pointless-statement
+
+    def test_append(self):
+        """
+        Test that new messages are kept after the mapped messages
+        """
+        snapshot.save_snapshot(self.path, [build_buffer(['a']), build_buffer([])])
+        stdout_buffer, _ = snapshot.open_snapshot(self.path)
+        stdout_buffer.append('b')
+        stdout_buffer.metadata.append(5.0, 2)
+        self.assertEqual(list(stdout_buffer), ['a', 'b'])
+        self.assertEqual(stdout_buffer.metadata.get(1), (5.0, 2))
+
+    def test_sources(self):
+        """
+        Test that the sources of mapped and appended messages are read in order
+        """
+        snapshot.save_snapshot(self.path, [build_buffer(['a', 'b'], 2), build_buffer([])])
+        stdout_buffer, _ = snapshot.open_snapshot(self.path)
+        stdout_buffer.append('c')
+        stdout_buffer.metadata.append(5.0, 1)
+        self.assertEqual(list(stdout_buffer.metadata.sources), [2, 2, 1])
+
+    def test_is_snapshot(self):
+        """
+        Test that we can detect snapshot files
+        """
+        snapshot.save_snapshot(self.path, [build_buffer([]), build_buffer([])])
+        self.assertTrue(snapshot.is_snapshot(self.path))
+        self.assertFalse(snapshot.is_snapshot('README.md'))
+        self.assertFalse(snapshot.is_snapshot('not_a_file'))
+
+    def test_open_invalid(self):
+        """
+        Test that we refuse to open files that are not snapshots
+        """
+        with open(self.path, 'w') as f_out:
+            f_out.write('not a snapshot, but long enough to hold a footer')
+        with self.assertRaises(ValueError):
+            snapshot.open_snapshot(self.path)
+
+    def test_requires_two_buffers(self):
+        """
+        Test that we only save stdout and stderr pairs
+        """
+        with self.assertRaises(ValueError):
+            snapshot.save_snapshot(self.path, [build_buffer([])])
+
+
+class TestMessageMetadata(unittest.TestCase):
+    """
+    Test that message metadata is stored compactly
+    """
+
+    def test_append_get(self):
+        """
+        Test that we get back what we store
+        """
+        metadata = MessageMetadata()
+        metadata.append(1.5, 4)
+        self.assertEqual(metadata.get(0), (1.5, 4))
+        self.assertEqual(len(metadata), 1)
+        self.assertEqual(metadata.size_bytes(), 10)
@@ -0,0 +1,94 @@
+"""
+Unit Tests for the trigram index
+"""
+
+import unittest
+
+from logria.utilities.regex_generator import required_literals
+from logria.utilities.trigram_index import TrigramIndex, split_candidates, trigrams
+
+
+class TestTrigramIndex(unittest.TestCase):
+    """
+    Test cases to ensure the trigram index finds candidate messages
+    """
+
+    def setUp(self):
+        self.index = TrigramIndex(block_size=1)
+        self.index.extend(['connection refused', 'request served', '\u001b[31mconnection\u001b[0m reset'])
+
+    def test_trigrams(self):
+        """
+        Test that we get each distinct trigram once
+        """
+        self.assertEqual(trigrams('aaaa'), {'aaa'})
+        self.assertEqual(trigrams('abcd'), {'abc', 'bcd'})
+        self.assertEqual(trigrams('ab'), set())
+
+    def test_candidates(self):
+        """
+        Test that candidates contain every trigram of every literal, ignoring color codes
+        """
+        self.assertEqual(self.index.candidates(['connection']), [0, 2])
+        self.assertEqual(self.index.candidates(['connection', 'reset']), [2])
+        self.assertEqual(self.index.candidates(['served']), [1])
+
+    def test_candidates_start(self):
+        """
+        Test that candidates before start are skipped
+        """
+        self.assertEqual(self.index.candidates(['connection'], 1), [2])
+
+    def test_missing_trigram(self):
+        """
+        Test that a literal with an unseen trigram has no candidates
+        """
+        self.assertEqual(self.index.candidates(['timeout']), [])
+
+    def test_escaped_literals(self):
+        """
+        Test that messages matching a pattern with hex or octal escapes are candidates
+        """
+        index = TrigramIndex(block_size=1)
+        index.extend(['Abcd here', 'nothing'])
+        for pattern in (r'\x41bcd', r'\101bcd', r'\u0041bcd', r'\N{LATIN CAPITAL LETTER A}bcd'):
+            self.assertEqual(index.candidates(required_literals(pattern)), [0], pattern)
+
+    def test_short_literals(self):
+        """
+        Test that literals without trigrams cannot use the index
+        """
+        self.assertIsNone(self.index.candidates(['ab']))
+        self.assertIsNone(self.index.candidates([]))
+
+    def test_cap(self):
+        """
+        Test that the index stops growing once it reaches its cap
+        """
+        index = TrigramIndex(max_bytes=1, block_size=1)
+        index.extend(['first message', 'second message'])
+        self.assertTrue(index.full)
+        self.assertEqual(index.size, 1)
+        self.assertGreater(index.size_bytes, 0)
+
+    def test_blocks(self):
+        """
+        Test that every message in a matching block is a candidate, and partial blocks are not indexed
+        """
+        index = TrigramIndex(block_size=2)
+        index.extend(['alpha', 'beta', 'gamma', 'delta', 'epsilon'])
+        self.assertEqual(index.size, 4)
+        self.assertEqual(index.pending, ['epsilon'])
+        self.assertEqual(index.candidates(['gamma']), [2, 3])
+        self.assertEqual(index.candidates(['gamma'], 3), [3])
+
+    def test_split_candidates(self):
+        """
+        Test that messages past the end of the index are left to scan
+        """
+        candidates, scan_from = split_candidates(self.index, ['connection'], 0, 5)
+        self.assertEqual(candidates, [0, 2])
+        self.assertEqual(scan_from, 3)
+        candidates, scan_from = split_candidates(self.index, ['ab'], 0, 5)
+        self.assertIsNone(candidates)
+        self.assertEqual(scan_from, 0)
@@ -0,0 +1,54 @@
+"""
+Unit Tests for filter time limits
+"""
+
+import re
+import unittest
+
+from logria.utilities.watchdog import FilterTimeout, probe_filter, time_limit
+
+# Backtracks exponentially on a run of `a` that does not end the string
+CATASTROPHIC_PATTERN = r'(a+)+$'
+CATASTROPHIC_MESSAGE = 'a' * 32 + 'b'
+
+
+class TestTimeLimit(unittest.TestCase):
+    """
+    Test cases to ensure runaway regexes are interrupted
+    """
+
+    def test_interrupts_regex(self):
+        """
+        Test that a catastrophically backtracking match is interrupted
+        """
+        pattern = re.compile(CATASTROPHIC_PATTERN)
+        with self.assertRaises(FilterTimeout):
+            with time_limit(0.1):
+                pattern.search(CATASTROPHIC_MESSAGE)
+
+    def test_fast_block(self):
+        """
+        Test that a block that finishes in time is not interrupted, and later work is not either
+        """
+        with time_limit(0.1):
+            self.assertIsNotNone(re.search('b', CATASTROPHIC_MESSAGE))
+        with time_limit(0.1):
+            pass
+
+
+class TestProbeFilter(unittest.TestCase):
+    """
+    Test cases to ensure probing filters in a worker process
+    """
+
+    def test_slow_filter(self):
+        """
+        Test that a runaway filter fails the probe
+        """
+        self.assertFalse(probe_filter(CATASTROPHIC_PATTERN, [CATASTROPHIC_MESSAGE], 0.2))
+
+    def test_fast_filter(self):
+        """
+        Test that a normal filter passes the probe
+        """
+        self.assertTrue(probe_filter(r'a+b', [CATASTROPHIC_MESSAGE] * 100, 5))
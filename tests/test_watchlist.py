@@ -0,0 +1,135 @@
+"""
+Unit Tests for the watchlist of named patterns
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from logria.commands.watch import load_watchlist, watch_report
+from logria.communication.shell_output import Logria
+from logria.utilities.watchlist import Watchlist, scoped_pattern
+
+
+class TestWatchlist(unittest.TestCase):
+    """
+    Test cases to ensure every watched pattern is counted from one search
+    """
+
+    def setUp(self):
+        self.watchlist = Watchlist()
+        self.watchlist.add('timeout', r'timed out')
+        self.watchlist.add('5xx', r'\b5\d\d\b')
+        self.watchlist.add('oom', r'(?i)out of memory')
+
+    def check(self, messages):
+        """
+        Check each message as if it arrived in stdout
+        """
+        for index, message in enumerate(messages):
+            self.watchlist.check(message, 'stdout', index)
+
+    def test_counts(self):
+        """
+        Test that each pattern counts the messages it matches, including several in one message
+        """
+        self.check(['GET / 503 timed out', 'OUT OF MEMORY', 'GET / 200', 'GET / 500'])
+        hits = {name: watched.hits for name, watched in self.watchlist.patterns.items()}
+        self.assertEqual(hits, {'timeout': 1, '5xx': 2, 'oom': 1})
+        self.assertEqual(self.watchlist.patterns['5xx'].last_hit, ('stdout', 3))
+
+    def test_one_combined_search(self):
+        """
+        Test that combinable patterns share one alternation, searched once for a message that matches none
+        """
+        self.assertEqual(len(self.watchlist.separate), 0)
+        with patch.object(self.watchlist, 'combined', wraps=self.watchlist.combined) as combined:
+            self.check(['GET / 200'])
+        self.assertEqual(combined.search.call_count, 1)
+
+    def test_overlapping_patterns(self):
+        """
+        Test that a match of one pattern does not hide an overlapping match of another
+        """
+        self.watchlist.add('err', 'ERR')
+        self.watchlist.add('error', 'ERROR')
+        self.watchlist.add('foo bar', 'foo bar')
+        self.watchlist.add('bar', 'bar')
+        self.check(['ERROR x', 'foo bar'])
+        hits = {name: self.watchlist.patterns[name].hits for name in ('err', 'error', 'foo bar', 'bar')}
+        self.assertEqual(hits, {'err': 1, 'error': 1, 'foo bar': 1, 'bar': 1})
+
+    def test_separate_patterns(self):
+        """
+        Test that patterns with backreferences are searched on their own
+        """
+        self.watchlist.add('repeat', r'(\w+) \1')
+        self.assertEqual(len(self.watchlist.separate), 1)
+        self.check(['again again'])
+        self.assertEqual(self.watchlist.patterns['repeat'].hits, 1)
+        self.assertIsNone(scoped_pattern(r'(?P<word>\w+)'))
+        self.assertEqual(scoped_pattern(r'(?i)error'), r'(?i:error)')
+
+    def test_replace_and_remove(self):
+        """
+        Test that replacing a pattern resets its counter, and removing it stops counting
+        """
+        self.check(['timed out'])
+        self.watchlist.add('timeout', r'timeout')
+        self.assertEqual(self.watchlist.patterns['timeout'].hits, 0)
+        self.assertTrue(self.watchlist.remove('timeout'))
+        self.assertFalse(self.watchlist.remove('timeout'))
+        self.check(['timeout'])
+        self.assertEqual(list(self.watchlist.patterns), ['5xx', 'oom'])
+
+    def test_invalid_patterns(self):
+        """
+        Test that invalid and always matching patterns are refused
+        """
+        with self.assertRaises(ValueError):
+            self.watchlist.add('bad', 'error (')
+        with self.assertRaises(ValueError):
+            self.watchlist.add('empty', 'x*')
+        self.assertEqual(list(self.watchlist.patterns), ['timeout', '5xx', 'oom'])
+
+    def test_verbose_comment(self):
+        """
+        Test that a verbose pattern ending in a comment can share the alternation
+        """
+        self.watchlist.add('verbose', '(?x)error # comment')
+        self.watchlist.add('after', 'later')
+        self.check(['an error', 'later'])
+        self.assertEqual(self.watchlist.patterns['verbose'].hits, 1)
+        self.assertEqual(self.watchlist.patterns['after'].hits, 1)
+        self.assertEqual(len(self.watchlist.separate), 0)
+
+    def test_report(self):
+        """
+        Test that the report shows each pattern's hits and latest message
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        app.watchlist = self.watchlist
+        app.stdout_messages.extend(['GET / 200', 'GET / 502'])
+        self.check(app.stdout_messages)
+        report = watch_report(app)
+        self.assertIn('  5xx /\\b5\\d\\d\\b/: 1, last in stdout #1: GET / 502', report)
+        self.assertIn('  oom /(?i)out of memory/: 0', report)
+        app.stop()
+
+    def test_load(self):
+        """
+        Test that a JSON file of patterns is loaded
+        """
+        os.environ['TERM'] = 'dumb'
+        app = Logria(None, False, False)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'watchlist.json')
+            with open(path, 'w') as watch_file:
+                json.dump({'deadlock': 'deadlock detected', 'oom': 'OOM'}, watch_file)
+            load_watchlist(app, path)
+        self.assertEqual(list(app.watchlist.patterns), ['deadlock', 'oom'])
+        self.assertEqual(app.current_status, 'Watching 2 patterns')
+        app.stop()